@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Script so sánh profile trình duyệt 'full' và 'lean' khi lấy danh sách sản phẩm bằng Selenium:
+số byte đã tải và thời gian cho mỗi danh mục
+"""
+import argparse
+import json
+import logging
+import sys
+import os
+import time
+
+# Thêm thư mục gốc vào Python path
+sys.path.append(os.path.dirname(__file__))
+
+from config.settings import VITAMIN_KHOANG_CHAT
+from src.crawlers.browser_pool import BrowserPool
+from src.crawlers.longchau_crawler import LongChauCrawler
+
+def transferred_bytes(performance_logs):
+    """Tổng số byte đã tải qua mạng (encodedDataLength của các request đã hoàn thành)"""
+    total = 0
+    for entry in performance_logs:
+        message = json.loads(entry['message'])['message']
+        if message.get('method') == 'Network.loadingFinished':
+            total += message['params'].get('encodedDataLength', 0)
+    return total
+
+def measure(profile, category_urls):
+    """Lấy danh sách sản phẩm của từng danh mục với một profile, trả về [(danh mục, số URL, byte, giây)]"""
+    # Một driver duy nhất, không khởi động lại giữa các danh mục để chỉ đo phần tải trang
+    pool = BrowserPool(size=1, max_pages_per_driver=0, max_memory_mb=0,
+                       profile=profile, capture_network=True)
+    crawler = LongChauCrawler(use_cache=False, archive_dir=None, listing_source='browser')
+    crawler.browser_pool = pool
+
+    rows = []
+    try:
+        with pool.driver() as driver:
+            driver.get_log('performance')  # Khởi động Chrome trước khi đo
+
+        for category_url in category_urls:
+            start = time.perf_counter()
+            product_urls = crawler.get_product_urls_from_browser(category_url)
+            elapsed = time.perf_counter() - start
+            with pool.driver() as driver:
+                size = transferred_bytes(driver.get_log('performance'))
+            rows.append((category_url, len(product_urls), size, elapsed))
+    finally:
+        pool.close()
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='So sánh byte tải và thời gian giữa các profile trình duyệt')
+    parser.add_argument('category_urls', nargs='*',
+                        help='Các danh mục cần đo (mặc định: 3 danh mục vitamin đầu tiên)')
+    parser.add_argument('--profiles', nargs='+', choices=['full', 'lean'], default=['full', 'lean'])
+    args = parser.parse_args()
+
+    category_urls = args.category_urls or [f"thuc-pham-chuc-nang/{sub}" for sub in VITAMIN_KHOANG_CHAT[:3]]
+    logging.disable(logging.INFO)
+
+    results = {profile: measure(profile, category_urls) for profile in args.profiles}
+
+    print(f"\n{'Profile':<8} {'Danh mục':<45} {'URL':>5} {'KB':>10} {'Giây':>8}")
+    for profile, rows in results.items():
+        for category_url, count, size, elapsed in rows:
+            print(f"{profile:<8} {category_url:<45} {count:>5} {size / 1024:>10.0f} {elapsed:>8.1f}")
+
+    print("\n📊 Tổng mỗi danh mục (trung bình):")
+    for profile, rows in results.items():
+        total_kb = sum(row[2] for row in rows) / 1024
+        total_time = sum(row[3] for row in rows)
+        print(f"   {profile}: {total_kb / len(rows):.0f} KB, {total_time / len(rows):.1f} s")
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Script so sánh tốc độ phân loại URL: cách kiểm tra chuỗi con cũ của is_product_url / is_product_image
+với UrlClassifier (gọi từng URL và classify_many theo lô); kiểm tra cả hai cho cùng kết quả
+"""
+import argparse
+import random
+import re
+import sys
+import os
+import time
+
+# Thêm thư mục gốc vào Python path
+sys.path.append(os.path.dirname(__file__))
+
+from config.settings import BASE_URL
+from src.utils.url_classifier import UrlClassifier, PRODUCT_PAGE, PRODUCT_IMAGE, OTHER
+
+def legacy_is_product_url(url):
+    """is_product_url trước khi có UrlClassifier"""
+    parts = url.replace(BASE_URL, '').split('/')
+    return (len(parts) >= 3 and
+            url.endswith('.html') and
+            not any(exclude in url for exclude in ['?', '#', 'page=', 'sort=']))
+
+def legacy_is_product_image(src):
+    """is_product_image trước khi có UrlClassifier"""
+    if not src:
+        return False
+    src_lower = src.lower()
+    exclude_patterns = [
+        'logo', 'banner', 'icon', 'badge', 'smalls/',
+        'facebook', 'zalo', 'download', 'payment',
+        'visa', 'master', 'momo', 'napas', 'vnpay',
+        'apple_pay', 'amex', 'jcb', 'bo_cong_thuong',
+        'legit_', 'dmca_', 'search_', 'menu_',
+        'truyen_thong', 'tin_khuyen_mai', 'chuyen_trang',
+        'deep_link', 'goc_suc_khoe', 'short_video',
+        'cup_', 'benh_', 'thuong_hieu', 'danh_muc',
+        'kiem_tra_suc_khoe', 'header_', 'footer_'
+    ]
+    for exclude in exclude_patterns:
+        if exclude in src_lower:
+            return False
+    if 'cms-prod.s3-sgn09.fptcloud.com' in src_lower:
+        if 'dsc_' in src_lower:
+            return True
+        product_name_patterns = [
+            'lineabon', 'omexxel', 'calci', 'vitamin', 'nutrimed',
+            'nutrigrow', 'osteocare', 'vitabiotics', 'anica',
+            'pharma', 'ergopharm', 'nordic', 'excelife'
+        ]
+        for pattern in product_name_patterns:
+            if pattern in src_lower:
+                return True
+        if re.search(r'00\d{6}', src):
+            return True
+    return False
+
+def legacy_classify(url):
+    if not url:
+        return OTHER
+    if legacy_is_product_url(url):
+        return PRODUCT_PAGE
+    if legacy_is_product_image(url):
+        return PRODUCT_IMAGE
+    return OTHER
+
+def sample_urls(count, seed=0, assets=300):
+    """URL giống trang danh mục / gallery thật: trang sản phẩm và ảnh sản phẩm (mỗi URL khác nhau) lẫn với
+    logo, banner, icon, link menu/phân trang lặp lại trên mọi trang (lấy từ `assets` URL cố định)"""
+    rng = random.Random(seed)
+    cdn = 'https://cdn.nhathuoclongchau.com.vn/unsafe/768x0/filters:quality(90)/https://cms-prod.s3-sgn09.fptcloud.com'
+    unique = [
+        lambda i: f"{BASE_URL}/thuc-pham-chuc-nang/vien-uong-bo-sung-{i}.html",
+        lambda i: f"/thuc-pham-chuc-nang/vitamin-khoang-chat/san-pham-{i}.html",
+        lambda i: f"{cdn}/DSC_{i:05d}_a1b2c3.jpg",
+        lambda i: f"{cdn}/00{i % 1000000:06d}_vien_uong.png",
+        lambda i: f"{cdn}/vitamin_c_{i}.jpg",
+    ]
+    shared = [
+        lambda i: f"{BASE_URL}/thuc-pham-chuc-nang?page={i % 20}",
+        lambda i: f"{BASE_URL}/thuc-pham-chuc-nang/sap-xep-{i}.html?sort=price",
+        lambda i: f"{cdn}/logo_{i}.png",
+        lambda i: f"{cdn}/banner_web_{i}.jpg",
+        lambda i: f"https://cdn.nhathuoclongchau.com.vn/unsafe/https://cms-prod.s3-sgn09.fptcloud.com/smalls/icon_{i}.png",
+        lambda i: f"{BASE_URL}/bai-viet/tin-tuc-{i}",
+    ]
+    asset_urls = [rng.choice(shared)(i) for i in range(assets)]
+    return [rng.choice(unique)(i) if rng.random() < 0.3 else rng.choice(asset_urls) for i in range(count)]
+
+def best_of(func, repeat):
+    """Thời gian nhanh nhất; mỗi lần đo dùng UrlClassifier mới (cache rỗng)"""
+    best = float('inf')
+    for _ in range(repeat):
+        classifier = UrlClassifier()
+        start = time.perf_counter()
+        func(classifier)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='So sánh tốc độ phân loại URL cũ và UrlClassifier')
+    parser.add_argument('--count', type=int, default=5000, help='Số URL mỗi lô (mặc định: 5000)')
+    parser.add_argument('--assets', type=int, default=300,
+                        help='Số URL logo/banner/menu lặp lại giữa các trang (mặc định: 300)')
+    parser.add_argument('--repeat', type=int, default=20, help='Số lần đo, lấy lần nhanh nhất')
+    args = parser.parse_args()
+
+    urls = sample_urls(args.count, assets=args.assets)
+    classifier = UrlClassifier()
+
+    expected = [legacy_classify(url) for url in urls]
+    assert [classifier.classify(url) for url in urls] == expected, "classify khác kết quả cũ"
+    assert UrlClassifier().classify_many(urls) == expected, "classify_many khác kết quả cũ"
+
+    results = [
+        ('Cũ (chuỗi con)', best_of(lambda _: [legacy_classify(url) for url in urls], args.repeat)),
+        ('UrlClassifier.classify', best_of(lambda c: [c.classify(url) for url in urls], args.repeat)),
+        ('UrlClassifier.classify_many', best_of(lambda c: c.classify_many(urls), args.repeat)),
+    ]
+
+    baseline = results[0][1]
+    print(f"\n{len(urls)} URL ({len(set(urls))} URL khác nhau), kết quả giống nhau ✅")
+    print(f"{'Cách':<30} {'ms/lô':>8} {'µs/URL':>8} {'Nhanh hơn':>10}")
+    for name, elapsed in results:
+        print(f"{name:<30} {elapsed * 1000:>8.2f} {elapsed / len(urls) * 1e6:>8.2f} {baseline / elapsed:>9.1f}x")
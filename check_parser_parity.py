@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script kiểm tra các backend parser HTML cho ra cùng một bản ghi sản phẩm
+"""
+import argparse
+import logging
+import sys
+import os
+import time
+
+# Thêm thư mục gốc vào Python path
+sys.path.append(os.path.dirname(__file__))
+
+from config.settings import HTML_ARCHIVE_DIR, HTML_PARSER_BACKENDS
+from src.crawlers.longchau_crawler import LongChauCrawler
+from src.utils.html_archive import HtmlArchive
+
+def load_pages(html_files, archive_dir, limit):
+    """Lấy danh sách (url, html) từ các file HTML hoặc từ archive"""
+    pages = []
+    for path in html_files:
+        with open(path, 'rb') as f:
+            pages.append((path, f.read()))
+
+    if not html_files and os.path.isdir(archive_dir):
+        archive = HtmlArchive(archive_dir)
+        for entry in archive.latest_entries().values():
+            pages.append((entry['url'], archive.read(entry)))
+            if limit and len(pages) >= limit:
+                break
+    return pages
+
+def check_parity(pages, parsers):
+    """So sánh bản ghi của từng parser với parser đầu tiên, trả về số trang khác nhau"""
+    crawlers = {name: LongChauCrawler(use_cache=False, archive_dir=None, parser=name) for name in parsers}
+    # Tắt log trích xuất để thời gian đo chỉ gồm parse + extract
+    logging.disable(logging.CRITICAL)
+
+    timings = {name: 0.0 for name in parsers}
+    mismatches = 0
+    reference = parsers[0]
+
+    for url, html in pages:
+        records = {}
+        for name, crawler in crawlers.items():
+            start = time.perf_counter()
+            record = crawler.parse_product_page(url, html)
+            timings[name] += time.perf_counter() - start
+            record.pop('crawled_at', None)
+            records[name] = record
+
+        for name in parsers[1:]:
+            diff_fields = [field for field in records[reference]
+                           if records[reference][field] != records[name].get(field)]
+            if diff_fields:
+                mismatches += 1
+                print(f"❌ {url}: {reference} và {name} khác nhau ở {', '.join(diff_fields)}")
+                for field in diff_fields:
+                    print(f"     {field}:")
+                    print(f"       {reference}: {str(records[reference][field])[:200]}")
+                    print(f"       {name}: {str(records[name].get(field))[:200]}")
+
+    logging.disable(logging.NOTSET)
+
+    print(f"\n⏱️  Thời gian parse + extract trung bình mỗi trang ({len(pages)} trang):")
+    for name in parsers:
+        print(f"   {name}: {timings[name] / len(pages) * 1000:.1f} ms")
+    return mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Kiểm tra tính tương đương giữa các backend parser HTML')
+    parser.add_argument('html_files', nargs='*', help='Các file HTML trang chi tiết (mặc định: đọc từ archive)')
+    parser.add_argument('--from-archive', default=HTML_ARCHIVE_DIR,
+                        help=f'Thư mục archive HTML (mặc định: {HTML_ARCHIVE_DIR})')
+    parser.add_argument('--parsers', nargs='+', choices=list(HTML_PARSER_BACKENDS),
+                        default=list(HTML_PARSER_BACKENDS),
+                        help='Các parser cần so sánh, parser đầu tiên là chuẩn')
+    parser.add_argument('--limit', type=int, default=200, help='Số trang tối đa lấy từ archive')
+    args = parser.parse_args()
+
+    pages = load_pages(args.html_files, args.from_archive, args.limit)
+    if not pages:
+        print("⚠️  Không có trang nào để kiểm tra")
+        sys.exit(1)
+
+    mismatches = check_parity(pages, args.parsers)
+    if mismatches:
+        print(f"\n❌ {mismatches}/{len(pages)} trang cho kết quả khác nhau")
+        sys.exit(1)
+    print(f"\n✅ Tất cả {len(pages)} trang cho kết quả giống nhau trên {', '.join(args.parsers)}")
@@ -15,16 +15,152 @@ REQUEST_DELAY = 1
 RANDOM_DELAY_RANGE = (0.5, 2.0)
 
 # Cấu hình retry
-MAX_RETRIES = 3
+MAX_RETRIES = 3  # Số lần thử của engine async (engine sync/pipeline dùng retry adapter, xem HTTP_POOL_RETRIES)
 RETRY_DELAY = 2
+HTTP_RETRY_STATUSES = (429, 500, 502, 503, 504)  # Chỉ retry các mã này (và lỗi kết nối/timeout); 4xx khác báo lỗi ngay
+REQUEST_TIMEOUT = 10
+
+# Cấu hình connection pool HTTP (keep-alive)
+HTTP_POOL_CONNECTIONS = 10  # Số host được giữ pool riêng
+HTTP_POOL_MAXSIZE = 10  # Số kết nối tối đa tới mỗi host
+HTTP_POOL_RETRIES = 3  # Số lần retry của adapter (lỗi kết nối, 429, 5xx), lớp retry duy nhất của make_request
+
+# Cấu hình cache HTTP trên đĩa (ETag / Last-Modified)
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_DIR = "cache/http"
+HTTP_CACHE_MAX_SIZE = 500 * 1024 * 1024  # Dung lượng tối đa (bytes), vượt quá sẽ xóa theo LRU
+HTTP_CACHE_TTL = 7 * 24 * 3600  # Thời gian sống của một entry (giây)
+
+# Cấu hình lưu trữ HTML thô của các trang đã tải
+HTML_ARCHIVE_ENABLED = True
+HTML_ARCHIVE_DIR = "data/archive"
+HTML_ARCHIVE_SEGMENT_SIZE = 256 * 1024 * 1024  # Kích thước tối đa mỗi file segment (bytes)
+
+# Parser HTML cho BeautifulSoup: 'html.parser' (thuần Python) hoặc 'lxml' (C, nhanh hơn)
+HTML_PARSER = 'html.parser'
+HTML_PARSER_BACKENDS = ('html.parser', 'lxml')
+
+# Lấy dữ liệu sản phẩm từ payload JSON nhúng trong trang trước, DOM selector làm fallback
+JSON_FIRST_EXTRACTION = True
+
+# Cấu hình engine tải trang chi tiết: 'sync' (tuần tự), 'async' (aiohttp)
+# hoặc 'pipeline' (tải trang chi tiết ngay trong lúc đang lấy danh sách sản phẩm)
+CRAWL_ENGINE = 'sync'
+ASYNC_CONCURRENCY = 8  # Số request đồng thời tối đa ở chế độ async / số thread tải ở chế độ pipeline
+
+# Cấu hình từng bước của engine pipeline (listing → tải → parse/extract → ghi)
+PIPELINE_QUEUE_SIZE = 100  # Số URL tối đa chờ giữa bước listing và bước tải
+PIPELINE_PARSE_WORKERS = 2  # Số process parse/extract (engine async và pipeline)
+PIPELINE_PARSE_QUEUE_SIZE = 16  # Số trang HTML đã tải tối đa chờ parse
+PIPELINE_WRITE_QUEUE_SIZE = 64  # Số bản ghi tối đa chờ ghi
 
 # Cấu hình output
 OUTPUT_DIR = "data"
 LOG_DIR = "logs"
 
+# Log được ghi ra file/console từ một thread nền (QueueListener), luồng crawl chỉ đưa bản ghi vào hàng đợi
+LOG_LEVEL = 'INFO'  # Log chi tiết từng trường/từng ảnh ở mức DEBUG (--verbose)
+LOG_STRUCTURED = False  # True: file log là JSON Lines (thời gian, mức, logger, message, các trường extra)
+
+# Ghi từng bản ghi ra file JSON Lines ngay khi crawl xong thay vì giữ tất cả trong bộ nhớ,
+# save_data gộp lại thành JSON/CSV ở cuối. Lần chạy có checkpoint luôn ghi vào data/runs/<RUN_ID>/products.jsonl
+STREAM_OUTPUT = False
+STREAM_FLUSH_EVERY = 20  # Flush ra đĩa sau mỗi N bản ghi
+STREAM_FLUSH_INTERVAL = 5  # ... hoặc sau mỗi N giây
+
+# Trường văn bản lớn (HTML đã làm sạch, thường hàng chục KB mỗi sản phẩm):
+# 'inline' (giữ trong bản ghi), 'ref' (lưu nén trong blob store, bản ghi và file xuất chỉ giữ tham chiếu
+# 'sha256:<hash>') hoặc 'exclude' (lưu trong blob store, không xuất ra file JSON/CSV)
+LARGE_FIELDS = ('content', 'description', 'ingredients')
+LARGE_FIELDS_MODE = 'inline'
+LARGE_FIELDS_MODES = ('inline', 'ref', 'exclude')
+BLOB_STORE_PATH = "data/blobs.db"
+
+# Tải ảnh sản phẩm song song với việc crawl trang chi tiết (--download-images)
+IMAGE_DOWNLOAD_ENABLED = False
+IMAGE_DIR = "data/images"  # Ảnh lưu theo SHA-256 nội dung: data/images/ab/abcd....jpg, kèm manifest.db
+IMAGE_DOWNLOAD_WORKERS = 8  # Số ảnh được tải cùng lúc
+IMAGE_VARIANT = '768x0'  # Kích thước trên CDN (đoạn /unsafe/WxH/), 'original' cho ảnh gốc, None giữ nguyên URL
+
+# Checkpoint của mỗi lần crawl (danh mục, URL đã tìm thấy / đã xong / lỗi) để chạy tiếp bằng --resume RUN_ID
+CHECKPOINT_ENABLED = True
+RUNS_DIR = "data/runs"  # Mỗi lần chạy có thư mục riêng: data/runs/<RUN_ID>/state.db, products.jsonl
+CHECKPOINT_COMMIT_EVERY = 100  # Trạng thái URL (và chỉ mục chống trùng, snapshot) được commit theo lô: sau mỗi N lần ghi...
+CHECKPOINT_COMMIT_INTERVAL = 2  # ...hoặc N giây, và khi kết thúc danh mục / đóng crawler
+
+# Chống trùng sản phẩm giữa các danh mục (theo URL chuẩn hóa và SKU): mỗi sản phẩm chỉ tải một lần,
+# trường 'categories' của bản ghi liệt kê mọi danh mục chứa nó. Chỉ mục được lưu cùng checkpoint của lần chạy.
+DEDUP_ENABLED = True
+# > 0 (số URL dự kiến): Bloom filter trước SQLite, URL mới được thêm mà không phải tra SQLite trước.
+# Không giảm bộ nhớ: dùng thêm ~1,8 byte mỗi URL dự kiến với tỷ lệ sai 0,1%
+DEDUP_BLOOM_CAPACITY = 0
+DEDUP_BLOOM_ERROR_RATE = 0.001
+
+# Cấu hình lấy danh sách sản phẩm: 'api' (endpoint JSON của trang danh mục),
+# 'browser' (Selenium bấm 'Xem thêm') hoặc 'auto' (API trước, lỗi thì dùng Selenium)
+LISTING_SOURCE = 'auto'
+LISTING_API_URL = "https://api.nhathuoclongchau.com.vn/lccus/search-product-service/api/products/ecom/product/search/cate"
+LISTING_API_PAGE_SIZE = 40
+LISTING_API_CONCURRENCY = 4  # Số trang API được tải song song
+
+# Crawl tăng dần: chỉ tải lại sản phẩm mới hoặc có tín hiệu thay đổi (lastmod, giá/tên trên listing),
+# sản phẩm không đổi được lấy lại từ snapshot của lần crawl trước
+SNAPSHOT_DB = "data/snapshot.db"
+INCREMENTAL_MAX_AGE = 7 * 24 * 60 * 60  # Luôn tải lại sản phẩm đã quá 7 ngày chưa tải (giây)
+
+# Sitemap của website (URL hoặc file local, có thể là sitemap index / file .xml.gz) cho chế độ sitemap
+SITEMAP_URL = f"{BASE_URL}/sitemap.xml"
+
 # Cấu hình Selenium (nếu cần)
 SELENIUM_TIMEOUT = 10
 HEADLESS_MODE = True
+CHROMEDRIVER_PATH = None  # Đường dẫn ChromeDriver có sẵn, None thì tải bằng webdriver-manager (một lần mỗi process)
+
+# Cấu hình pool trình duyệt dùng chung cho cả lần chạy
+BROWSER_POOL_SIZE = 2  # Số Chrome chạy song song để lấy danh sách sản phẩm
+BROWSER_MAX_PAGES_PER_DRIVER = 10  # Khởi động lại driver sau số trang danh mục này
+BROWSER_MAX_MEMORY_MB = 1024  # Khởi động lại driver khi JS heap vượt ngưỡng (MB)
+
+# Profile trình duyệt cho trang danh mục: 'lean' (chặn ảnh/font/media/analytics, page load 'eager')
+# hoặc 'full' (tải trang đầy đủ như trình duyệt thường)
+BROWSER_PROFILE = 'lean'
+BLOCKED_URL_PATTERNS = [
+    # Ảnh, font, media: chỉ cần href của sản phẩm
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.svg', '*.ico',
+    '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot',
+    '*.mp4', '*.webm', '*.mp3',
+    # Analytics / quảng cáo / tracking
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*',
+    '*facebook.com/tr*', '*hotjar.com*', '*clarity.ms*', '*tiktok.com*', '*criteo*', '*accesstrade*',
+]
+
+# Cấu hình bấm 'Xem thêm' trên trang danh mục
+BROWSER_LOAD_MORE_TIMEOUT = 10  # Thời gian tối đa đợi grid có thêm sản phẩm sau mỗi lần bấm (giây)
+BROWSER_MAX_LOAD_MORE_CLICKS = 500  # Trần an toàn, số lần bấm thực tế được tính theo số sản phẩm còn lại
+
+# Quy tắc phân loại URL (src/utils/url_classifier.py): mỗi danh sách được dựng thành tuple chuỗi con một lần,
+# kết quả phân loại được cache theo URL
+PRODUCT_URL_EXCLUDE_PATTERNS = ['?', '#', 'page=', 'sort=']  # URL có các chuỗi này không phải trang sản phẩm
+IMAGE_CDN_HOST = 'cms-prod.s3-sgn09.fptcloud.com'  # Ảnh sản phẩm luôn nằm trên CDN này
+IMAGE_EXCLUDE_PATTERNS = [
+    'logo', 'banner', 'icon', 'badge', 'smalls/',
+    'facebook', 'zalo', 'download', 'payment',
+    'visa', 'master', 'momo', 'napas', 'vnpay',
+    'apple_pay', 'amex', 'jcb', 'bo_cong_thuong',
+    'legit_', 'dmca_', 'search_', 'menu_',
+    'truyen_thong', 'tin_khuyen_mai', 'chuyen_trang',
+    'deep_link', 'goc_suc_khoe', 'short_video',
+    'cup_', 'benh_', 'thuong_hieu', 'danh_muc',
+    'kiem_tra_suc_khoe', 'header_', 'footer_',
+]
+# Ảnh chụp sản phẩm (DSC_) hoặc tên sản phẩm / thương hiệu cụ thể trong URL
+IMAGE_INCLUDE_PATTERNS = [
+    'dsc_',
+    'lineabon', 'omexxel', 'calci', 'vitamin', 'nutrimed',
+    'nutrigrow', 'osteocare', 'vitabiotics', 'anica',
+    'pharma', 'ergopharm', 'nordic', 'excelife',
+]
+IMAGE_PRODUCT_CODE_PATTERN = r'00\d{6}'  # Mã sản phẩm trong tên file ảnh
 
 # Headers mặc định
 DEFAULT_HEADERS = {
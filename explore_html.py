@@ -2,7 +2,6 @@
 """
 Script khám phá cấu trúc HTML của Long Châu để tìm CSS selectors đúng
 """
-import requests
 from bs4 import BeautifulSoup
 import sys
 import os
@@ -11,13 +10,17 @@ import os
 sys.path.append(os.path.dirname(__file__))
 
 from config.settings import BASE_URL, DEFAULT_HEADERS
+from src.utils.helpers import create_session
+
+# Session dùng chung để tái sử dụng kết nối keep-alive giữa các request
+session = create_session(DEFAULT_HEADERS)
 
 def explore_page_structure(url):
     """Khám phá cấu trúc HTML của một trang"""
     print(f"🔍 Exploring: {url}")
     
     try:
-        response = requests.get(url, headers=DEFAULT_HEADERS, timeout=10)
+        response = session.get(url, timeout=10)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         print(f"✅ Status: {response.status_code}")
@@ -90,7 +93,7 @@ def test_product_page(product_url):
     print(f"\n🔍 Testing product page: {product_url}")
     
     try:
-        response = requests.get(product_url, headers=DEFAULT_HEADERS, timeout=10)
+        response = session.get(product_url, timeout=10)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         print(f"✅ Status: {response.status_code}")
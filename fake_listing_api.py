@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Server giả lập endpoint API listing của Long Châu để chạy thử crawler không cần mạng
+
+VD:
+    python3 fake_listing_api.py --port 8765 --products 120
+    python3 main.py --mode single --category-url thuc-pham-chuc-nang/canxi-vitamin-D \\
+        --listing api --listing-api-url http://127.0.0.1:8765/search/cate
+"""
+import argparse
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_products(category_url, count):
+    """Sinh danh sách sản phẩm cố định cho một danh mục"""
+    main_category = category_url.split('/')[0]
+    slug = category_url.split('/')[-1].lower()
+    return [
+        {
+            'sku': f"00{index:06d}",
+            'webName': f"Sản phẩm {slug} {index}",
+            'slug': f"{main_category}/san-pham-{slug}-{index}.html",
+            'price': {'price': 10000 + index * 1000, 'measureUnitName': 'Hộp'},
+        }
+        for index in range(1, count + 1)
+    ]
+
+class FakeListingHandler(BaseHTTPRequestHandler):
+    products_per_category = 100
+    latency = 0.0
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            category_url = (payload.get('category') or [''])[0]
+            skip = int(payload.get('skipCount', 0))
+            size = int(payload.get('maxResultCount', 20))
+        except (ValueError, TypeError):
+            self.send_error(400, 'Invalid payload')
+            return
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        products = make_products(category_url, self.products_per_category) if category_url else []
+        body = json.dumps({
+            'products': products[skip:skip + size],
+            'totalCount': len(products),
+        }, ensure_ascii=False).encode('utf-8')
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Server giả lập API listing sản phẩm')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--products', type=int, default=100, help='Số sản phẩm mỗi danh mục')
+    parser.add_argument('--latency', type=float, default=0.0, help='Độ trễ giả lập mỗi request (giây)')
+    args = parser.parse_args()
+
+    FakeListingHandler.products_per_category = args.products
+    FakeListingHandler.latency = args.latency
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), FakeListingHandler)
+    print(f"🧪 Fake listing API: http://127.0.0.1:{args.port}/search/cate ({args.products} sản phẩm/danh mục)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Đã dừng server")
@@ -2,7 +2,6 @@
 """
 Script tìm sản phẩm thực tế trên Long Châu
 """
-import requests
 from bs4 import BeautifulSoup
 import sys
 import os
@@ -12,6 +11,10 @@ import re
 sys.path.append(os.path.dirname(__file__))
 
 from config.settings import BASE_URL, DEFAULT_HEADERS
+from src.utils.helpers import create_session
+
+# Session dùng chung để tái sử dụng kết nối keep-alive giữa các request
+session = create_session(DEFAULT_HEADERS)
 
 def find_actual_products():
     """Tìm sản phẩm thực tế"""
@@ -29,7 +32,7 @@ def find_actual_products():
         print(f"\n🔍 Testing: {url}")
         
         try:
-            response = requests.get(url, headers=DEFAULT_HEADERS, timeout=10)
+            response = session.get(url, timeout=10)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             print(f"✅ Status: {response.status_code}")
@@ -74,7 +77,7 @@ def test_product_detail(product_url):
     print(f"\n🔍 Testing product detail: {product_url}")
     
     try:
-        response = requests.get(product_url, headers=DEFAULT_HEADERS, timeout=10)
+        response = session.get(product_url, timeout=10)
         soup = BeautifulSoup(response.content, 'html.parser')
         
         print(f"✅ Status: {response.status_code}")
@@ -154,7 +157,7 @@ def search_for_products():
         search_url = f"{BASE_URL}/tim-kiem?s={term}"
         
         try:
-            response = requests.get(search_url, headers=DEFAULT_HEADERS, timeout=10)
+            response = session.get(search_url, timeout=10)
             soup = BeautifulSoup(response.content, 'html.parser')
             
             print(f"✅ Status: {response.status_code}")
@@ -5,13 +5,23 @@ Script chính để chạy crawler Long Châu
 import argparse
 import sys
 import os
+import re
+from datetime import datetime
 
 # Thêm thư mục gốc vào Python path
 sys.path.append(os.path.dirname(__file__))
 
 from src.crawlers.longchau_crawler import LongChauCrawler
+from src.utils.crawl_state import CrawlState
+from src.utils.helpers import setup_logging
 from config.settings import *
 
+def image_variant_arg(value: str) -> str:
+    """Kiểm tra giá trị của --image-variant"""
+    if value in ('original', 'keep') or re.fullmatch(r'\d+x\d+', value):
+        return value
+    raise argparse.ArgumentTypeError(f"'{value}' không hợp lệ, dùng WxH (VD: 768x0), original hoặc keep")
+
 def main():
     parser = argparse.ArgumentParser(description='Crawler cho website Long Châu')
     
@@ -20,7 +30,7 @@ def main():
                        type=str,
                        help='URL danh mục cụ thể (VD: thuc-pham-chuc-nang/canxi-vitamin-D)')
     parser.add_argument('--mode', '-m',
-                       choices=['single', 'vitamin', 'subcategory', 'all'],
+                       choices=['single', 'vitamin', 'subcategory', 'sitemap', 'all', 'reextract', 'compact'],
                        default='single',
                        help='Chế độ crawl (mặc định: single)')
     parser.add_argument('--main-category', 
@@ -30,6 +40,30 @@ def main():
                        type=str, 
                        nargs='+',
                        help='Danh sách subcategories')
+    parser.add_argument('--from-archive',
+                       type=str,
+                       default=HTML_ARCHIVE_DIR,
+                       help=f'Thư mục archive HTML dùng cho chế độ reextract (mặc định: {HTML_ARCHIVE_DIR})')
+    parser.add_argument('--from-jsonl',
+                       type=str,
+                       help='File JSONL cần gộp thành JSON/CSV cho chế độ compact (VD: file còn lại sau khi crawler bị dừng)')
+    parser.add_argument('--workers',
+                       type=int,
+                       help='Số process cho chế độ reextract (mặc định: số CPU)')
+    
+    # Các tùy chọn lấy danh sách sản phẩm
+    parser.add_argument('--listing',
+                       choices=['auto', 'api', 'browser'],
+                       default=LISTING_SOURCE,
+                       help=f'Nguồn danh sách sản phẩm của danh mục (mặc định: {LISTING_SOURCE})')
+    parser.add_argument('--sitemap',
+                       type=str,
+                       default=SITEMAP_URL,
+                       help=f'URL hoặc file sitemap (index, .xml.gz) cho chế độ sitemap (mặc định: {SITEMAP_URL})')
+    parser.add_argument('--listing-api-url',
+                       type=str,
+                       default=LISTING_API_URL,
+                       help='URL endpoint API listing (VD: endpoint giả lập của fake_listing_api.py)')
     
     # Các tùy chọn giới hạn
     parser.add_argument('--max-products', '-n', 
@@ -40,23 +74,124 @@ def main():
                        type=int,
                        help='Số sản phẩm tối đa mỗi subcategory')
     
+    # Các tùy chọn engine
+    parser.add_argument('--engine',
+                       choices=['sync', 'async', 'pipeline'],
+                       default=CRAWL_ENGINE,
+                       help=f'Engine tải trang chi tiết (mặc định: {CRAWL_ENGINE})')
+    parser.add_argument('--concurrency',
+                       type=int,
+                       default=ASYNC_CONCURRENCY,
+                       help=f'Số request đồng thời tối đa cho engine async/pipeline (mặc định: {ASYNC_CONCURRENCY})')
+    parser.add_argument('--parse-workers',
+                       type=int,
+                       default=PIPELINE_PARSE_WORKERS,
+                       help=f'Số process parse/extract cho engine async/pipeline (mặc định: {PIPELINE_PARSE_WORKERS})')
+    
+    parser.add_argument('--no-cache',
+                       action='store_true',
+                       help='Không dùng cache HTTP trên đĩa (luôn tải lại toàn bộ trang)')
+    parser.add_argument('--no-archive',
+                       action='store_true',
+                       help='Không lưu HTML thô của các trang đã tải vào archive')
+    
+    parser.add_argument('--parser',
+                       choices=list(HTML_PARSER_BACKENDS),
+                       default=HTML_PARSER,
+                       help=f'Backend parser HTML (mặc định: {HTML_PARSER})')
+    
     # Các tùy chọn output
     parser.add_argument('--output-format', '-f', 
                        choices=['json', 'csv', 'both'], 
                        default='both',
                        help='Định dạng file output (mặc định: both)')
+    parser.add_argument('--large-fields',
+                       choices=list(LARGE_FIELDS_MODES),
+                       default=LARGE_FIELDS_MODE,
+                       help='Trường văn bản lớn (content, description, ingredients): inline trong bản ghi, '
+                            'ref (lưu nén trong blob store, chỉ giữ tham chiếu) hoặc exclude (không xuất ra file)')
+    parser.add_argument('--download-images',
+                       action='store_true',
+                       default=IMAGE_DOWNLOAD_ENABLED,
+                       help=f'Tải ảnh sản phẩm vào {IMAGE_DIR} song song với việc crawl')
+    parser.add_argument('--image-variant',
+                       type=image_variant_arg,
+                       default=IMAGE_VARIANT or 'keep',
+                       help='Kích thước ảnh cần tải: WxH (VD: 768x0, 1024x0), original (ảnh gốc) '
+                            'hoặc keep (giữ nguyên URL)')
+    parser.add_argument('--stream',
+                       action='store_true',
+                       default=STREAM_OUTPUT,
+                       help='Ghi từng sản phẩm ra file JSONL ngay khi crawl xong, cuối cùng gộp thành JSON/CSV '
+                            '(lần chạy có checkpoint luôn ghi vào data/runs/<RUN_ID>/products.jsonl)')
+    parser.add_argument('--incremental',
+                       action='store_true',
+                       help='Chỉ tải lại sản phẩm mới hoặc đã thay đổi so với lần crawl trước (snapshot)')
+    parser.add_argument('--no-dedup',
+                       action='store_true',
+                       default=not DEDUP_ENABLED,
+                       help='Không chống trùng sản phẩm giữa các danh mục')
+    
+    # Các tùy chọn checkpoint
+    parser.add_argument('--resume',
+                       type=str,
+                       metavar='RUN_ID',
+                       help='Chạy tiếp một lần crawl bị dừng (dùng lại tham số và checkpoint của lần đó)')
+    parser.add_argument('--no-checkpoint',
+                       action='store_true',
+                       default=not CHECKPOINT_ENABLED,
+                       help='Không lưu checkpoint cho lần chạy này')
     parser.add_argument('--verbose', '-v', 
                        action='store_true',
-                       help='Hiển thị log chi tiết')
+                       help='Hiển thị log chi tiết (từng trường, từng ảnh)')
+    parser.add_argument('--log-json',
+                       action='store_true',
+                       default=LOG_STRUCTURED,
+                       help='Ghi file log dạng JSON Lines')
     
     args = parser.parse_args()
     
+    # Checkpoint chỉ áp dụng cho các chế độ crawl từ website
+    run_id = None
+    if args.resume:
+        run_id = args.resume
+        state_file = os.path.join(RUNS_DIR, run_id, 'state.db')
+        if not os.path.exists(state_file):
+            print(f"❌ Không tìm thấy checkpoint của lần chạy {run_id}: {state_file}")
+            sys.exit(1)
+        state = CrawlState(state_file)
+        saved_argv = state.get_meta('argv', [])
+        state.close()
+        # Dùng lại đúng tham số của lần chạy trước
+        args = parser.parse_args(saved_argv + ['--resume', run_id])
+        print(f"🔁 Chạy tiếp lần crawl {run_id}: {' '.join(saved_argv)}")
+    elif args.mode in ('single', 'vitamin', 'subcategory', 'sitemap') and not args.no_checkpoint:
+        run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+    
     # Tạo thư mục cần thiết
     os.makedirs('data', exist_ok=True)
     os.makedirs('logs', exist_ok=True)
+    setup_logging(structured=args.log_json, level='DEBUG' if args.verbose else LOG_LEVEL)
     
     # Khởi tạo crawler
-    crawler = LongChauCrawler()
+    crawler = LongChauCrawler(engine=args.engine, concurrency=args.concurrency,
+                              use_cache=not args.no_cache,
+                              archive_dir=None if args.no_archive else HTML_ARCHIVE_DIR,
+                              parser=args.parser,
+                              listing_source=args.listing,
+                              listing_api_url=args.listing_api_url,
+                              parse_workers=args.parse_workers,
+                              stream=args.stream,
+                              run_dir=os.path.join(RUNS_DIR, run_id) if run_id else None,
+                              incremental=args.incremental,
+                              dedup=not args.no_dedup,
+                              large_fields=args.large_fields,
+                              download_images=args.download_images,
+                              image_variant=None if args.image_variant == 'keep' else args.image_variant)
+    if run_id:
+        if not args.resume:
+            crawler.state.set_meta('argv', sys.argv[1:])
+        print(f"🆔 Run ID: {run_id} (nếu bị dừng, chạy tiếp bằng: python main.py --resume {run_id})")
     
     try:
         # Reset categories trước khi bắt đầu crawl mới
@@ -87,6 +222,26 @@ def main():
                 max_products_per_category=args.max_products_per_category or args.max_products
             )
             
+        elif args.mode == 'sitemap':
+            main_categories = [args.main_category] if args.main_category else CATEGORIES
+            print(f"🚀 Crawl sản phẩm trong sitemap {args.sitemap} ({', '.join(main_categories)})...")
+            crawler.crawl_sitemap(args.sitemap, main_categories, max_products=args.max_products)
+            
+        elif args.mode == 'reextract':
+            print(f"🚀 Trích xuất lại dữ liệu từ archive {args.from_archive}...")
+            crawler.reextract_from_archive(args.from_archive, max_workers=args.workers)
+            
+        elif args.mode == 'compact':
+            if not args.from_jsonl:
+                print("❌ Cần cung cấp --from-jsonl cho chế độ compact")
+                print("VD: python main.py --mode compact --from-jsonl data/longchau_products_20240101_120000.jsonl")
+                return
+            
+            print(f"🚀 Gộp {args.from_jsonl} thành file {args.output_format}...")
+            crawler.compact_stream(args.from_jsonl, args.output_format)
+            print("✅ Hoàn thành!")
+            return
+            
         elif args.mode == 'all':
             print("🚀 Crawl tất cả danh mục (chưa implement - sử dụng mode khác)")
             return
@@ -99,10 +254,14 @@ def main():
         print("\n⏹️  Đã dừng crawler. Đang lưu dữ liệu hiện có...")
         crawler.save_data(args.output_format)
         print("💾 Đã lưu dữ liệu.")
+        if run_id:
+            print(f"🔁 Chạy tiếp bằng: python main.py --resume {run_id}")
     except Exception as e:
         print(f"❌ Lỗi: {str(e)}")
         crawler.save_data(args.output_format)
         sys.exit(1)
+    finally:
+        crawler.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+"""
+Engine bất đồng bộ (asyncio + aiohttp) để tải song song các trang chi tiết sản phẩm
+"""
+import asyncio
+import random
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Tuple
+
+import aiohttp
+
+from config.settings import HTTP_RETRY_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+async def _fetch_page(session: aiohttp.ClientSession, url: str, retries: int, cache=None) -> bytes:
+    """Tải một trang với retry logic (exponential backoff như retry adapter của make_request): chỉ retry lỗi
+    kết nối/timeout và các mã HTTP_RETRY_STATUSES, 4xx khác (404, 410...) báo lỗi ngay. Các thao tác với cache (SQLite, zlib, file) chạy trong thread để không chặn event loop."""
+    for attempt in range(retries):
+        try:
+            headers = await asyncio.to_thread(cache.conditional_headers, url) if cache is not None else None
+            async with session.get(url, headers=headers) as response:
+                response.raise_for_status()
+                if cache is not None and response.status == 304:
+                    body = await asyncio.to_thread(cache.load, url)
+                    if body is not None:
+                        return body
+                    # Body đã bị xóa khỏi cache, tải lại không kèm conditional headers
+                    async with session.get(url) as full_response:
+                        full_response.raise_for_status()
+                        body = await full_response.read()
+                        await asyncio.to_thread(cache.store, url, body, full_response.headers)
+                        return body
+                
+                body = await response.read()
+                if cache is not None:
+                    await asyncio.to_thread(cache.store, url, body, response.headers)
+                return body
+        except aiohttp.ClientResponseError as e:
+            if e.status not in HTTP_RETRY_STATUSES or attempt == retries - 1:
+                raise
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if attempt == retries - 1:
+                raise
+        await asyncio.sleep(2 ** attempt)
+
+
+async def _fetch_all(urls: List[str], headers: Dict, concurrency: int,
+                     on_page: Callable[[int, str, bytes], None],
+                     on_error: Callable[[int, str, Exception], None],
+                     limit_per_host: int, retries: int, timeout: float,
+                     delay_range: Tuple[float, float], cache, executor: ThreadPoolExecutor, backlog: int):
+    """Tải tất cả URL với tối đa `concurrency` request đồng thời; callback chạy trong `executor`
+    để event loop không bị chặn khi parse/ghi, tối đa `backlog` trang chờ hoặc đang được xử lý"""
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    pending_pages = asyncio.Semaphore(backlog)
+    # Connector giữ kết nối keep-alive và giới hạn số kết nối tới mỗi host
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=limit_per_host or 0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(headers=headers, connector=connector,
+                                     timeout=client_timeout) as session:
+        def handle(index: int, url: str, body: bytes, error: Exception):
+            if error is None:
+                try:
+                    on_page(index, url, body)
+                    return
+                except Exception as e:
+                    error = e
+            on_error(index, url, error)
+        
+        async def worker(index: int, url: str):
+            async with semaphore:
+                body, error = None, None
+                try:
+                    body = await _fetch_page(session, url, retries, cache)
+                except Exception as e:
+                    error = e
+                # Giữ slot trong lúc delay để tổng tốc độ vẫn bị giới hạn
+                if delay_range:
+                    await asyncio.sleep(random.uniform(*delay_range))
+                # Chỉ nhả slot tải khi có chỗ xử lý: xử lý chậm thì tải chậm lại, trang chưa xử lý không dồn trong bộ nhớ
+                await pending_pages.acquire()
+            try:
+                await loop.run_in_executor(executor, handle, index, url, body, error)
+            finally:
+                pending_pages.release()
+
+        await asyncio.gather(*(worker(i, url) for i, url in enumerate(urls)))
+
+
+def fetch_pages(urls: List[str], headers: Dict, concurrency: int,
+                on_page: Callable[[int, str, bytes], None],
+                on_error: Callable[[int, str, Exception], None],
+                limit_per_host: int = None, retries: int = 3, timeout: float = 10,
+                delay_range: Tuple[float, float] = None, cache=None, workers: int = 4):
+    """Chạy event loop để tải các trang; callback được gọi trong một trong `workers` thread
+    ngay khi mỗi trang tải xong, trong lúc event loop tiếp tục tải các trang khác"""
+    workers = max(1, workers)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='async-page') as executor:
+        asyncio.run(_fetch_all(urls, dict(headers), max(1, concurrency), on_page, on_error,
+                               limit_per_host, retries, timeout, delay_range, cache, executor, workers * 2))
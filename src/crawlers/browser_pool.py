@@ -0,0 +1,208 @@
+"""
+Pool Selenium WebDriver dùng chung cho cả lần chạy: giữ sẵn driver đã khởi động để các danh mục dùng lại
+"""
+import queue
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from config.settings import (USER_AGENT, SELENIUM_TIMEOUT, CHROMEDRIVER_PATH, BROWSER_POOL_SIZE,
+                             BROWSER_MAX_PAGES_PER_DRIVER, BROWSER_MAX_MEMORY_MB, BROWSER_PROFILE,
+                             BLOCKED_URL_PATTERNS)
+
+logger = logging.getLogger(__name__)
+
+_driver_path = CHROMEDRIVER_PATH
+_driver_path_lock = threading.Lock()
+
+
+def get_chromedriver_path() -> str:
+    """Đường dẫn ChromeDriver, chỉ gọi ChromeDriverManager().install() một lần mỗi process"""
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path is None:
+            _driver_path = ChromeDriverManager().install()
+        return _driver_path
+
+
+# Các tính năng Chrome không cần khi chỉ đọc danh sách sản phẩm
+_LEAN_ARGUMENTS = [
+    '--blink-settings=imagesEnabled=false',
+    '--disable-extensions',
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-sync',
+    '--disable-notifications',
+    '--mute-audio',
+    '--no-first-run',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,InterestFeedContentSuggestions',
+]
+
+_LEAN_PREFS = {
+    'profile.managed_default_content_settings.images': 2,
+    'profile.default_content_setting_values.notifications': 2,
+    'profile.default_content_setting_values.geolocation': 2,
+}
+
+
+def create_chrome_options(profile: str = BROWSER_PROFILE, capture_network: bool = False) -> Options:
+    """Tùy chọn Chrome headless cho trang danh mục ('lean' hoặc 'full')"""
+    if profile not in ('lean', 'full'):
+        raise ValueError(f"Profile trình duyệt không hợp lệ: {profile}")
+
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')  # Chạy ẩn browser
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+
+    if profile == 'lean':
+        for argument in _LEAN_ARGUMENTS:
+            chrome_options.add_argument(argument)
+        chrome_options.add_experimental_option('prefs', _LEAN_PREFS)
+        # Trả quyền điều khiển khi DOM sẵn sàng, không đợi ảnh/iframe tải xong
+        chrome_options.page_load_strategy = 'eager'
+
+    if capture_network:
+        # Ghi log mạng để đo số byte đã tải (dùng cho benchmark)
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+    return chrome_options
+
+
+def create_chrome_driver(profile: str = BROWSER_PROFILE, capture_network: bool = False) -> webdriver.Chrome:
+    """Khởi động một Chrome WebDriver mới"""
+    service = Service(get_chromedriver_path())
+    driver = webdriver.Chrome(service=service, options=create_chrome_options(profile, capture_network))
+    driver.implicitly_wait(SELENIUM_TIMEOUT)
+
+    if profile == 'lean' and BLOCKED_URL_PATTERNS:
+        # Chặn font, media và các domain analytics ở tầng mạng (prefs chỉ chặn được ảnh)
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(BLOCKED_URL_PATTERNS)})
+    return driver
+
+
+class BrowserPool:
+    """Giữ tối đa `size` driver chạy sẵn; driver được khởi động lại sau K trang hoặc khi tốn nhiều bộ nhớ"""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE,
+                 max_pages_per_driver: int = BROWSER_MAX_PAGES_PER_DRIVER,
+                 max_memory_mb: int = BROWSER_MAX_MEMORY_MB,
+                 profile: str = BROWSER_PROFILE, capture_network: bool = False):
+        self.size = max(1, size)
+        self.profile = profile
+        self.capture_network = capture_network
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self._idle = queue.LifoQueue()  # Ưu tiên driver vừa dùng (cache trình duyệt còn nóng)
+        self._pages: Dict[int, int] = {}  # id(driver) -> số trang đã tải
+        self._drivers = {}  # id(driver) -> driver đang sống
+        self._lock = threading.Lock()
+
+    def acquire(self) -> webdriver.Chrome:
+        """Lấy một driver rảnh; khởi động driver mới nếu pool chưa đầy, ngược lại đợi driver được trả về"""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                pass
+
+            with self._lock:
+                can_create = len(self._drivers) < self.size
+                if can_create:
+                    # Giữ chỗ trước khi khởi động để các thread khác không vượt quá size
+                    placeholder = object()
+                    self._drivers[id(placeholder)] = placeholder
+
+            if not can_create:
+                try:
+                    return self._idle.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+            try:
+                driver = create_chrome_driver(self.profile, self.capture_network)
+            finally:
+                with self._lock:
+                    del self._drivers[id(placeholder)]
+            with self._lock:
+                self._drivers[id(driver)] = driver
+                self._pages[id(driver)] = 0
+            logger.info(f"Đã khởi tạo Selenium WebDriver ({len(self._drivers)}/{self.size})")
+            return driver
+
+    def release(self, driver: webdriver.Chrome, broken: bool = False):
+        """Trả driver về pool, hoặc đóng nó nếu bị lỗi / đã dùng quá số trang / quá bộ nhớ"""
+        with self._lock:
+            self._pages[id(driver)] = self._pages.get(id(driver), 0) + 1
+            pages = self._pages[id(driver)]
+
+        reason = None
+        if broken:
+            reason = "lỗi"
+        elif self.max_pages_per_driver and pages >= self.max_pages_per_driver:
+            reason = f"đã tải {pages} trang"
+        else:
+            memory_mb = self._memory_mb(driver)
+            if self.max_memory_mb and memory_mb >= self.max_memory_mb:
+                reason = f"JS heap {memory_mb:.0f} MB"
+
+        if reason:
+            logger.info(f"Khởi động lại Selenium WebDriver ({reason})")
+            self._quit(driver)
+        else:
+            self._idle.put(driver)
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        """Mượn một driver trong khối with, tự trả về pool khi xong"""
+        driver = self.acquire()
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    @staticmethod
+    def _memory_mb(driver: webdriver.Chrome) -> float:
+        """Dung lượng JS heap của tab hiện tại (MB), 0 nếu trình duyệt không hỗ trợ"""
+        try:
+            used = driver.execute_script(
+                "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0")
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0
+
+    def _quit(self, driver: webdriver.Chrome):
+        with self._lock:
+            self._drivers.pop(id(driver), None)
+            self._pages.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Lỗi khi đóng WebDriver: {str(e)}")
+
+    def close(self):
+        """Đóng tất cả driver đang rảnh (pool vẫn dùng tiếp được, driver mới sẽ được khởi động khi cần)"""
+        closed = 0
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+            closed += 1
+        if closed:
+            logger.info(f"Đã đóng {closed} Selenium WebDriver")
@@ -0,0 +1,216 @@
+"""
+Extraction plan: gom tất cả ứng viên cho các trường sản phẩm trong một lần duyệt cây HTML
+"""
+import re
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+# Selector cho từng trường, theo thứ tự ưu tiên (fallback)
+FIELD_SELECTORS = {
+    'name': ['h1[data-test="product_name"]', 'h1', '.product-title', '.product-name', '.title'],
+    'price': ['span[data-test="price"]', '.price', '[class*="price"]', '.cost', '.gia',
+              'span[class*="price"]', 'div[class*="price"]'],
+    'original_price': ['.price-original', '.price-old', '.original-price'],
+    'discount': ['.discount-percent', '.sale-badge', '.discount'],
+    'description': ['.product-description', '.description', '.product-detail'],
+    'ingredients': ['.ingredients', '.composition', '.thanh-phan'],
+    'usage': ['.usage', '.cach-dung', '.instructions'],
+    'brand': ['.brand', '.manufacturer', '.thuong-hieu'],
+    'category': ['.breadcrumb', '.category', '.danh-muc'],
+    'availability': ['.availability', '.stock-status', '.tinh-trang'],
+    'unit': ['span[data-test="unit"]'],
+    'sku': ['span[data-test-id="sku"]'],
+    'rating': ['.rating', '.stars', '.danh-gia'],
+    'reviews_count': ['.reviews-count', '.review-count', '.so-danh-gia'],
+    'content': ['div[class="lc-wrap-content lc-view-full-cont abc"]', 'div.lc-wrap-content',
+                'div.inner', 'div.description', 'div[id^="detail-content"]'],
+}
+
+# Các selector cấu trúc khác được dùng khi trích xuất
+STRUCTURE_SELECTORS = [
+    'table.content-list',
+    'div[class="flex items-center"]',
+    'script[type="application/json"]',
+    'script[type="application/ld+json"]',
+    'div.swiper-wrapper',
+    'div.carousel-gallery-list',
+    'div.lg-thumb-item',
+    'img',
+]
+
+# Các đoạn text cần tìm trong text node
+TEXT_KEYWORDS = ['đánh giá', 'Thương hiệu:']
+
+_SELECTOR_PATTERN = re.compile(
+    r'^(?P<tag>[a-z][a-z0-9]*)?'
+    r'(?:\.(?P<cls>[\w-]+))?'
+    r'(?:\[(?P<attr>[\w-]+)(?P<op>[*^]?=)"(?P<value>[^"]*)"\])?$'
+)
+
+
+class SimpleSelector:
+    """Selector đơn giản: tag, class, và tối đa một điều kiện thuộc tính (=, *=, ^=)"""
+
+    __slots__ = ('text', 'tag', 'cls', 'attr', 'op', 'value')
+
+    def __init__(self, text: str):
+        match = _SELECTOR_PATTERN.match(text)
+        if not match or not any(match.group('tag', 'cls', 'attr')):
+            raise ValueError(f"Selector không được hỗ trợ trong extraction plan: {text}")
+        self.text = text
+        self.tag = match.group('tag')
+        self.cls = match.group('cls')
+        self.attr = match.group('attr')
+        self.op = match.group('op')
+        self.value = match.group('value')
+
+    def matches(self, element: Tag) -> bool:
+        """Kiểm tra element có khớp selector không (giống ngữ nghĩa của soupsieve)"""
+        if self.tag and element.name != self.tag:
+            return False
+        if self.cls and self.cls not in (element.get('class') or ()):
+            return False
+        if self.attr:
+            value = element.get(self.attr)
+            if value is None:
+                return False
+            if isinstance(value, list):
+                value = ' '.join(value)
+            if self.op == '=':
+                return value == self.value
+            if self.op == '*=':
+                return bool(self.value) and self.value in value
+            return bool(self.value) and value.startswith(self.value)
+        return True
+
+
+def compile_plan(selector_texts: List[str]) -> Tuple[Dict, Dict, Dict]:
+    """Biên dịch danh sách selector thành các bảng tra theo class, tag và thuộc tính"""
+    by_class, by_tag, by_attr = {}, {}, {}
+    for text in dict.fromkeys(selector_texts):
+        selector = SimpleSelector(text)
+        if selector.cls:
+            by_class.setdefault(selector.cls, []).append(selector)
+        elif selector.tag:
+            by_tag.setdefault(selector.tag, []).append(selector)
+        else:
+            by_attr.setdefault(selector.attr, []).append(selector)
+    return by_class, by_tag, by_attr
+
+
+_PLANNED_SELECTORS = frozenset(
+    [selector for selectors in FIELD_SELECTORS.values() for selector in selectors]
+    + STRUCTURE_SELECTORS
+)
+_PLAN = compile_plan(sorted(_PLANNED_SELECTORS))
+
+
+class PageIndex:
+    """Kết quả một lần duyệt cây HTML: danh sách element khớp từng selector theo thứ tự tài liệu"""
+
+    def __init__(self, soup: BeautifulSoup):
+        self.soup = soup
+        self._matches = {}  # selector -> [element, ...]
+        self._strings = {keyword: [] for keyword in TEXT_KEYWORDS}
+        self._table_rows = None
+        self._json_scripts = {}
+        self._build()
+
+    def _build(self):
+        """Duyệt cây đúng một lần và ghi nhận các ứng viên"""
+        by_class, by_tag, by_attr = _PLAN
+        matches = self._matches
+        strings = self._strings
+
+        for node in self.soup.descendants:
+            if isinstance(node, Tag):
+                for selector in by_tag.get(node.name, ()):
+                    if selector.matches(node):
+                        matches.setdefault(selector.text, []).append(node)
+
+                classes = node.get('class')
+                if classes:
+                    for token in set(classes):
+                        for selector in by_class.get(token, ()):
+                            if selector.matches(node):
+                                matches.setdefault(selector.text, []).append(node)
+
+                for attr, selectors in by_attr.items():
+                    if attr in node.attrs:
+                        for selector in selectors:
+                            if selector.matches(node):
+                                matches.setdefault(selector.text, []).append(node)
+
+            elif isinstance(node, NavigableString):
+                for keyword, found in strings.items():
+                    if keyword in node:
+                        found.append(node)
+
+    def select(self, selector: str) -> List[Tag]:
+        """Tất cả element khớp selector (hỗ trợ thêm dạng 'A b' với b là tag con)"""
+        # Selector trong plan được tra trước: giá trị thuộc tính có thể chứa dấu cách (div[class="flex items-center"])
+        if selector in _PLANNED_SELECTORS:
+            return self._matches.get(selector, [])
+        if ' ' in selector:
+            ancestor, _, child = selector.partition(' ')
+            if child.isalpha() and ancestor in _PLANNED_SELECTORS:
+                results, seen = [], set()
+                for element in self.select(ancestor):
+                    for descendant in element.find_all(child):
+                        if id(descendant) not in seen:
+                            seen.add(id(descendant))
+                            results.append(descendant)
+                return results
+            return self.soup.select(selector)
+
+        # Selector ngoài plan: dùng soupsieve như bình thường
+        return self.soup.select(selector)
+
+    def select_one(self, selector: str) -> Optional[Tag]:
+        """Element đầu tiên khớp selector"""
+        elements = self.select(selector)
+        return elements[0] if elements else None
+
+    def strings_containing(self, keyword: str) -> List[NavigableString]:
+        """Các text node có chứa keyword (keyword phải nằm trong TEXT_KEYWORDS)"""
+        return self._strings[keyword]
+
+    def table_rows(self) -> List[Tuple[str, Tag]]:
+        """Các dòng (nhãn, ô giá trị) của bảng content-list đầu tiên"""
+        if self._table_rows is None:
+            self._table_rows = []
+            table = self.select_one('table.content-list')
+            if table:
+                for row in table.find_all('tr', class_='content-container'):
+                    cells = row.find_all('td')
+                    if len(cells) >= 2:
+                        self._table_rows.append((cells[0].get_text(), cells[1]))
+        return self._table_rows
+
+    def json_scripts(self, script_type: str = 'application/json') -> List[Tuple[Optional[str], Any, bool]]:
+        """Các script JSON theo type dưới dạng (nội dung, dữ liệu, decode thành công), chỉ decode một lần"""
+        if script_type not in self._json_scripts:
+            scripts = []
+            for script in self.select(f'script[type="{script_type}"]'):
+                text = script.string
+                try:
+                    scripts.append((text, json.loads(text), True))
+                except (TypeError, ValueError):
+                    scripts.append((text, None, False))
+            self._json_scripts[script_type] = scripts
+        return self._json_scripts[script_type]
+
+    def div_with_string(self, keyword: str) -> Optional[Tag]:
+        """Div đầu tiên có .string chứa keyword (giống soup.find('div', string=...))"""
+        for text_node in self.strings_containing(keyword):
+            found = None
+            node = text_node.parent
+            while node is not None and node.string is text_node:
+                if node.name == 'div':
+                    found = node
+                node = node.parent
+            if found is not None:
+                return found
+        return None
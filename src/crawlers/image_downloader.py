@@ -0,0 +1,185 @@
+"""
+Tải ảnh sản phẩm song song với việc crawl trang chi tiết: giới hạn số luồng, chống trùng theo URL và theo
+nội dung (SHA-256), chọn kích thước ảnh qua đoạn /unsafe/WxH/ của CDN, manifest SQLite để chạy tiếp
+"""
+import os
+import re
+import time
+import queue
+import sqlite3
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from config.settings import DEFAULT_HEADERS
+from src.utils.helpers import create_session, make_request
+
+logger = logging.getLogger(__name__)
+
+# Trạng thái ảnh trong manifest
+IMAGE_PENDING = 'pending'
+IMAGE_DONE = 'done'
+IMAGE_FAILED = 'failed'
+
+_SIZE_SEGMENT = re.compile(r'/unsafe/\d+x\d+/')
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+
+def image_variant_url(url: str, variant: Optional[str]) -> str:
+    """URL của ảnh theo kích thước mong muốn trên CDN:
+    variant 'WxH' thay đoạn /unsafe/WxH/, 'original' lấy ảnh gốc phía sau /unsafe/, None giữ nguyên"""
+    if not variant or '/unsafe/' not in url:
+        return url
+    if variant == 'original':
+        # .../unsafe/768x0/filters:quality(90)/https://cms-prod.../DSC_1.jpg -> https://cms-prod.../DSC_1.jpg
+        source = url.find('https://', url.index('/unsafe/'))
+        return url[source:] if source != -1 else url
+    if _SIZE_SEGMENT.search(url):
+        return _SIZE_SEGMENT.sub(f'/unsafe/{variant}/', url, count=1)
+    return url.replace('/unsafe/', f'/unsafe/{variant}/', 1)
+
+
+class ImageDownloader:
+    """Hàng đợi tải ảnh chạy nền: submit() không bao giờ chặn (được gọi từ thread ghi bản ghi của các engine),
+    URL được đưa vào hàng đợi không giới hạn; một thread nạp chuyển dần sang pool tải, tối đa `workers` ảnh
+    được tải cùng lúc và tối đa `backlog` ảnh đã giao cho pool.
+
+    Mỗi URL chỉ được tải một lần (kể cả giữa các lần chạy, nhờ manifest); file được đặt tên theo
+    SHA-256 của nội dung nên các URL khác nhau cùng một ảnh chỉ chiếm một file.
+    """
+
+    def __init__(self, output_dir: str, workers: int = 8, variant: Optional[str] = None,
+                 backlog: int = None, session: requests.Session = None):
+        self.output_dir = output_dir
+        self.variant = variant
+        self.workers = max(1, workers)
+        os.makedirs(output_dir, exist_ok=True)
+        self.session = session or create_session(DEFAULT_HEADERS, pool_maxsize=self.workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='image')
+        self.slots = threading.BoundedSemaphore(backlog or self.workers * 4)
+        self.lock = threading.Lock()
+        self.in_flight: Dict[str, Future] = {}
+        self.stats = {'downloaded': 0, 'reused': 0, 'failed': 0}
+        self._queue = queue.SimpleQueue()  # URL chờ giao cho pool; None: dừng thread nạp
+
+        self.db = sqlite3.connect(os.path.join(output_dir, 'manifest.db'), check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS images ('
+            'url TEXT PRIMARY KEY, status TEXT, path TEXT, sha256 TEXT, size INTEGER, error TEXT, updated_at REAL)'
+        )
+        self.db.commit()
+        self._feeder = threading.Thread(target=self._feed, name='image-feeder', daemon=True)
+        self._feeder.start()
+
+    def submit(self, image_url: str) -> Optional[Future]:
+        """Đưa ảnh vào hàng đợi tải (trả về ngay); None nếu ảnh đã tải xong ở lần trước"""
+        url = image_variant_url(image_url, self.variant)
+        with self.lock:
+            if url in self.in_flight:
+                return self.in_flight[url]
+            row = self.db.execute('SELECT status, path FROM images WHERE url = ?', (url,)).fetchone()
+        if row and row[0] == IMAGE_DONE and os.path.exists(os.path.join(self.output_dir, row[1])):
+            return None
+
+        with self.lock:
+            if url in self.in_flight:
+                return self.in_flight[url]
+            future = Future()
+            self.in_flight[url] = future
+        self._queue.put(url)
+        return future
+
+    def _feed(self):
+        """Thread nạp: giao ảnh trong hàng đợi cho pool tải khi pool còn chỗ"""
+        while True:
+            url = self._queue.get()
+            if url is None:
+                return
+            self.slots.acquire()
+            self.executor.submit(self._run, url)
+
+    def _run(self, url: str):
+        error = None
+        try:
+            self._download(url)
+        except Exception as e:
+            logger.error("Lỗi khi lưu ảnh %s: %s", url, e)
+            error = e
+        finally:
+            with self.lock:
+                future = self.in_flight.pop(url)
+            self.slots.release()
+        if error is None:
+            future.set_result(None)
+        else:
+            future.set_exception(error)
+
+    def _download(self, url: str):
+        try:
+            body = make_request(url, session=self.session).content
+        except Exception as e:
+            logger.warning("Lỗi khi tải ảnh %s: %s", url, e)
+            self._record(url, IMAGE_FAILED, error=str(e), counter='failed')
+            return
+
+        digest = hashlib.sha256(body).hexdigest()
+        extension = os.path.splitext(urlparse(url).path)[1].lower()
+        if extension not in _IMAGE_EXTENSIONS:
+            extension = '.jpg'
+        relative_path = os.path.join(digest[:2], digest + extension)
+        path = os.path.join(self.output_dir, relative_path)
+        if os.path.exists(path):
+            counter = 'reused'  # Cùng nội dung với ảnh đã tải từ URL khác
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, path)
+            counter = 'downloaded'
+        self._record(url, IMAGE_DONE, relative_path, digest, len(body), counter=counter)
+
+    def _record(self, url: str, status: str, path: str = None, digest: str = None,
+                size: int = None, error: str = None, counter: str = None):
+        with self.lock:
+            self.stats[counter] += 1
+            self.db.execute('INSERT OR REPLACE INTO images (url, status, path, sha256, size, error, updated_at) '
+                            'VALUES (?, ?, ?, ?, ?, ?, ?)', (url, status, path, digest, size, error, time.time()))
+            self.db.commit()
+
+    def status(self, image_url: str) -> Dict[str, Optional[str]]:
+        """Trạng thái của một ảnh để ghi vào bản ghi: url đã tải, trạng thái, đường dẫn file (tương đối
+        so với output_dir)"""
+        url = image_variant_url(image_url, self.variant)
+        with self.lock:
+            pending = url in self.in_flight
+            row = self.db.execute('SELECT status, path FROM images WHERE url = ?', (url,)).fetchone()
+        if pending or row is None:
+            return {'url': url, 'status': IMAGE_PENDING, 'path': None}
+        return {'url': url, 'status': row[0], 'path': row[1]}
+
+    def statuses(self, image_urls: List[str]) -> List[Dict[str, Optional[str]]]:
+        return [self.status(url) for url in image_urls]
+
+    def wait(self):
+        """Đợi các ảnh đang chờ tải xong (trước khi xuất file)"""
+        while True:
+            with self.lock:
+                futures = list(self.in_flight.values())
+            if not futures:
+                return
+            for future in futures:
+                future.exception()
+
+    def close(self):
+        self.wait()
+        self._queue.put(None)
+        self._feeder.join()
+        self.executor.shutdown(wait=True)
+        with self.lock:
+            self.db.close()
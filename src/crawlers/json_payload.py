@@ -0,0 +1,144 @@
+"""
+Đọc dữ liệu sản phẩm có cấu trúc từ các payload JSON nhúng trong trang (JSON-LD, hydration data)
+"""
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.utils.helpers import clean_text, format_price
+
+# Các key (hoặc đường dẫn dạng 'a.b') chứa giá trị của từng trường, theo thứ tự ưu tiên
+JSON_FIELD_KEYS = {
+    'name': ['webName', 'name'],
+    'price': ['offers.price', 'price.price', 'price', 'prices'],
+    'unit': ['price.measureUnitName', 'measureUnitName', 'unit'],
+    'sku': ['sku'],
+    'brand': ['brand.name', 'brand'],
+    'rating': ['aggregateRating.ratingValue', 'rating'],
+    'reviews_count': ['aggregateRating.reviewCount', 'reviewCount'],
+    'registration_number': ['registNum', 'registrationNumber'],
+    'form': ['dosageForm'],
+    'package_size': ['specification'],
+    'manufacturer': ['manufacturer.name', 'manufacturer'],
+    'images': ['images', 'gallery', 'image'],
+}
+
+# Kiểu dữ liệu của từng trường để chuẩn hóa giống kết quả trích xuất từ DOM
+_FLOAT_FIELDS = {'price', 'rating'}
+_INT_FIELDS = {'reviews_count'}
+_LIST_FIELDS = {'images'}
+
+# Phần lẻ sau dấu '.' / ',' có 1-2 chữ số (VD: '250000.00'): giá VND không có phần lẻ, nhóm hàng nghìn luôn 3 chữ số
+_PRICE_FRACTION = re.compile(r'[.,]\d{1,2}(?!\d)')
+
+
+def _walk(data: Any) -> Iterator[Dict]:
+    """Duyệt tất cả dict trong cấu trúc JSON (theo chiều sâu, đúng thứ tự xuất hiện)"""
+    stack = [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            yield item
+            stack.extend(reversed(list(item.values())))
+        elif isinstance(item, list):
+            stack.extend(reversed(item))
+
+
+def _is_ld_product(item: Dict) -> bool:
+    item_type = item.get('@type')
+    if isinstance(item_type, list):
+        return 'Product' in item_type
+    return item_type == 'Product'
+
+
+def find_product_object(ld_payloads: List[Any], app_payloads: List[Any]) -> Optional[Dict]:
+    """Tìm object mô tả sản phẩm: ưu tiên JSON-LD @type Product, sau đó hydration payload"""
+    for payload in ld_payloads:
+        for item in _walk(payload):
+            if _is_ld_product(item):
+                return item
+
+    for payload in app_payloads:
+        for item in _walk(payload):
+            if 'sku' in item and ('webName' in item or 'name' in item):
+                return item
+    return None
+
+
+def _lookup(item: Dict, path: str) -> Any:
+    """Lấy giá trị theo đường dẫn 'a.b'; list thì lấy phần tử đầu tiên"""
+    value = item
+    for key in path.split('.'):
+        if isinstance(value, list):
+            value = value[0] if value else None
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def _to_float(value: Any, field: str = None) -> Optional[float]:
+    """Số từ giá trị JSON. Chuỗi giá / số lượng được đọc như trên DOM (format_price bỏ dấu phân cách
+    hàng nghìn: '250.000' -> 250000); chuỗi điểm đánh giá là số thập phân ('4.5', '4,5')"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        value = value.get('price', value.get('value'))
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        if field == 'rating':
+            try:
+                return float(value.strip().replace(',', '.'))
+            except ValueError:
+                return None
+        return format_price(_PRICE_FRACTION.sub('', value)) or None
+    return None
+
+
+def _to_text(value: Any) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get('name')
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if isinstance(value, str):
+        return clean_text(value) or None
+    return None
+
+
+def _to_list(value: Any) -> List[str]:
+    if not isinstance(value, list):
+        value = [value]
+    urls = []
+    for item in value:
+        if isinstance(item, dict):
+            item = item.get('url') or item.get('src')
+        if isinstance(item, str) and item.strip():
+            urls.append(item.strip())
+    return urls
+
+
+def map_product_fields(product: Dict) -> Dict[str, Any]:
+    """Chuyển object sản phẩm thành các trường của bản ghi (bỏ qua trường không có dữ liệu)"""
+    fields = {}
+    for field, paths in JSON_FIELD_KEYS.items():
+        for path in paths:
+            raw = _lookup(product, path)
+            if raw is None:
+                continue
+
+            if field in _FLOAT_FIELDS:
+                value = _to_float(raw, field)
+            elif field in _INT_FIELDS:
+                value = _to_float(raw, field)
+                value = int(value) if value is not None else None
+            elif field in _LIST_FIELDS:
+                value = _to_list(raw)
+            else:
+                value = _to_text(raw)
+
+            if value:
+                fields[field] = value
+                break
+    return fields
@@ -0,0 +1,93 @@
+"""
+Lấy danh sách sản phẩm của danh mục qua API JSON (XHR) mà trang danh mục sử dụng, không cần Selenium
+"""
+import math
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+import requests
+
+from config.settings import (BASE_URL, LISTING_API_URL, LISTING_API_PAGE_SIZE,
+                             LISTING_API_CONCURRENCY, REQUEST_TIMEOUT)
+from src.utils.snapshot_store import content_hash
+
+logger = logging.getLogger(__name__)
+
+
+class ListingApiClient:
+    """Client cho endpoint phân trang danh sách sản phẩm theo danh mục"""
+
+    def __init__(self, session: requests.Session, api_url: str = LISTING_API_URL,
+                 page_size: int = LISTING_API_PAGE_SIZE, concurrency: int = LISTING_API_CONCURRENCY):
+        self.session = session
+        self.api_url = api_url
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+
+    def _build_payload(self, category_url: str, skip: int) -> Dict:
+        """Payload giống request của trang danh mục khi bấm 'Xem thêm'"""
+        return {
+            'skipCount': skip,
+            'maxResultCount': self.page_size,
+            'codes': ['productTypes', 'objectUse', 'priceRanges', 'prescription', 'skin', 'flavor',
+                      'manufactor', 'indications', 'brand', 'brandOrigin'],
+            'sortType': 4,
+            'category': [category_url],
+        }
+
+    def fetch_page(self, category_url: str, skip: int) -> Dict:
+        """Gọi API cho một trang kết quả"""
+        response = self.session.post(self.api_url, json=self._build_payload(category_url, skip),
+                                     timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    @staticmethod
+    def _products_of(data: Dict) -> List[Dict]:
+        return data.get('products') or data.get('items') or data.get('data') or []
+
+    @staticmethod
+    def _total_of(data: Dict, fallback: int) -> int:
+        total = data.get('totalCount', data.get('total'))
+        return total if isinstance(total, int) else fallback
+
+    @staticmethod
+    def to_card(product: Dict) -> Dict:
+        """Chuyển một sản phẩm của API thành card gồm URL, tên, giá, SKU và hash của toàn bộ dữ liệu API
+        (tín hiệu thay đổi trước khi tải trang chi tiết ở chế độ incremental)"""
+        slug = (product.get('slug') or product.get('url') or '').strip()
+        if slug and not slug.startswith('http'):
+            slug = f"{BASE_URL}/{slug.lstrip('/')}"
+
+        price = product.get('price')
+        if isinstance(price, dict):
+            price = price.get('price')
+
+        return {
+            'url': slug,
+            'name': product.get('webName') or product.get('name') or '',
+            'price': price,
+            'sku': product.get('sku') or '',
+            'hash': content_hash(product),
+        }
+
+    def iter_cards(self, category_url: str) -> Iterator[Dict]:
+        """Duyệt card sản phẩm của danh mục: trang đầu để biết tổng số, các trang còn lại tải song song"""
+        first = self.fetch_page(category_url, 0)
+        products = self._products_of(first)
+        for product in products:
+            yield self.to_card(product)
+
+        total = self._total_of(first, len(products))
+        if not products or total <= len(products):
+            return
+
+        skips = [page * self.page_size for page in range(1, math.ceil(total / self.page_size))]
+        logger.info(f"API danh mục {category_url}: {total} sản phẩm, tải thêm {len(skips)} trang")
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # map giữ đúng thứ tự trang dù các request chạy song song
+            for data in executor.map(lambda skip: self.fetch_page(category_url, skip), skips):
+                for product in self._products_of(data):
+                    yield self.to_card(product)
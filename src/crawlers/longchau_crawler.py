@@ -3,267 +3,171 @@ Crawler chính cho website Long Châu
 """
 import sys
 import os
+import re
+import math
+import itertools
+import threading
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import requests
 from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator
 import time
 from tqdm import tqdm
 import logging
 from datetime import datetime
-from selenium import webdriver
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 
 from config.settings import *
 from src.utils.helpers import *
+from src.utils.http_cache import HttpCache
+from src.utils.html_archive import HtmlArchive, read_archived_body
+from src.utils.record_writer import JsonlWriter, compact_jsonl, write_records
+from src.utils.product_record import PRODUCT_FIELDS, ProductRecord
+from src.utils.blob_store import BlobStore, is_blob_ref
+from src.utils.url_classifier import UrlClassifier
+from src.utils.crawl_state import (CrawlState, CATEGORY_LISTED, CATEGORY_DONE, URL_DONE, URL_FAILED)
+from src.utils.snapshot_store import SnapshotStore
+from src.utils.dedup_index import DedupIndex
+from src.crawlers.async_engine import fetch_pages
+from src.crawlers.listing_api import ListingApiClient
+from src.crawlers.image_downloader import ImageDownloader
+from src.crawlers.browser_pool import BrowserPool
+from src.crawlers.pipeline import OrderedSink, Stage, run_stages
+from src.crawlers.sitemap import iter_sitemap
+from src.crawlers.extraction_plan import FIELD_SELECTORS, PageIndex
+from src.crawlers.json_payload import find_product_object, map_product_fields
 
-class LongChauCrawler:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update(DEFAULT_HEADERS)
-        self.logger = setup_logging()
-        self.products = []
-        self.driver = None
-        self.current_categories = []  # Lưu trữ danh sách categories đã crawl
-    
-    def __del__(self):
-        """Destructor để đảm bảo Selenium driver được đóng"""
-        self.close_selenium_driver()
-    
-    def init_selenium_driver(self):
-        """Khởi tạo Selenium WebDriver"""
-        if self.driver is None:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')  # Chạy ẩn browser
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument(f'--user-agent={USER_AGENT}')
-            
-            try:
-                # Sử dụng webdriver-manager để tự động tải ChromeDriver
-                service = Service(ChromeDriverManager().install())
-                self.driver = webdriver.Chrome(service=service, options=chrome_options)
-                self.driver.implicitly_wait(10)
-                self.logger.info("Đã khởi tạo Selenium WebDriver")
-            except Exception as e:
-                self.logger.error(f"Lỗi khởi tạo WebDriver: {str(e)}")
-                raise
+# Các trường của bản ghi sản phẩm và hàm extract_* tương ứng (theo thứ tự xuất ra file)
+PRODUCT_FIELD_EXTRACTORS = [
+    ('name', 'extract_product_name'),
+    ('price', 'extract_price'),
+    ('unit', 'extract_unit'),
+    ('sku', 'extract_sku'),
+    ('rating', 'extract_rating'),
+    ('reviews_count', 'extract_reviews_count'),
+    ('comments_count', 'extract_comments_count'),
+    ('brand', 'extract_brand'),
+    ('official_name', 'extract_official_name'),
+    ('category', 'extract_category'),
+    ('registration_number', 'extract_registration_number'),
+    ('form', 'extract_form'),
+    ('package_size', 'extract_package_size'),
+    ('origin_brand', 'extract_origin_brand'),
+    ('manufacturer', 'extract_manufacturer'),
+    ('country_of_manufacture', 'extract_country_of_manufacture'),
+    ('ingredients', 'extract_ingredients'),
+    ('images', 'extract_images'),
+    ('content', 'extract_content'),
+    ('original_price', 'extract_original_price'),
+    ('discount', 'extract_discount'),
+    ('description', 'extract_description'),
+    ('usage', 'extract_usage'),
+    ('availability', 'extract_availability'),
+]
+
+# Nút 'Xem thêm N sản phẩm' và script đếm số card trong grid sản phẩm chính của trang danh mục
+# (không thấy grid thì đếm link .html của cả trang); trả về [số lượng, có grid hay không]
+LOAD_MORE_BUTTON_XPATH = "//button[contains(.//span, 'Xem thêm') and contains(.//span, 'sản phẩm')]"
+GRID_CARD_COUNT_JS = r"""
+const grid = document.querySelector('div.grid.grid-cols-2.md\\:grid-cols-4');
+if (grid) return [grid.children.length, true];
+return [document.querySelectorAll('a[href*=".html"]').length, false];
+"""
+# Lấy href sản phẩm của các card từ chỉ số arguments[0] trở đi; trả về [hrefs, số card/link, có grid]
+HARVEST_HREFS_JS = r"""
+const start = arguments[0];
+const grid = document.querySelector('div.grid.grid-cols-2.md\\:grid-cols-4');
+const hrefs = [];
+if (grid) {
+  const cards = grid.children;
+  for (let i = start; i < cards.length; i++) {
+    for (const link of cards[i].querySelectorAll('a[href*=".html"]')) hrefs.push(link.getAttribute('href'));
+  }
+  return [hrefs, cards.length, true];
+}
+const links = document.querySelectorAll('a[href*=".html"]');
+for (let i = start; i < links.length; i++) hrefs.push(links[i].getAttribute('href'));
+return [hrefs, links.length, false];
+"""
+
+class ProductPageParser:
+    """Trích xuất bản ghi sản phẩm từ HTML của trang chi tiết: chỉ giữ cấu hình parser, không mở session,
+    file hay thread nào nên có thể dựng trong mỗi process parse (engine async/pipeline, chế độ reextract)"""
+
+    def __init__(self, parser: str = HTML_PARSER, json_first: bool = JSON_FIRST_EXTRACTION):
+        self.parser = parser  # Backend parser HTML ('html.parser' hoặc 'lxml')
+        self.json_first = json_first  # Lấy dữ liệu từ payload JSON trước khi dùng DOM selector
+        self.url_classifier = UrlClassifier()  # Phân loại URL sản phẩm / ảnh: tuple chuỗi con dựng một lần + cache theo URL
+        self.logger = logging.getLogger(__name__)
     
-    def close_selenium_driver(self):
-        """Đóng Selenium WebDriver"""
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
-            self.logger.info("Đã đóng Selenium WebDriver")
-        
-    def get_product_urls(self, category_url: str) -> List[str]:
-        """Lấy danh sách URL sản phẩm từ một danh mục với xử lý nút 'Xem thêm'"""
-        product_urls = []
+    def parse_product_page(self, product_url: str, html) -> Dict[str, Any]:
+        """Trích xuất thông tin sản phẩm từ HTML của trang chi tiết"""
+        soup = make_soup(html, self.parser)
+        # Duyệt cây HTML một lần, các hàm extract_* chỉ tra cứu trên kết quả này
+        page = PageIndex(soup)
+
+        # Ưu tiên dữ liệu có cấu trúc trong payload JSON, DOM selector chỉ dùng cho trường còn thiếu
+        json_fields = self.extract_json_fields(page) if self.json_first else {}
         
-        try:
-            url = f"{BASE_URL}/{category_url}"
-            self.logger.info(f"Crawling category page: {url}")
-            
-            # Khởi tạo Selenium driver
-            self.init_selenium_driver()
-            self.driver.get(url)
-            
-            # Đợi trang load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Click vào nút "Xem thêm" cho đến khi không còn nút nào
-            max_clicks = 20  # Giới hạn số lần click để tránh vòng lặp vô tận
-            click_count = 0
-            
-            while click_count < max_clicks:
-                try:
-                    # Tìm nút "Xem thêm"
-                    see_more_button = WebDriverWait(self.driver, 3).until(
-                        EC.element_to_be_clickable((By.XPATH, "//button[contains(.//span, 'Xem thêm') and contains(.//span, 'sản phẩm')]"))
-                    )
-                    
-                    # Scroll đến nút
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", see_more_button)
-                    time.sleep(1)
-                    
-                    # Click vào nút
-                    see_more_button.click()
-                    click_count += 1
-                    
-                    self.logger.info(f"Đã click 'Xem thêm' lần {click_count}")
-                    
-                    # Đợi content load
-                    time.sleep(2)
-                    
-                except TimeoutException:
-                    # Không còn nút "Xem thêm"
-                    self.logger.info("Không còn nút 'Xem thêm', đã load tất cả sản phẩm")
-                    break
-                except Exception as e:
-                    self.logger.warning(f"Lỗi khi click 'Xem thêm': {str(e)}")
-                    break
-            
-            # Lấy HTML sau khi đã load tất cả sản phẩm
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # Tìm grid sản phẩm chính - grid có class 'grid-cols-2' và 'md:grid-cols-4'
-            product_grid = None
-            all_grids = soup.find_all('div', class_=True)
-            
-            for div in all_grids:
-                classes = div.get('class', [])
-                if (isinstance(classes, list) and 
-                    'grid' in classes and 
-                    'grid-cols-2' in classes and 
-                    'md:grid-cols-4' in classes):
-                    product_grid = div
-                    break
-            
-            if product_grid:
-                # Lấy tất cả product links từ grid chính
-                all_links_in_grid = product_grid.find_all('a', href=lambda x: x and '.html' in x)
-                
-                # Lọc chỉ lấy links trong category hiện tại
-                category_path = f"/{category_url.split('/')[0]}/"  # Ví dụ: /thuc-pham-chuc-nang/
-                
-                seen_urls = set()
-                for link in all_links_in_grid:
-                    href = link.get('href')
-                    if (href and 
-                        category_path in href and 
-                        href.count('/') >= 2):  # Đảm bảo là URL sản phẩm chi tiết
-                        
-                        if href.startswith('/'):
-                            href = BASE_URL + href
-                        
-                        # Chỉ thêm nếu chưa thấy URL này
-                        if href not in seen_urls:
-                            seen_urls.add(href)
-                            product_urls.append(href)
-                
-                self.logger.info(f"Tìm thấy grid sản phẩm chính với {len(product_urls)} sản phẩm unique")
+        # Trích xuất thông tin sản phẩm theo cấu trúc Long Châu
+        product_data = {'url': product_url}
+        for field, extractor in PRODUCT_FIELD_EXTRACTORS:
+            if field in json_fields:
+                product_data[field] = json_fields[field]
             else:
-                # Fallback: lấy tất cả unique links trong category
-                self.logger.warning("Không tìm thấy grid sản phẩm chính, sử dụng fallback")
-                
-                category_path = f"/{category_url.split('/')[0]}/"
-                all_links = soup.find_all('a', href=lambda x: x and '.html' in x and category_path in x)
-                
-                seen_urls = set()
-                for link in all_links:
-                    href = link.get('href')
-                    if href and href.count('/') >= 2:
-                        if href.startswith('/'):
-                            href = BASE_URL + href
-                        
-                        if href not in seen_urls:
-                            seen_urls.add(href)
-                            product_urls.append(href)
-                
-                self.logger.info(f"Fallback: tìm thấy {len(product_urls)} sản phẩm unique")
-            
-        except Exception as e:
-            self.logger.error(f"Lỗi khi crawl danh mục {category_url}: {str(e)}")
-        finally:
-            # Đóng Selenium driver
-            self.close_selenium_driver()
-        
-        # Filter chỉ lấy URL sản phẩm thực sự (đã loại bỏ duplicate ở trên)
-        filtered_urls = [url for url in product_urls if self.is_product_url(url)]
+                product_data[field] = getattr(self, extractor)(page)
+        product_data['crawled_at'] = datetime.now().isoformat()
         
-        self.logger.info(f"Tìm thấy {len(filtered_urls)} sản phẩm trong danh mục {category_url} (sau khi load tất cả)")
-        return filtered_urls
+        return product_data
     
-    def is_product_url(self, url: str) -> bool:
-        """Kiểm tra xem URL có phải là URL sản phẩm không"""
-        # URL sản phẩm thường có format: /category/subcategory/product-name.html
-        parts = url.replace(BASE_URL, '').split('/')
-        return (len(parts) >= 3 and 
-                url.endswith('.html') and
-                not any(exclude in url for exclude in ['?', '#', 'page=', 'sort=']))
+    def _page_index(self, soup) -> PageIndex:
+        """Các hàm extract_* nhận BeautifulSoup hoặc PageIndex đã dựng sẵn"""
+        if isinstance(soup, PageIndex):
+            return soup
+        return PageIndex(soup)
     
-    def crawl_product_detail(self, product_url: str) -> Dict[str, Any]:
-        """Crawl thông tin chi tiết một sản phẩm"""                                                                                                                                                                                                         
-        try:
-            response = make_request(product_url, self.session.headers)
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Trích xuất thông tin sản phẩm theo cấu trúc Long Châu
-            product_data = {
-                'url': product_url,
-                'name': self.extract_product_name(soup),
-                'price': self.extract_price(soup),
-                'unit': self.extract_unit(soup),
-                'sku': self.extract_sku(soup),
-                'rating': self.extract_rating(soup),
-                'reviews_count': self.extract_reviews_count(soup),
-                'comments_count': self.extract_comments_count(soup),
-                'brand': self.extract_brand(soup),
-                'official_name': self.extract_official_name(soup),
-                'category': self.extract_category(soup),
-                'registration_number': self.extract_registration_number(soup),
-                'form': self.extract_form(soup),
-                'package_size': self.extract_package_size(soup),
-                'origin_brand': self.extract_origin_brand(soup),
-                'manufacturer': self.extract_manufacturer(soup),
-                'country_of_manufacture': self.extract_country_of_manufacture(soup),
-                'ingredients': self.extract_ingredients(soup),
-                'images': self.extract_images(soup),
-                'content': self.extract_content(soup),
-                'original_price': self.extract_original_price(soup),
-                'discount': self.extract_discount(soup),
-                'description': self.extract_description(soup),
-                'usage': self.extract_usage(soup),
-                'availability': self.extract_availability(soup),
-                'crawled_at': datetime.now().isoformat()
-            }
-            
-            return product_data
-            
-        except Exception as e:
-            self.logger.error(f"Lỗi khi crawl sản phẩm {product_url}: {str(e)}")
-            return None
+    def extract_json_fields(self, soup: BeautifulSoup) -> Dict[str, Any]:
+        """Trích xuất các trường có sẵn trong payload JSON của trang (JSON-LD, hydration data)"""
+        page = self._page_index(soup)
+        product = find_product_object(
+            [data for _, data, decoded in page.json_scripts('application/ld+json') if decoded],
+            [data for _, data, decoded in page.json_scripts('application/json') if decoded]
+        )
+        if not product:
+            return {}
+        
+        fields = map_product_fields(product)
+        if 'images' in fields:
+            # Áp dụng cùng bộ lọc và chuyển đổi kích thước như ảnh lấy từ DOM
+            images = [self.convert_to_full_size_image(url)
+                      for url in self.url_classifier.product_images(fields['images'])]
+            if images:
+                fields['images'] = list(dict.fromkeys(images))
+            else:
+                del fields['images']
+        return fields
     
     def extract_product_name(self, soup: BeautifulSoup) -> str:
         """Trích xuất tên sản phẩm"""
-        # Selector chính xác từ Long Châu
-        element = soup.select_one('h1[data-test="product_name"]')
-        if element:
-            return clean_text(element.get_text())
-        
-        # Fallback selectors
-        selectors = ['h1', '.product-title', '.product-name', '.title']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        # Selector chính xác từ Long Châu trước, sau đó là các fallback selectors
+        for selector in FIELD_SELECTORS['name']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
     
     def extract_price(self, soup: BeautifulSoup) -> float:
         """Trích xuất giá sản phẩm"""
-        # Selector chính xác từ Long Châu
-        element = soup.select_one('span[data-test="price"]')
-        if element:
-            price_text = element.get_text()
-            if price_text and any(char.isdigit() for char in price_text):
-                return format_price(price_text)
-        
-        # Fallback selectors
-        selectors = ['.price', '[class*="price"]', '.cost', '.gia', 'span[class*="price"]', 'div[class*="price"]']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        # Selector chính xác từ Long Châu trước, sau đó là các fallback selectors
+        for selector in FIELD_SELECTORS['price']:
+            element = page.select_one(selector)
             if element:
                 price_text = element.get_text()
                 if price_text and any(char.isdigit() for char in price_text):
@@ -272,69 +176,67 @@ class LongChauCrawler:
     
     def extract_original_price(self, soup: BeautifulSoup) -> float:
         """Trích xuất giá gốc"""
-        selectors = ['.price-original', '.price-old', '.original-price']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['original_price']:
+            element = page.select_one(selector)
             if element:
                 return format_price(element.get_text())
         return 0.0
     
     def extract_discount(self, soup: BeautifulSoup) -> str:
         """Trích xuất thông tin giảm giá"""
-        selectors = ['.discount-percent', '.sale-badge', '.discount']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['discount']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
     
     def extract_description(self, soup: BeautifulSoup) -> str:
         """Trích xuất mô tả sản phẩm"""
-        selectors = ['.product-description', '.description', '.product-detail']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['description']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
     
     def extract_ingredients(self, soup: BeautifulSoup) -> str:
         """Trích xuất thành phần"""
+        page = self._page_index(soup)
         # Trích xuất từ bảng thông tin
-        ingredients = self.extract_table_info(soup, "Thành phần")
+        ingredients = self.extract_table_info(page, "Thành phần")
         if ingredients:
             return ingredients
             
         # Fallback selectors
-        selectors = ['.ingredients', '.composition', '.thanh-phan']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        for selector in FIELD_SELECTORS['ingredients']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
     
     def extract_usage(self, soup: BeautifulSoup) -> str:
         """Trích xuất cách sử dụng"""
-        selectors = ['.usage', '.cach-dung', '.instructions']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['usage']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
     
     def extract_brand(self, soup: BeautifulSoup) -> str:
         """Trích xuất thương hiệu"""
-        import json
         import re
         
-        # Tìm trong JSON scripts trước (nguồn chính xác nhất)
-        scripts = soup.find_all('script', type='application/json')
-        for script in scripts:
+        page = self._page_index(soup)
+        # Tìm trong JSON scripts trước (nguồn chính xác nhất), dữ liệu đã được decode sẵn
+        for script_content, data, decoded in page.json_scripts('application/json'):
             try:
-                script_content = script.string
                 if script_content:
-                    # Thử parse JSON
                     try:
-                        data = json.loads(script_content)
+                        if not decoded:
+                            raise ValueError("Không phải JSON hợp lệ")
                         brand_info = self._find_brand_in_json(data)
                         if brand_info:
                             return clean_text(brand_info)
@@ -351,10 +253,10 @@ class LongChauCrawler:
                 continue
         
         # Tìm trong structured data (JSON-LD)
-        json_ld_scripts = soup.find_all('script', type='application/ld+json')
-        for script in json_ld_scripts:
+        for _, data, decoded in page.json_scripts('application/ld+json'):
+            if not decoded:
+                continue
             try:
-                data = json.loads(script.string)
                 brand_info = self._find_brand_in_json(data)
                 if brand_info:
                     return clean_text(brand_info)
@@ -362,12 +264,12 @@ class LongChauCrawler:
                 continue
         
         # Tìm trong table info (sử dụng extract_table_info)
-        brand_from_table = self.extract_table_info(soup, "Thương hiệu")
+        brand_from_table = self.extract_table_info(page, "Thương hiệu")
         if brand_from_table:
             return brand_from_table
         
         # Tìm trong thông tin sản phẩm theo cấu trúc Long Châu
-        brand_div = soup.find('div', string=lambda text: text and 'Thương hiệu:' in text)
+        brand_div = page.div_with_string('Thương hiệu:')
         if brand_div:
             # Lấy text sau "Thương hiệu: "
             brand_text = brand_div.get_text()
@@ -375,9 +277,8 @@ class LongChauCrawler:
                 return clean_text(brand_text.split('Thương hiệu:')[1].strip())
         
         # Fallback selectors
-        selectors = ['.brand', '.manufacturer', '.thuong-hieu']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        for selector in FIELD_SELECTORS['brand']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
@@ -407,18 +308,18 @@ class LongChauCrawler:
     
     def extract_category(self, soup: BeautifulSoup) -> str:
         """Trích xuất danh mục"""
-        selectors = ['.breadcrumb', '.category', '.danh-muc']
-        for selector in selectors:
-            elements = soup.select(f'{selector} a')
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['category']:
+            elements = page.select(f'{selector} a')
             if elements:
                 return ' > '.join([clean_text(el.get_text()) for el in elements])
         return ""
     
     def extract_availability(self, soup: BeautifulSoup) -> str:
         """Trích xuất tình trạng còn hàng"""
-        selectors = ['.availability', '.stock-status', '.tinh-trang']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        page = self._page_index(soup)
+        for selector in FIELD_SELECTORS['availability']:
+            element = page.select_one(selector)
             if element:
                 return clean_text(element.get_text())
         return ""
@@ -426,13 +327,14 @@ class LongChauCrawler:
     def extract_images(self, soup: BeautifulSoup) -> List[str]:
         """Trích xuất danh sách ảnh sản phẩm từ gallery carousel"""
         images = []
+        page = self._page_index(soup)
         
         # 1. Trích xuất từ Swiper carousel (cấu trúc mới)
-        swiper_wrapper = soup.find('div', class_='swiper-wrapper')
+        swiper_wrapper = page.select_one('div.swiper-wrapper')
         if swiper_wrapper:
             # Lấy tất cả ảnh trong swiper slides
             swiper_slides = swiper_wrapper.find_all('div', class_='swiper-slide')
-            self.logger.info(f"📸 Found {len(swiper_slides)} swiper slides")
+            self.logger.debug("📸 Found %d swiper slides", len(swiper_slides))
             
             for i, slide in enumerate(swiper_slides):
                 img = slide.find('img', class_='gallery-img')
@@ -446,7 +348,7 @@ class LongChauCrawler:
                     srcset = img.get('srcset', '').strip()
                     
                     # Debug log
-                    self.logger.debug(f"  Slide {i+1}: src='{src[:50]}...', srcset='{srcset[:50]}...'")
+                    self.logger.debug("  Slide %d: src='%.50s...', srcset='%.50s...'", i + 1, src, srcset)
                     
                     # Ưu tiên lấy URL chất lượng cao từ srcset
                     final_src = src
@@ -471,22 +373,22 @@ class LongChauCrawler:
                         # Chuyển đổi sang full size nếu cần
                         full_size_src = self.convert_to_full_size_image(final_src)
                         images.append(full_size_src)
-                        self.logger.info(f"  ✅ Swiper slide {i+1}: {final_src.split('/')[-1]}")
+                        self.logger.debug("  ✅ Swiper slide %d: %s", i + 1, final_src)
                     else:
                         if final_src:
-                            self.logger.info(f"  ❌ Swiper slide {i+1}: {final_src.split('/')[-1]} (filtered)")
+                            self.logger.debug("  ❌ Swiper slide %d: %s (filtered)", i + 1, final_src)
                         else:
-                            self.logger.info(f"  ❌ Swiper slide {i+1}: No src found")
+                            self.logger.debug("  ❌ Swiper slide %d: No src found", i + 1)
                 else:
-                    self.logger.info(f"  ❌ Swiper slide {i+1}: No img element found")
+                    self.logger.debug("  ❌ Swiper slide %d: No img element found", i + 1)
         
         # 2. Fallback: Trích xuất từ carousel gallery cũ (nếu có)
         if not images:
-            carousel_gallery = soup.find('div', class_='carousel-gallery-list')
+            carousel_gallery = page.select_one('div.carousel-gallery-list')
             if carousel_gallery:
                 # Lấy tất cả ảnh trong carousel
                 gallery_imgs = carousel_gallery.find_all('img', class_='gallery-img')
-                self.logger.info(f"📸 Found {len(gallery_imgs)} carousel gallery images (fallback)")
+                self.logger.debug("📸 Found %d carousel gallery images (fallback)", len(gallery_imgs))
                 
                 for i, img in enumerate(gallery_imgs):
                     src = img.get('src')
@@ -508,15 +410,15 @@ class LongChauCrawler:
                         # Chuyển đổi sang full size nếu cần
                         full_size_src = self.convert_to_full_size_image(src)
                         images.append(full_size_src)
-                        self.logger.info(f"  ✅ Carousel {i+1}: {src.split('/')[-1]}")
+                        self.logger.debug("  ✅ Carousel %d: %s", i + 1, src)
                     else:
                         if src:
-                            self.logger.info(f"  ❌ Carousel {i+1}: {src.split('/')[-1]} (filtered)")
+                            self.logger.debug("  ❌ Carousel %d: %s (filtered)", i + 1, src)
         
         # 3. Trích xuất từ modal gallery (nếu có)
-        modal_thumbs = soup.find_all('div', class_='lg-thumb-item')
+        modal_thumbs = page.select('div.lg-thumb-item')
         if modal_thumbs:
-            self.logger.info(f"🖼️  Found {len(modal_thumbs)} modal thumbs")
+            self.logger.debug("🖼️  Found %d modal thumbs", len(modal_thumbs))
             for i, thumb in enumerate(modal_thumbs):
                 img = thumb.find('img')
                 if img:
@@ -525,16 +427,15 @@ class LongChauCrawler:
                         # Chuyển đổi từ thumbnail sang full size
                         full_size_src = self.convert_to_full_size_image(src)
                         images.append(full_size_src)
-                        self.logger.info(f"  ✅ Modal {i+1}: {src.split('/')[-1]}")
+                        self.logger.debug("  ✅ Modal %d: %s", i + 1, src)
         
         # 4. Tìm ảnh từ các script JSON data (nếu có ít ảnh từ carousel)
         if len(images) < 3:
-            self.logger.info("🔍 Few carousel images found. Searching JSON scripts...")
-            script_tags = soup.find_all('script', type='application/json')
-            for script in script_tags:
+            self.logger.debug("🔍 Few carousel images found. Searching JSON scripts...")
+            for script_content, _, _ in page.json_scripts('application/json'):
                 try:
                     import re
-                    script_content = script.get_text()
+                    script_content = script_content or ""
                     # Tìm URLs ảnh sản phẩm trong JSON (chỉ DSC_ và mã sản phẩm)
                     image_urls = re.findall(r'https://cdn\.nhathuoclongchau\.com\.vn/[^"]*(?:DSC_|00\d{6})[^"]*\.(?:jpg|jpeg|png|webp)', script_content, re.IGNORECASE)
                     
@@ -542,7 +443,7 @@ class LongChauCrawler:
                         if url not in images and self.is_product_image(url):
                             full_size_url = self.convert_to_full_size_image(url)
                             images.append(full_size_url)
-                            self.logger.info(f"  ✅ JSON: {url.split('/')[-1]}")
+                            self.logger.debug("  ✅ JSON: %s", url)
                             
                             # Giới hạn số ảnh từ JSON để tránh quá nhiều
                             if len(images) >= 10:
@@ -552,10 +453,10 @@ class LongChauCrawler:
         
         # 5. XPath selector fallback (sử dụng lxml nếu cần)
         if not images:
-            self.logger.info("🔍 Using XPath fallback...")
+            self.logger.debug("🔍 Using XPath fallback...")
             try:
                 from lxml import html
-                tree = html.fromstring(str(soup))
+                tree = html.fromstring(str(page.soup))
                 
                 # XPath từ bạn cung cấp (có thể cần điều chỉnh)
                 xpath_selectors = [
@@ -568,7 +469,7 @@ class LongChauCrawler:
                     try:
                         img_elements = tree.xpath(xpath)
                         if img_elements:
-                            self.logger.info(f"  Found {len(img_elements)} images with XPath: {xpath}")
+                            self.logger.debug("  Found %d images with XPath: %s", len(img_elements), xpath)
                             for img_elem in img_elements:
                                 src = img_elem.get('src')
                                 srcset = img_elem.get('srcset')
@@ -596,8 +497,8 @@ class LongChauCrawler:
         
         # 6. Final fallback: Tìm tất cả ảnh sản phẩm
         if not images:
-            self.logger.info("🆘 Using final fallback - searching all images")
-            product_imgs = soup.find_all('img')
+            self.logger.debug("🆘 Using final fallback - searching all images")
+            product_imgs = page.select('img')
             for img in product_imgs:
                 src = img.get('src') or img.get('data-src')
                 if src and self.is_product_image(src):
@@ -605,7 +506,7 @@ class LongChauCrawler:
                     images.append(full_size_src)
         
         # Log kết quả
-        self.logger.info(f"📊 Image extraction completed: {len(images)} images found")
+        self.logger.debug("📊 Image extraction completed: %d images found", len(images))
         
         # Loại bỏ duplicate và return
         return list(dict.fromkeys(images))  # Giữ thứ tự và loại bỏ duplicate
@@ -613,8 +514,10 @@ class LongChauCrawler:
     def extract_content(self, soup: BeautifulSoup) -> str:
         """Trích xuất toàn bộ nội dung chi tiết sản phẩm"""
         try:
+            page = self._page_index(soup)
             # Tìm container chính chứa nội dung sản phẩm
-            content_container = soup.find('div', class_='lc-wrap-content lc-view-full-cont abc')
+            main_selector, *fallback_selectors = FIELD_SELECTORS['content']
+            content_container = page.select_one(main_selector)
             
             if content_container:
                 # Lấy toàn bộ HTML content
@@ -623,19 +526,12 @@ class LongChauCrawler:
                 # Làm sạch và format HTML
                 content_html = self._clean_content_html(content_html)
                 
-                self.logger.info(f"✅ Content extracted: {len(content_html)} characters")
+                self.logger.debug("✅ Content extracted: %d characters", len(content_html))
                 return content_html
             else:
                 # Fallback: tìm các selector khác
-                fallback_selectors = [
-                    'div.lc-wrap-content',
-                    'div.inner',
-                    'div.description',
-                    'div[id^="detail-content"]'
-                ]
-                
                 for selector in fallback_selectors:
-                    elements = soup.select(selector)
+                    elements = page.select(selector)
                     if elements:
                         # Lấy element đầu tiên hoặc kết hợp tất cả
                         if len(elements) == 1:
@@ -645,22 +541,23 @@ class LongChauCrawler:
                             content_html = ''.join(str(elem) for elem in elements)
                         
                         content_html = self._clean_content_html(content_html)
-                        self.logger.info(f"✅ Content extracted (fallback): {len(content_html)} characters")
+                        self.logger.debug("✅ Content extracted (fallback): %d characters", len(content_html))
                         return content_html
                 
-                self.logger.warning("❌ No content container found")
+                self.logger.debug("❌ No content container found")
                 return ""
                 
         except Exception as e:
-            self.logger.error(f"Lỗi khi trích xuất content: {str(e)}")
+            self.logger.error("Lỗi khi trích xuất content: %s", e)
             return ""
     
     def _clean_content_html(self, html_content: str) -> str:
         """Làm sạch và format HTML content"""
         try:
             # Parse lại HTML để làm sạch
-            from bs4 import BeautifulSoup
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = make_soup(html_content, self.parser)
+            # lxml bọc fragment trong <html><body>, chỉ làm việc với phần nội dung
+            root = soup.body if self.parser != 'html.parser' and soup.body is not None else soup
             
             # Loại bỏ các elements không cần thiết
             unwanted_selectors = [
@@ -672,11 +569,11 @@ class LongChauCrawler:
             ]
             
             for selector in unwanted_selectors:
-                for element in soup.select(selector):
+                for element in root.select(selector):
                     element.decompose()
             
             # Làm sạch attributes không cần thiết nhưng giữ lại cấu trúc
-            for tag in soup.find_all(True):
+            for tag in root.find_all(True):
                 # Giữ lại một số attributes quan trọng
                 keep_attrs = ['class', 'id', 'href', 'src', 'alt', 'width', 'height']
                 attrs_to_remove = []
@@ -689,7 +586,7 @@ class LongChauCrawler:
                     del tag[attr]
             
             # Trả về HTML đã được làm sạch
-            cleaned_html = str(soup)
+            cleaned_html = root.decode_contents()
             
             # Loại bỏ whitespace thừa
             import re
@@ -699,57 +596,12 @@ class LongChauCrawler:
             return cleaned_html.strip()
             
         except Exception as e:
-            self.logger.error(f"Lỗi khi làm sạch HTML content: {str(e)}")
+            self.logger.error("Lỗi khi làm sạch HTML content: %s", e)
             return html_content  # Trả về content gốc nếu có lỗi
     
     def is_product_image(self, src: str) -> bool:
-        """Kiểm tra xem URL có phải là ảnh sản phẩm không"""
-        if not src:
-            return False
-        
-        src_lower = src.lower()
-        
-        # Loại trừ các ảnh không phải sản phẩm trước
-        exclude_patterns = [
-            'logo', 'banner', 'icon', 'badge', 'smalls/',
-            'facebook', 'zalo', 'download', 'payment',
-            'visa', 'master', 'momo', 'napas', 'vnpay',
-            'apple_pay', 'amex', 'jcb', 'bo_cong_thuong',
-            'legit_', 'dmca_', 'search_', 'menu_',
-            'truyen_thong', 'tin_khuyen_mai', 'chuyen_trang',
-            'deep_link', 'goc_suc_khoe', 'short_video',
-            'cup_', 'benh_', 'thuong_hieu', 'danh_muc',
-            'kiem_tra_suc_khoe', 'header_', 'footer_'
-        ]
-        
-        for exclude in exclude_patterns:
-            if exclude in src_lower:
-                return False
-        
-        # Kiểm tra các pattern của ảnh sản phẩm Long Châu
-        # 1. URL từ CDN chính của Long Châu
-        if 'cms-prod.s3-sgn09.fptcloud.com' in src_lower:
-            # 2. Pattern ảnh sản phẩm (DSC_ là pattern chụp sản phẩm)
-            if 'dsc_' in src_lower:
-                return True
-            
-            # 3. Tên sản phẩm cụ thể trong URL
-            product_name_patterns = [
-                'lineabon', 'omexxel', 'calci', 'vitamin', 'nutrimed',
-                'nutrigrow', 'osteocare', 'vitabiotics', 'anica',
-                'pharma', 'ergopharm', 'nordic', 'excelife'
-            ]
-            
-            for pattern in product_name_patterns:
-                if pattern in src_lower:
-                    return True
-            
-            # 4. Kiểm tra số sản phẩm (pattern 00XXXXXX)
-            import re
-            if re.search(r'00\d{6}', src):
-                return True
-        
-        return False
+        """Kiểm tra xem URL có phải là ảnh sản phẩm không (quy tắc trong config, xem UrlClassifier)"""
+        return self.url_classifier.is_product_image(src)
     
     def convert_to_full_size_image(self, thumbnail_url: str) -> str:
         """Chuyển đổi URL thumbnail thành URL full size"""
@@ -770,14 +622,14 @@ class LongChauCrawler:
     
     def extract_unit(self, soup: BeautifulSoup) -> str:
         """Trích xuất đơn vị tính"""
-        element = soup.select_one('span[data-test="unit"]')
+        element = self._page_index(soup).select_one(FIELD_SELECTORS['unit'][0])
         if element:
             return clean_text(element.get_text())
         return ""
     
     def extract_sku(self, soup: BeautifulSoup) -> str:
         """Trích xuất mã sản phẩm (SKU)"""
-        element = soup.select_one('span[data-test-id="sku"]')
+        element = self._page_index(soup).select_one(FIELD_SELECTORS['sku'][0])
         if element:
             return clean_text(element.get_text())
         return ""
@@ -786,8 +638,9 @@ class LongChauCrawler:
         """Trích xuất đánh giá sao"""
         import re
         
-        # Tìm tất cả container có chứa từ 'đánh giá'
-        rating_containers = soup.find_all(text=lambda x: x and 'đánh giá' in x)
+        page = self._page_index(soup)
+        # Tìm tất cả text node có chứa từ 'đánh giá'
+        rating_containers = page.strings_containing('đánh giá')
         
         for text_node in rating_containers:
             parent = text_node.parent
@@ -813,7 +666,7 @@ class LongChauCrawler:
                             continue
         
         # Fallback: tìm trong các container flex items-center
-        rating_containers = soup.find_all('div', class_='flex items-center')
+        rating_containers = page.select('div[class="flex items-center"]')
         for container in rating_containers:
             rating_text = container.get_text()
             if 'đánh giá' in rating_text or 'sao' in rating_text:
@@ -828,9 +681,8 @@ class LongChauCrawler:
                         continue
         
         # Fallback selectors
-        selectors = ['.rating', '.stars', '.danh-gia']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        for selector in FIELD_SELECTORS['rating']:
+            element = page.select_one(selector)
             if element:
                 text = element.get_text()
                 try:
@@ -841,8 +693,9 @@ class LongChauCrawler:
     
     def extract_reviews_count(self, soup: BeautifulSoup) -> int:
         """Trích xuất số lượng đánh giá"""
+        page = self._page_index(soup)
         # Tìm text chứa "đánh giá"
-        rating_container = soup.find('div', class_='flex items-center')
+        rating_container = page.select_one('div[class="flex items-center"]')
         if rating_container:
             text = rating_container.get_text()
             if 'đánh giá' in text:
@@ -855,9 +708,8 @@ class LongChauCrawler:
                         pass
         
         # Fallback selectors
-        selectors = ['.reviews-count', '.review-count', '.so-danh-gia']
-        for selector in selectors:
-            element = soup.select_one(selector)
+        for selector in FIELD_SELECTORS['reviews_count']:
+            element = page.select_one(selector)
             if element:
                 text = element.get_text()
                 try:
@@ -869,7 +721,7 @@ class LongChauCrawler:
     def extract_comments_count(self, soup: BeautifulSoup) -> int:
         """Trích xuất số lượng bình luận"""
         # Tìm text chứa "bình luận"
-        rating_container = soup.find('div', class_='flex items-center')
+        rating_container = self._page_index(soup).select_one('div[class="flex items-center"]')
         if rating_container:
             text = rating_container.get_text()
             if 'bình luận' in text:
@@ -884,17 +736,10 @@ class LongChauCrawler:
     
     def extract_table_info(self, soup: BeautifulSoup, label: str) -> str:
         """Trích xuất thông tin từ bảng chi tiết sản phẩm"""
-        # Tìm trong bảng content-list
-        table = soup.find('table', class_='content-list')
-        if table:
-            rows = table.find_all('tr', class_='content-container')
-            for row in rows:
-                cells = row.find_all('td')
-                if len(cells) >= 2:
-                    label_cell = cells[0]
-                    value_cell = cells[1]
-                    if label_cell and label in label_cell.get_text():
-                        return clean_text(value_cell.get_text())
+        # Các dòng của bảng content-list chỉ được đọc một lần cho mỗi trang
+        for label_text, value_cell in self._page_index(soup).table_rows():
+            if label in label_text:
+                return clean_text(value_cell.get_text())
         return ""
     
     def extract_official_name(self, soup: BeautifulSoup) -> str:
@@ -924,43 +769,630 @@ class LongChauCrawler:
     def extract_country_of_manufacture(self, soup: BeautifulSoup) -> str:
         """Trích xuất nước sản xuất"""
         return self.extract_table_info(soup, "Nước sản xuất")
+
+
+class LongChauCrawler(ProductPageParser):
+    def __init__(self, engine: str = CRAWL_ENGINE, concurrency: int = ASYNC_CONCURRENCY,
+                 use_cache: bool = HTTP_CACHE_ENABLED,
+                 archive_dir: str = HTML_ARCHIVE_DIR if HTML_ARCHIVE_ENABLED else None,
+                 parser: str = HTML_PARSER, json_first: bool = JSON_FIRST_EXTRACTION,
+                 listing_source: str = LISTING_SOURCE, listing_api_url: str = LISTING_API_URL,
+                 parse_workers: int = PIPELINE_PARSE_WORKERS, stream: bool = STREAM_OUTPUT,
+                 run_dir: str = None, incremental: bool = False, dedup: bool = DEDUP_ENABLED,
+                 large_fields: str = LARGE_FIELDS_MODE, download_images: bool = IMAGE_DOWNLOAD_ENABLED,
+                 image_variant: str = IMAGE_VARIANT):
+        super().__init__(parser, json_first)
+        self.session = create_session(DEFAULT_HEADERS)
+        self.http_cache = HttpCache(HTTP_CACHE_DIR, HTTP_CACHE_MAX_SIZE, HTTP_CACHE_TTL) if use_cache else None
+        self.archive = HtmlArchive(archive_dir, HTML_ARCHIVE_SEGMENT_SIZE) if archive_dir else None
+        self.logger = setup_logging()
+        self.products = []  # ProductRecord, chỉ dùng khi không stream ra file JSONL
+        self.product_count = 0  # Số sản phẩm đã crawl (cả khi stream)
+        # Chống trùng giữa các danh mục; lưu cùng checkpoint để lần chạy tiếp vẫn biết sản phẩm nào đã thuộc danh mục nào
+        self.dedup = None
+        if dedup:
+            dedup_path = os.path.join(run_dir, 'dedup.db') if run_dir else ':memory:'
+            self.dedup = DedupIndex(dedup_path, DEDUP_BLOOM_CAPACITY, DEDUP_BLOOM_ERROR_RATE)
+        self.duplicate_count = 0  # Số URL bỏ qua vì sản phẩm đã thuộc danh mục khác
+        self.record_writer = None
+        self.state = None  # Checkpoint của lần chạy (chỉ có khi truyền run_dir)
+        if run_dir:
+            # Bản ghi luôn được stream vào thư mục run để chạy tiếp không mất dữ liệu đã crawl
+            self.record_writer = JsonlWriter(os.path.join(run_dir, 'products.jsonl'))
+            self.state = CrawlState(os.path.join(run_dir, 'state.db'), before_commit=self._flush_for_checkpoint)
+            self.product_count = self.state.counts().get(URL_DONE, 0)
+        elif stream:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            self.record_writer = JsonlWriter(f"{OUTPUT_DIR}/longchau_products_{timestamp}.jsonl")
+        self.browser_pool = BrowserPool()  # Driver chỉ được khởi động khi cần lấy danh sách bằng Selenium
+        self.current_categories = []  # Lưu trữ danh sách categories đã crawl
+        self.active_category = ''  # Danh mục đang crawl: trạng thái URL trong checkpoint được lưu theo danh mục
+        self.engine = engine  # 'sync', 'async' hoặc 'pipeline'
+        self.concurrency = concurrency
+        self.parse_workers = parse_workers  # Số process parse/extract của engine pipeline
+        self.listing_source = listing_source  # 'api', 'browser' hoặc 'auto'
+        self.listing_api = ListingApiClient(self.session, listing_api_url)
+        self.sitemap_lastmod = {}  # URL sản phẩm -> lastmod trong sitemap (chế độ sitemap)
+        self.listing_cards = {}  # URL sản phẩm -> card (tên, giá, SKU) từ API listing
+        # Snapshot lần crawl trước, chỉ dùng ở chế độ incremental
+        self.snapshot = SnapshotStore(SNAPSHOT_DB, INCREMENTAL_MAX_AGE) if incremental else None
+        self.incremental_stats = {'carried': 0, 'fetched': 0, 'changed': 0}
+        # Trường văn bản lớn: ngoài chế độ 'inline', bản ghi chỉ giữ tham chiếu tới blob store
+        self.large_fields = large_fields
+        self.blob_store = BlobStore(BLOB_STORE_PATH) if large_fields != 'inline' else None
+        # Ảnh được tải nền ngay khi bản ghi được ghi, song song với các trang chi tiết tiếp theo
+        self.image_downloader = None
+        if download_images:
+            self.image_downloader = ImageDownloader(IMAGE_DIR, IMAGE_DOWNLOAD_WORKERS, image_variant)
+        self._records_lock = threading.Lock()
+    
+    def __del__(self):
+        """Destructor để đảm bảo Selenium driver được đóng"""
+        self.close_selenium_driver()
     
-    def crawl_category(self, category_url: str, max_products: int = None):
-        """Crawl toàn bộ sản phẩm trong một danh mục"""
+    def close_selenium_driver(self):
+        """Đóng các Selenium WebDriver đang rảnh trong pool"""
+        if getattr(self, 'browser_pool', None):
+            self.browser_pool.close()
+    
+    def _flush_for_checkpoint(self):
+        """Gọi trước mỗi commit của checkpoint: checkpoint không đánh dấu xong URL khi bản ghi (file JSONL)
+        và chỉ mục chống trùng, blob văn bản lớn của nó chưa nằm trên đĩa"""
+        self.record_writer.flush()
+        if self.dedup is not None:
+            self.dedup.flush()
+        if self.blob_store is not None:
+            self.blob_store.flush()
+    
+    def close(self):
+        """Giải phóng tài nguyên khi kết thúc (gọi sau save_data): driver, cache HTTP, archive, checkpoint, snapshot, blob store, tải ảnh"""
+        self.close_selenium_driver()
+        if self.record_writer is not None:
+            self.record_writer.close()
+        if self.state is not None:
+            self.state.close()
+            self.state = None
+        if self.dedup is not None:
+            self.dedup.close()
+            self.dedup = None
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+        if self.blob_store is not None:
+            self.blob_store.close()
+            self.blob_store = None
+        if self.image_downloader is not None:
+            self.image_downloader.close()
+            self.image_downloader = None
+        if self.http_cache is not None:
+            self.http_cache.close()
+            self.http_cache = None
+        if self.archive is not None:
+            self.archive.close()
+            self.archive = None
+        
+    def get_product_urls(self, category_url: str) -> List[str]:
+        """Lấy danh sách URL sản phẩm từ một danh mục (API listing, fallback sang Selenium)"""
+        return list(self.iter_product_urls(category_url))
+    
+    def iter_product_urls(self, category_url: str) -> Iterator[str]:
+        """Duyệt URL sản phẩm của danh mục ngay khi tìm thấy (API listing, fallback sang Selenium)"""
+        seen_urls = set()
+        if self.listing_source in ('api', 'auto'):
+            try:
+                for url in self.iter_product_urls_from_api(category_url):
+                    seen_urls.add(url)
+                    yield url
+                if seen_urls or self.listing_source == 'api':
+                    return
+                self.logger.warning(f"API listing không trả về sản phẩm cho {category_url}, chuyển sang Selenium")
+            except Exception as e:
+                if self.listing_source == 'api':
+                    self.logger.error(f"Lỗi khi gọi API listing cho {category_url}: {str(e)}")
+                    return
+                self.logger.warning(f"Lỗi khi gọi API listing cho {category_url}: {str(e)}, chuyển sang Selenium")
+        
+        # Bỏ qua các URL API đã trả về trước khi bị lỗi
+        for url in self.iter_product_urls_from_browser(category_url):
+            if url not in seen_urls:
+                yield url
+    
+    def iter_product_urls_from_api(self, category_url: str) -> Iterator[str]:
+        """Duyệt URL sản phẩm qua endpoint JSON phân trang của trang danh mục"""
+        self.logger.info(f"Lấy danh sách sản phẩm qua API: {category_url}")
+        category_path = f"/{category_url.split('/')[0]}/"
+        
+        seen_urls = set()
+        for card in self.listing_api.iter_cards(category_url):
+            url = card['url']
+            if url and category_path in url and url not in seen_urls and self.is_product_url(url):
+                seen_urls.add(url)
+                # Card dùng cho tín hiệu thay đổi của snapshot và SKU để chống trùng trước khi tải
+                if self.snapshot is not None or self.dedup is not None:
+                    self.listing_cards[url] = card
+                yield url
+        
+        self.logger.info(f"Tìm thấy {len(seen_urls)} sản phẩm trong danh mục {category_url} (API)")
+    
+    def iter_product_urls_from_sitemap(self, sitemap_source: str = SITEMAP_URL,
+                                       main_categories: List[str] = None) -> Iterator[str]:
+        """Duyệt URL sản phẩm trong sitemap thuộc các danh mục chính, ghi nhận lastmod của từng URL"""
+        main_categories = main_categories or CATEGORIES
+        category_paths = tuple(f"/{category.split('/')[0]}/" for category in main_categories)
+        self.logger.info(f"Lấy danh sách sản phẩm từ sitemap: {sitemap_source}")
+        
+        found = 0
+        for url, lastmod in iter_sitemap(sitemap_source, self.session):
+            if url in self.sitemap_lastmod or not self.is_product_url(url):
+                continue
+            if not url.replace(BASE_URL, '').startswith(category_paths):
+                continue
+            self.sitemap_lastmod[url] = lastmod
+            if self.state is not None:
+                self.state.set_lastmod(url, lastmod)
+            found += 1
+            yield url
+        
+        self.logger.info(f"Tìm thấy {found} sản phẩm trong sitemap")
+    
+    def get_product_urls_from_browser(self, category_url: str) -> List[str]:
+        """Lấy danh sách URL sản phẩm từ một danh mục với xử lý nút 'Xem thêm'"""
+        return list(self.iter_product_urls_from_browser(category_url))
+    
+    def iter_product_urls_from_browser(self, category_url: str) -> Iterator[str]:
+        """Duyệt URL sản phẩm của trang danh mục bằng Selenium, lấy href mới sau mỗi lần bấm 'Xem thêm'"""
+        category_path = f"/{category_url.split('/')[0]}/"  # Ví dụ: /thuc-pham-chuc-nang/
+        seen_urls = set()
+        
+        try:
+            url = f"{BASE_URL}/{category_url}"
+            self.logger.info(f"Crawling category page: {url}")
+            
+            # Mượn driver đã khởi động sẵn trong pool
+            with self.browser_pool.driver() as driver:
+                driver.get(url)
+                
+                # Đợi trang load
+                WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+                # Với page load 'eager', grid sản phẩm có thể được render sau khi DOM sẵn sàng
+                try:
+                    WebDriverWait(driver, SELENIUM_TIMEOUT, poll_frequency=0.2).until(
+                        lambda d: d.execute_script(GRID_CARD_COUNT_JS)[0] > 0
+                    )
+                except TimeoutException:
+                    self.logger.warning(f"Trang danh mục chưa có sản phẩm sau {SELENIUM_TIMEOUT}s: {url}")
+                
+                # Chỉ đọc các card mới sau mỗi bước load, không serialize lại toàn bộ DOM
+                next_index, had_grid = 0, None
+                for _ in itertools.chain([0], self.load_more_steps(driver)):
+                    hrefs, count, has_grid = driver.execute_script(HARVEST_HREFS_JS, next_index)
+                    if had_grid is not None and has_grid != had_grid:
+                        # Grid xuất hiện/biến mất giữa chừng: chỉ số cũ không còn đúng, đọc lại từ đầu
+                        hrefs, count, has_grid = driver.execute_script(HARVEST_HREFS_JS, 0)
+                    if had_grid is None and not has_grid:
+                        self.logger.warning("Không tìm thấy grid sản phẩm chính, sử dụng fallback")
+                    next_index, had_grid = count, has_grid
+                    
+                    for product_url in self._listing_hrefs_to_urls(hrefs, category_path):
+                        if product_url not in seen_urls:
+                            seen_urls.add(product_url)
+                            yield product_url
+            
+        except Exception as e:
+            self.logger.error(f"Lỗi khi crawl danh mục {category_url}: {str(e)}")
+        
+        self.logger.info(f"Tìm thấy {len(seen_urls)} sản phẩm trong danh mục {category_url} (sau khi load tất cả)")
+    
+    def _listing_hrefs_to_urls(self, hrefs: List[str], category_path: str) -> List[str]:
+        """Chuyển các href trong trang danh mục thành URL sản phẩm đầy đủ, bỏ các href không phải sản phẩm"""
+        candidates = [BASE_URL + href if href.startswith('/') else href
+                      for href in hrefs if href and category_path in href and href.count('/') >= 2]
+        return self.url_classifier.product_urls(candidates)
+    
+    def load_more_steps(self, driver) -> Iterator[int]:
+        """Bấm 'Xem thêm' cho đến khi hết sản phẩm, mỗi lần chỉ đợi đến khi grid có thêm card.
+        Yield số lần đã bấm sau mỗi bước load thành công."""
+        max_clicks = BROWSER_MAX_LOAD_MORE_CLICKS  # Được thu hẹp theo số sản phẩm còn lại trên nút
+        click_count = 0
+        per_click = 0
+        
+        while click_count < max_clicks:
+            try:
+                see_more_button = WebDriverWait(driver, 3).until(
+                    EC.element_to_be_clickable((By.XPATH, LOAD_MORE_BUTTON_XPATH))
+                )
+            except TimeoutException:
+                # Không còn nút "Xem thêm"
+                self.logger.info("Không còn nút 'Xem thêm', đã load tất cả sản phẩm")
+                break
+            
+            try:
+                remaining = self._remaining_from_button(see_more_button.text)
+                card_count, has_grid = driver.execute_script(GRID_CARD_COUNT_JS)
+                # Scroll và click trong cùng một lệnh, không cần đợi animation
+                driver.execute_script("arguments[0].scrollIntoView({block: 'center'}); arguments[0].click();",
+                                      see_more_button)
+                click_count += 1
+                
+                # Đợi đến khi grid render thêm sản phẩm
+                WebDriverWait(driver, BROWSER_LOAD_MORE_TIMEOUT, poll_frequency=0.2).until(
+                    lambda d: d.execute_script(GRID_CARD_COUNT_JS)[0] > card_count
+                )
+            except TimeoutException:
+                self.logger.warning(f"Grid không có thêm sản phẩm sau {BROWSER_LOAD_MORE_TIMEOUT}s, dừng bấm 'Xem thêm'")
+                break
+            except Exception as e:
+                self.logger.warning(f"Lỗi khi click 'Xem thêm': {str(e)}")
+                break
+            
+            loaded = driver.execute_script(GRID_CARD_COUNT_JS)[0] - card_count
+            per_click = per_click or loaded
+            if remaining and per_click and has_grid:
+                # Số lần bấm còn cần thiết + 1 lần dự phòng
+                needed = math.ceil(max(remaining - loaded, 0) / per_click)
+                max_clicks = min(BROWSER_MAX_LOAD_MORE_CLICKS, click_count + needed + 1)
+            
+            self.logger.info(f"Đã click 'Xem thêm' lần {click_count} (+{loaded} sản phẩm)")
+            yield click_count
+        else:
+            self.logger.warning(f"Đã đạt giới hạn {max_clicks} lần bấm 'Xem thêm', danh sách có thể chưa đầy đủ")
+    
+    @staticmethod
+    def _remaining_from_button(text: str) -> int:
+        """Số sản phẩm còn lại ghi trên nút 'Xem thêm N sản phẩm' (0 nếu không có)"""
+        match = re.search(r'(\d[\d.,]*)', text or '')
+        return int(re.sub(r'[.,]', '', match.group(1))) if match else 0
+    
+    def is_product_url(self, url: str) -> bool:
+        """Kiểm tra xem URL có phải là URL sản phẩm không"""
+        # URL sản phẩm thường có format: /category/subcategory/product-name.html
+        return self.url_classifier.is_product_url(url)
+    
+    def crawl_product_detail(self, product_url: str) -> Dict[str, Any]:
+        """Crawl thông tin chi tiết một sản phẩm"""                                                                                                                                                                                                         
+        try:
+            response = make_request(product_url, session=self.session, cache=self.http_cache)
+            self._archive_page(product_url, response.content)
+            return self.parse_product_page(product_url, response.content)
+            
+        except Exception as e:
+            self._product_failed(product_url, e)
+            return None
+    
+    def _archive_page(self, product_url: str, html: bytes):
+        """Lưu HTML thô vào archive để có thể trích xuất lại mà không cần crawl"""
+        if self.archive is None:
+            return
+        try:
+            self.archive.write(product_url, html)
+        except Exception as e:
+            self.logger.warning("Không lưu được HTML vào archive %s: %s", product_url, e)
+    
+    def crawl_category(self, category_url: str, max_products: int = None, product_urls: List[str] = None):
+        """Crawl toàn bộ sản phẩm trong một danh mục (product_urls: danh sách đã lấy trước, nếu có)"""
         self.logger.info(f"Bắt đầu crawl danh mục: {category_url}")
         
         # Lưu thông tin category để dùng cho tên file
         if category_url not in self.current_categories:
             self.current_categories.append(category_url)
+        self.active_category = category_url
+        start = self._category_counters()
+        
+        if self.engine == 'pipeline':
+            # Tải trang chi tiết ngay khi listing tìm thấy URL, không đợi hết danh mục
+            urls = self._category_listing(category_url, product_urls, lazy=True, limit=max_products)
+            urls = self._pending_urls(itertools.islice(urls, max_products), category_url)
+            self.crawl_product_details_pipelined(urls, desc=f"Crawling {category_url}")
+            self._category_finished(category_url, start)
+            return
         
         # Lấy danh sách URL sản phẩm
-        product_urls = self.get_product_urls(category_url)
+        product_urls = self._category_listing(category_url, product_urls)
         
         if max_products:
             product_urls = product_urls[:max_products]
+        product_urls = list(self._pending_urls(product_urls, category_url))
+        
+        if self.engine == 'async':
+            self.crawl_product_details_async(product_urls, desc=f"Crawling {category_url}")
+        else:
+            # Crawl từng sản phẩm
+            for url in tqdm(product_urls, desc=f"Crawling {category_url}"):
+                product_data = self.crawl_product_detail(url)
+                if product_data:
+                    self._add_product(product_data)
+                
+                random_delay(*RANDOM_DELAY_RANGE)
+        
+        self._category_finished(category_url, start)
+    
+    def _category_listing(self, category_url: str, product_urls: List[str] = None, lazy: bool = False,
+                          limit: int = None):
+        """Danh sách URL của danh mục; dùng lại danh sách trong checkpoint nếu lần chạy trước đã lấy xong.
+        lazy=True trả về iterator để engine pipeline tải chi tiết ngay trong lúc listing (dừng sau `limit` URL)."""
+        if self.state and self.state.category_status(category_url) in (CATEGORY_LISTED, CATEGORY_DONE):
+            self.logger.info(f"Dùng danh sách sản phẩm đã lưu trong checkpoint cho {category_url}")
+            return self.state.category_urls(category_url)
+        
+        if product_urls is None:
+            product_urls = self.iter_product_urls(category_url) if lazy else self.get_product_urls(category_url)
+        if self.state is None:
+            return product_urls
+        
+        if lazy:
+            return self._record_listing(category_url, product_urls, limit)
+        # Listing rỗng thường là do lỗi (API/Selenium), để lần chạy tiếp lấy lại
+        if product_urls:
+            self.state.add_urls(category_url, product_urls)
+            self.state.mark_category(category_url, CATEGORY_LISTED)
+        return product_urls
+    
+    def _record_listing(self, category_url: str, product_urls, limit: int = None) -> Iterator[str]:
+        """Ghi từng URL vào checkpoint ngay khi listing tìm thấy. Khi đủ `limit` URL (--max-products), danh mục
+        được đánh dấu đã lấy danh sách trước khi trả URL cuối: bên gọi (islice) không lấy tiếp phần tử sau đó."""
+        found = 0
+        for url in product_urls:
+            self.state.add_urls(category_url, [url])
+            found += 1
+            if limit and found >= limit:
+                self.state.mark_category(category_url, CATEGORY_LISTED)
+                yield url
+                return
+            yield url
+        if found:
+            self.state.mark_category(category_url, CATEGORY_LISTED)
+    
+    def _pending_urls(self, product_urls, category_url: str = None) -> Iterator[str]:
+        """Các URL cần tải: bỏ sản phẩm đã thuộc danh mục khác (theo URL, hoặc SKU trên card listing), URL đã
+        crawl xong ở lần chạy trước (URL lỗi được thử lại, kể cả ở danh mục đã xong), và ở chế độ incremental
+        thì dùng lại bản ghi cũ của sản phẩm không đổi"""
+        for url in product_urls:
+            if self.dedup is not None and category_url and not self.dedup.claim(url, category_url):
+                with self._records_lock:
+                    self.duplicate_count += 1
+                continue
+            if self.state is not None and self.state.is_done(url, category_url or self.active_category):
+                continue
+            if self.dedup is not None and self._listed_duplicate(url):
+                continue
+            if self.snapshot is not None:
+                product_data = self.snapshot.unchanged_record(url, self.sitemap_lastmod.get(url),
+                                                              self.listing_cards.get(url))
+                if product_data is not None:
+                    self._add_product(product_data, carried=True)
+                    continue
+            yield url
+    
+    def _listed_duplicate(self, url: str) -> bool:
+        """SKU trên card của API listing đã thuộc sản phẩm khác (URL khác): bỏ qua không tải trang chi tiết"""
+        sku = (self.listing_cards.get(url) or {}).get('sku')
+        owner = self.dedup.register_sku(url, sku) if sku else None
+        if owner:
+            self.logger.debug("Bỏ URL trùng SKU %s trên listing: %s (gốc: %s)", sku, url, owner)
+            with self._records_lock:
+                self.duplicate_count += 1
+            self._mark_url(url, URL_DONE)
+        return owner is not None
+    
+    def _category_counters(self) -> Dict[str, int]:
+        """Giá trị hiện tại của các bộ đếm, để log số liệu riêng của từng danh mục"""
+        with self._records_lock:
+            return {'products': self.product_count, 'duplicates': self.duplicate_count, **self.incremental_stats}
+    
+    def _category_finished(self, category_url: str, start: Dict[str, int]):
+        # Chỉ đánh dấu xong khi đã có danh sách sản phẩm (listing lỗi thì lần chạy tiếp lấy lại)
+        if self.state and self.state.category_status(category_url) in (CATEGORY_LISTED, CATEGORY_DONE):
+            self.state.mark_category(category_url, CATEGORY_DONE)
+        if self.state:
+            self.state.flush()
+        if self.dedup is not None:
+            self.dedup.flush()
+        if self.snapshot is not None:
+            self.snapshot.flush()
+        if self.blob_store is not None:
+            self.blob_store.flush()
+        end = self._category_counters()
+        stats = {key: end[key] - start[key] for key in end}
+        self.logger.info(f"Hoàn thành crawl danh mục {category_url}: {stats['products']} sản phẩm mới")
+        if stats['duplicates']:
+            self.logger.info(f"Đã bỏ qua {stats['duplicates']} URL trùng với sản phẩm ở danh mục khác")
+        if self.snapshot is not None:
+            self.logger.info(f"Incremental: {stats['fetched']} sản phẩm tải lại ({stats['changed']} thay đổi), "
+                             f"{stats['carried']} sản phẩm không đổi lấy từ snapshot")
+    
+    def _add_product(self, product_data: Dict[str, Any], carried: bool = False):
+        """Ghi một bản ghi: ra file JSONL nếu đang stream, ngược lại giữ trong self.products.
+        carried=True: bản ghi lấy lại từ snapshot, không phải vừa tải."""
+        url = product_data.get('url')
+        if url in self.sitemap_lastmod:
+            product_data['lastmod'] = self.sitemap_lastmod[url]
+        
+        if self.blob_store is not None:
+            for field in LARGE_FIELDS:
+                value = product_data.get(field)
+                if value and isinstance(value, str) and not is_blob_ref(value):
+                    product_data[field] = self.blob_store.put(value)
+        
+        if self.dedup is not None:
+            owner = self.dedup.register_sku(url, product_data.get('sku'))
+            if owner:
+                # Cùng SKU với sản phẩm đã có (URL khác): chỉ gộp danh mục vào bản ghi gốc
+                self.logger.debug("Bỏ bản ghi trùng SKU %s: %s (gốc: %s)", product_data.get('sku'), url, owner)
+                with self._records_lock:
+                    self.duplicate_count += 1
+                self._mark_url(url, URL_DONE)
+                return
+            product_data['categories'] = self.dedup.categories(url)
+        
+        if self.image_downloader is not None:
+            for image_url in product_data.get('images') or []:
+                self.image_downloader.submit(image_url)
+        
+        changed = None
+        if self.snapshot is not None and not carried:
+            changed = self.snapshot.update(product_data, self.sitemap_lastmod.get(url),
+                                           self.listing_cards.get(url))
+        
+        # Engine pipeline ghi bản ghi cũ (thread listing) song song với bản ghi mới (thread ghi)
+        with self._records_lock:
+            if self.snapshot is not None:
+                if carried:
+                    self.incremental_stats['carried'] += 1
+                else:
+                    self.incremental_stats['fetched'] += 1
+                    self.incremental_stats['changed'] += int(changed)
+            if self.record_writer is not None:
+                self.record_writer.write(product_data)
+            else:
+                self.products.append(ProductRecord.from_dict(product_data))
+            self.product_count += 1
+        self._mark_url(url, URL_DONE)
+    
+    def _mark_url(self, url: str, status: str, error: str = None):
+        """Cập nhật trạng thái URL của danh mục đang crawl trong checkpoint (nếu có)"""
+        if self.state:
+            self.state.mark_url(url, status, error, self.active_category)
+    
+    def _product_failed(self, product_url: str, error: Exception):
+        """Ghi log và đánh dấu URL lỗi trong checkpoint để lần chạy tiếp thử lại"""
+        self.logger.error("Lỗi khi crawl sản phẩm %s: %s", product_url, error)
+        self._mark_url(product_url, URL_FAILED, str(error))
+    
+    def crawl_product_details_async(self, product_urls: List[str], desc: str = "Crawling"):
+        """Crawl song song các trang chi tiết bằng aiohttp; trang tải xong được parse/extract trong
+        process pool (không chặn event loop). Bản ghi được ghi theo thứ tự của product_urls như engine sync:
+        trang xong sớm chỉ chờ trong bộ đệm cho tới khi các trang trước nó xong."""
+        progress = tqdm(total=len(product_urls), desc=desc)
+        ordered = OrderedSink(lambda index, product_data: self._add_product(product_data))
         
-        # Crawl từng sản phẩm
-        for url in tqdm(product_urls, desc=f"Crawling {category_url}"):
-            product_data = self.crawl_product_detail(url)
-            if product_data:
-                self.products.append(product_data)
+        with ProcessPoolExecutor(max_workers=max(1, self.parse_workers), initializer=_init_reextract_worker,
+                                 initargs=(self.parser, self.json_first)) as executor:
+            def on_page(index: int, url: str, html: bytes):
+                # Chạy trong thread của fetch_pages, không phải trên event loop
+                self._archive_page(url, html)
+                product_data = executor.submit(_parse_page, url, html).result()
+                if product_data is None:
+                    self._mark_url(url, URL_FAILED, 'Lỗi khi trích xuất dữ liệu')
+                    ordered.skip(index)
+                else:
+                    ordered.put(index, product_data)
+                progress.update(1)
             
-            random_delay(*RANDOM_DELAY_RANGE)
+            def on_error(index: int, url: str, error: Exception):
+                self._product_failed(url, error)
+                ordered.skip(index)
+                progress.update(1)
+            
+            try:
+                # Mỗi process parse luôn có sẵn một trang chờ trong lúc thread khác ghi bản ghi
+                fetch_pages(product_urls, self.session.headers, self.concurrency,
+                            on_page, on_error,
+                            limit_per_host=HTTP_POOL_MAXSIZE,
+                            retries=MAX_RETRIES, timeout=REQUEST_TIMEOUT,
+                            delay_range=RANDOM_DELAY_RANGE, cache=self.http_cache,
+                            workers=max(1, self.parse_workers) * 2)
+            finally:
+                ordered.flush()  # Bị dừng giữa chừng: vẫn ghi các bản ghi đã xong
+                progress.close()
+    
+    def crawl_product_details_pipelined(self, product_urls: Iterator[str], desc: str = "Crawling"):
+        """Crawl trang chi tiết qua pipeline: thread tải trang → process parse/extract → một thread ghi.
+        Listing vẫn đang sinh URL trong lúc các bước sau chạy; bản ghi được ghi theo thứ tự listing."""
+        progress = tqdm(desc=desc, unit='sp')
         
-        self.logger.info(f"Hoàn thành crawl danh mục {category_url}: {len([p for p in self.products if category_url in p.get('url', '')])} sản phẩm mới")
+        def fetch(url: str):
+            try:
+                response = make_request(url, session=self.session, cache=self.http_cache)
+            except Exception as e:
+                self._product_failed(url, e)
+                progress.update(1)
+                return None
+            finally:
+                random_delay(*RANDOM_DELAY_RANGE)
+            self._archive_page(url, response.content)
+            return url, response.content
+        
+        def write(index: int, product_data: Dict[str, Any]):
+            self._add_product(product_data)
+            progress.update(1)
+        
+        with ProcessPoolExecutor(max_workers=max(1, self.parse_workers), initializer=_init_reextract_worker,
+                                 initargs=(self.parser, self.json_first)) as executor:
+            def parse(page):
+                product_data = executor.submit(_parse_page, *page).result()
+                if product_data is None:
+                    self._mark_url(page[0], URL_FAILED, 'Lỗi khi trích xuất dữ liệu')
+                    progress.update(1)
+                return product_data
+            
+            stages = [
+                Stage('fetch', fetch, self.concurrency, PIPELINE_QUEUE_SIZE),
+                Stage('parse', parse, self.parse_workers, PIPELINE_PARSE_QUEUE_SIZE),
+            ]
+            try:
+                run_stages(product_urls, stages, write, PIPELINE_WRITE_QUEUE_SIZE, ordered=True)
+            finally:
+                progress.close()
     
     def crawl_subcategories(self, main_category: str, subcategories: list, max_products_per_category: int = None):
         """Crawl tất cả subcategories của một main category"""
         self.logger.info(f"Bắt đầu crawl main category: {main_category}")
         
-        for subcategory in subcategories:
+        category_urls = [f"{main_category}/{subcategory}" for subcategory in subcategories]
+        if self.state:
+            self.state.add_categories(category_urls)
+        
+        # Engine pipeline tự chạy listing song song với bước tải chi tiết nên không lấy trước;
+        # danh mục đã có danh sách trong checkpoint cũng không cần lấy lại
+        to_prefetch = [category_url for category_url in category_urls
+                       if not self.state or self.state.category_status(category_url) not in (CATEGORY_LISTED, CATEGORY_DONE)]
+        listings = self.prefetch_product_urls(to_prefetch) if self.engine != 'pipeline' else {}
+        
+        for subcategory, category_url in zip(subcategories, category_urls):
             try:
-                category_url = f"{main_category}/{subcategory}"
-                self.crawl_category(category_url, max_products_per_category)
+                self.crawl_category(category_url, max_products_per_category,
+                                    product_urls=listings.get(category_url))
             except Exception as e:
                 self.logger.error(f"Lỗi khi crawl subcategory {subcategory}: {str(e)}")
                 continue
     
+    def prefetch_product_urls(self, category_urls: List[str]) -> Dict[str, List[str]]:
+        """Lấy danh sách sản phẩm của nhiều danh mục song song (mỗi luồng mượn một driver trong pool)"""
+        listings = {}
+        if len(category_urls) < 2:
+            return listings
+        
+        def fetch(category_url: str):
+            try:
+                return self.get_product_urls(category_url)
+            except Exception as e:
+                self.logger.error(f"Lỗi khi lấy danh sách sản phẩm {category_url}: {str(e)}")
+                return None
+        
+        with ThreadPoolExecutor(max_workers=self.browser_pool.size) as executor:
+            for category_url, product_urls in zip(category_urls, executor.map(fetch, category_urls)):
+                if product_urls is not None:
+                    listings[category_url] = product_urls
+        return listings
+    
+    def crawl_sitemap(self, sitemap_source: str = SITEMAP_URL, main_categories: List[str] = None,
+                      max_products: int = None):
+        """Crawl các sản phẩm tìm thấy trong sitemap (không cần trình duyệt để lấy danh sách)"""
+        main_categories = main_categories or CATEGORIES
+        # Tên "danh mục" dùng cho checkpoint và tên file output
+        label = f"sitemap/{main_categories[0]}" if len(main_categories) == 1 else "sitemap"
+        if self.state and self.state.category_status(label) in (CATEGORY_LISTED, CATEGORY_DONE):
+            # Chạy tiếp: danh sách URL và lastmod (tín hiệu của --incremental) lấy từ checkpoint, không đọc lại sitemap
+            self.sitemap_lastmod.update(self.state.lastmods())
+            product_urls = []
+        else:
+            product_urls = self.iter_product_urls_from_sitemap(sitemap_source, main_categories)
+            if self.engine != 'pipeline':
+                product_urls = list(product_urls)
+        self.crawl_category(label, max_products, product_urls=product_urls)
+    
     def crawl_vitamin_categories(self, max_products_per_category: int = None):
         """Crawl tất cả danh mục vitamin và khoáng chất"""
         from config.settings import VITAMIN_KHOANG_CHAT
@@ -975,8 +1407,40 @@ class LongChauCrawler:
                 self.logger.error(f"Lỗi khi crawl danh mục {category}: {str(e)}")
                 continue
     
+    def reextract_from_archive(self, archive_dir: str = HTML_ARCHIVE_DIR, max_workers: int = None):
+        """Trích xuất lại dữ liệu từ HTML đã lưu trong archive bằng process pool"""
+        if not os.path.isdir(archive_dir):
+            self.logger.error(f"Không tìm thấy archive: {archive_dir}")
+            return
+        
+        # Chỉ lấy bản tải mới nhất của mỗi URL
+        entries = list(HtmlArchive(archive_dir).latest_entries().values())
+        if not entries:
+            self.logger.warning(f"Archive {archive_dir} không có trang nào")
+            return
+        
+        if 'reextract' not in self.current_categories:
+            self.current_categories.append('reextract')
+        
+        max_workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(entries) // (max_workers * 4))
+        self.logger.info(f"Trích xuất lại {len(entries)} trang từ {archive_dir} với {max_workers} process")
+        
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_reextract_worker,
+                                 initargs=(self.parser, self.json_first)) as executor:
+            results = executor.map(_reextract_entry, [archive_dir] * len(entries), entries, chunksize=chunksize)
+            for product_data in tqdm(results, total=len(entries), desc="Re-extracting"):
+                if product_data:
+                    self._add_product(product_data)
+        
+        self.logger.info(f"Hoàn thành trích xuất lại: {self.product_count} sản phẩm")
+    
     def save_data(self, format_type: str = 'both'):
         """Lưu dữ liệu đã crawl"""
+        if self.record_writer is not None:
+            self.compact_stream(self.record_writer.path, format_type)
+            return
+        
         if not self.products:
             self.logger.warning("Không có dữ liệu để lưu")
             return
@@ -985,16 +1449,91 @@ class LongChauCrawler:
         
         # Tạo tên file dựa trên categories đã crawl
         category_name = self._generate_filename_from_categories()
+        json_file = f"data/longchau_products_{category_name}_{timestamp}.json" if format_type in ['json', 'both'] else None
+        csv_file = f"data/longchau_products_{category_name}_{timestamp}.csv" if format_type in ['csv', 'both'] else None
+        
+        self._wait_for_images()
+        # Chuyển từng bản ghi về dict khi ghi, không dựng lại toàn bộ danh sách dict
+        count = write_records((record.to_dict() for record in self.products), json_file, csv_file,
+                              self._export_record, self._export_fields())
+        for output_file in (json_file, csv_file):
+            if output_file:
+                self.logger.info(f"Đã lưu {count} sản phẩm vào {output_file}")
+    
+    def compact_stream(self, jsonl_file: str, format_type: str = 'both'):
+        """Gộp file JSONL (đang stream hoặc còn lại sau khi crawler bị dừng) thành file JSON/CSV"""
+        if self.record_writer is not None and self.record_writer.path == jsonl_file:
+            self.record_writer.close()
+        if not os.path.exists(jsonl_file):
+            self.logger.warning("Không có dữ liệu để lưu")
+            return
         
-        if format_type in ['json', 'both']:
-            json_file = f"data/longchau_products_{category_name}_{timestamp}.json"
-            save_to_json(self.products, json_file)
-            self.logger.info(f"Đã lưu {len(self.products)} sản phẩm vào {json_file}")
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        category_name = self._generate_filename_from_categories()
+        json_file = f"data/longchau_products_{category_name}_{timestamp}.json" if format_type in ['json', 'both'] else None
+        csv_file = f"data/longchau_products_{category_name}_{timestamp}.csv" if format_type in ['csv', 'both'] else None
         
-        if format_type in ['csv', 'both']:
-            csv_file = f"data/longchau_products_{category_name}_{timestamp}.csv"
-            save_to_csv(self.products, csv_file)
-            self.logger.info(f"Đã lưu {len(self.products)} sản phẩm vào {csv_file}")
+        self._wait_for_images()
+        count = compact_jsonl(jsonl_file, json_file, csv_file, self._export_record, self._export_fields(),
+                              unique_urls=self.dedup is not None)
+        if not count:
+            if json_file:
+                os.remove(json_file)
+            self.logger.warning("Không có dữ liệu để lưu")
+            return
+        for output_file in (json_file, csv_file):
+            if output_file:
+                self.logger.info(f"Đã lưu {count} sản phẩm vào {output_file}")
+    
+    def _export_fields(self) -> List[str]:
+        """Cột CSV theo thứ tự schema: bản ghi có thể thiếu trường (VD: lastmod, categories) nên header
+        không lấy theo bản ghi đầu tiên"""
+        fields = [field for field in PRODUCT_FIELDS
+                  if not (self.large_fields == 'exclude' and field in LARGE_FIELDS)]
+        if self.image_downloader is not None:
+            fields.append('image_files')
+        return fields
+    
+    def _export_record(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Chuẩn bị bản ghi để xuất file: cập nhật 'categories' với các danh mục tìm thấy sau khi bản ghi
+        đã được ghi, và xử lý trường văn bản lớn theo chế độ large_fields"""
+        if self.dedup is not None and product_data.get('url'):
+            # Chỉ mục trống (VD: chế độ compact) thì giữ nguyên danh mục đã ghi trong bản ghi
+            categories = self.dedup.categories(product_data['url'])
+            if categories:
+                product_data['categories'] = categories
+        
+        for field in LARGE_FIELDS:
+            if field not in product_data:
+                continue
+            if self.large_fields == 'exclude':
+                del product_data[field]
+            elif self.large_fields == 'inline' and is_blob_ref(product_data[field]):
+                # Bản ghi của lần chạy 'ref'/'exclude' (JSONL, snapshot): lấy lại văn bản từ blob store
+                text = self._inline_blob_store().get(product_data[field])
+                if text is None:
+                    self.logger.warning("Không tìm thấy %s của %s trong blob store", field, product_data.get('url'))
+                else:
+                    product_data[field] = text
+        
+        if self.image_downloader is not None:
+            # Trạng thái từng ảnh (url đã tải, done/failed/pending, file trong IMAGE_DIR); [] khi không có ảnh
+            product_data['image_files'] = self.image_downloader.statuses(product_data.get('images') or [])
+        return product_data
+    
+    def _wait_for_images(self):
+        """Đợi các ảnh còn đang tải trước khi xuất file để trạng thái ảnh trong bản ghi là cuối cùng"""
+        if self.image_downloader is None:
+            return
+        self.image_downloader.wait()
+        stats = self.image_downloader.stats
+        self.logger.info(f"Ảnh sản phẩm: {stats['downloaded']} ảnh mới, {stats['reused']} ảnh trùng nội dung, "
+                         f"{stats['failed']} ảnh lỗi ({IMAGE_DIR})")
+    
+    def _inline_blob_store(self) -> BlobStore:
+        if self.blob_store is None:
+            self.blob_store = BlobStore(BLOB_STORE_PATH)
+        return self.blob_store
     
     def _generate_filename_from_categories(self) -> str:
         """Tạo tên file từ danh sách categories đã crawl"""
@@ -1031,6 +1570,35 @@ class LongChauCrawler:
         """Reset danh sách categories để bắt đầu crawl mới"""
         self.current_categories = []
         self.products = []
+        # Khi chạy tiếp từ checkpoint, các sản phẩm đã crawl vẫn nằm trong file JSONL của lần chạy
+        self.product_count = self.state.counts().get(URL_DONE, 0) if self.state else 0
+
+_worker_parser = None
+
+def _init_reextract_worker(parser: str = HTML_PARSER, json_first: bool = JSON_FIRST_EXTRACTION):
+    """Khởi tạo parser riêng cho mỗi process con (chế độ reextract và bước parse của engine async/pipeline)"""
+    global _worker_parser
+    _worker_parser = ProductPageParser(parser, json_first)
+
+def _parse_page(url: str, html: bytes) -> Dict[str, Any]:
+    """Chạy các hàm extract_* trên HTML đã tải (chạy trong process con)"""
+    try:
+        return _worker_parser.parse_product_page(url, html)
+    except Exception as e:
+        _worker_parser.logger.error("Lỗi khi crawl sản phẩm %s: %s", url, e)
+        return None
+
+def _reextract_entry(archive_dir: str, entry: Dict) -> Dict[str, Any]:
+    """Đọc HTML từ archive và chạy các hàm extract_* (chạy trong process con)"""
+    try:
+        html = read_archived_body(archive_dir, entry)
+        product_data = _worker_parser.parse_product_page(entry['url'], html)
+        # Giữ thời điểm tải trang gốc thay vì thời điểm trích xuất lại
+        product_data['crawled_at'] = entry['fetched_at']
+        return product_data
+    except Exception as e:
+        _worker_parser.logger.error("Lỗi khi trích xuất lại %s: %s", entry.get('url'), e)
+        return None
 
 if __name__ == "__main__":
     crawler = LongChauCrawler()
@@ -0,0 +1,151 @@
+"""
+Pipeline nhiều bước (listing → tải trang → parse/extract → ghi) nối với nhau bằng các hàng đợi có giới hạn
+"""
+import queue
+import logging
+import threading
+from typing import Any, Callable, Iterable, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()  # Báo cho thread của bước sau biết bước trước đã hết dữ liệu
+_SKIPPED = object()  # Phần tử bị bỏ qua (lỗi hoặc kết quả None), chỉ dùng để giữ thứ tự
+
+
+class OrderedSink:
+    """Gọi `sink(index, result)` theo đúng thứ tự index (0, 1, 2...) dù kết quả đến theo thứ tự hoàn thành.
+
+    Kết quả đến sớm được giữ trong bộ đệm nhỏ cho tới khi các index trước nó xong; index không có kết quả
+    (lỗi) phải được báo bằng skip() để không chặn các kết quả sau. An toàn khi gọi từ nhiều thread.
+    """
+
+    def __init__(self, sink: Callable[[int, Any], None], start: int = 0):
+        self.sink = sink
+        self.next_index = start
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def put(self, index: int, result: Any):
+        self._release(index, result)
+
+    def skip(self, index: int):
+        self._release(index, _SKIPPED)
+
+    def _release(self, index: int, result: Any):
+        with self.lock:
+            if index < self.next_index:
+                return
+            self.pending[index] = result
+            while self.next_index in self.pending:
+                index, result = self.next_index, self.pending.pop(self.next_index)
+                self.next_index += 1
+                if result is not _SKIPPED:
+                    self.sink(index, result)
+
+    def flush(self):
+        """Gọi sink cho các kết quả còn trong bộ đệm (khi bị dừng giữa chừng, một số index không bao giờ tới)"""
+        with self.lock:
+            for index in sorted(self.pending):
+                result = self.pending.pop(index)
+                if result is not _SKIPPED:
+                    self.sink(index, result)
+
+
+class Stage(NamedTuple):
+    """Một bước của pipeline: `func(item)` trả về kết quả cho bước sau, hoặc None để bỏ qua phần tử"""
+    name: str
+    func: Callable[[Any], Any]
+    workers: int
+    queue_size: int  # Kích thước hàng đợi đầu vào của bước này
+
+
+def run_stages(items: Iterable[Any], stages: List[Stage],
+               sink: Callable[[int, Any], None], sink_queue_size: int, ordered: bool = False) -> int:
+    """Chạy pipeline: thread hiện tại duyệt `items` (producer), mỗi bước có `workers` thread riêng,
+    một thread duy nhất gọi `sink(index, result)` theo thứ tự hoàn thành, hoặc theo thứ tự producer
+    nếu ordered=True (qua OrderedSink).
+
+    Mọi hàng đợi đều có giới hạn nên bước chậm (parse, ghi đĩa) chặn bước trước nó,
+    cuối cùng chặn cả producer, thay vì để bộ nhớ tăng không giới hạn.
+    `index` là thứ tự phần tử do producer sinh ra. Trả về số phần tử đã sinh.
+    """
+    queues = [queue.Queue(maxsize=max(1, stage.queue_size)) for stage in stages]
+    queues.append(queue.Queue(maxsize=max(1, sink_queue_size)))
+    stop = threading.Event()
+
+    def stage_worker(stage: Stage, inbox: queue.Queue, outbox: queue.Queue):
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                return
+            if stop.is_set():
+                continue  # Pipeline bị dừng: chỉ rút cạn hàng đợi
+            index, item = job
+            if item is _SKIPPED:
+                outbox.put(job)
+                continue
+            try:
+                result = stage.func(item)
+            except Exception as e:
+                logger.error("Lỗi ở bước %s khi xử lý %s: %s", stage.name, item, e)
+                result = None
+            if result is not None:
+                outbox.put((index, result))
+            elif ordered:
+                outbox.put((index, _SKIPPED))  # Để sink biết index này sẽ không có kết quả
+
+    def safe_sink(index: int, result: Any):
+        try:
+            sink(index, result)
+        except Exception as e:
+            logger.error("Lỗi khi ghi kết quả %s: %s", index, e)
+
+    def sink_worker(inbox: queue.Queue):
+        reorder = OrderedSink(safe_sink) if ordered else None
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                # Khi bị dừng, các index chưa xử lý không bao giờ tới: kết quả đã ghi dừng ở chỗ trống đầu tiên
+                # (để giữ thứ tự), phần còn trong bộ đệm bị bỏ và được tải lại ở lần chạy tiếp
+                if reorder is not None and not stop.is_set():
+                    reorder.flush()
+                return
+            # Kết quả đã xử lý xong vẫn được ghi kể cả khi pipeline bị dừng
+            if reorder is None:
+                safe_sink(*job)
+            elif job[1] is _SKIPPED:
+                reorder.skip(job[0])
+            else:
+                reorder.put(*job)
+
+    stage_threads = []
+    for position, stage in enumerate(stages):
+        threads = [threading.Thread(target=stage_worker, args=(stage, queues[position], queues[position + 1]),
+                                    name=f"pipeline-{stage.name}-{i}", daemon=True)
+                   for i in range(max(1, stage.workers))]
+        stage_threads.append(threads)
+    sink_thread = threading.Thread(target=sink_worker, args=(queues[-1],), name="pipeline-sink", daemon=True)
+
+    for threads in stage_threads:
+        for thread in threads:
+            thread.start()
+    sink_thread.start()
+
+    produced = 0
+    try:
+        for item in items:
+            queues[0].put((produced, item))
+            produced += 1
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        # Đóng từng bước theo thứ tự: chỉ gửi tín hiệu kết thúc cho bước sau khi bước trước đã xong hẳn
+        for position, threads in enumerate(stage_threads):
+            for _ in threads:
+                queues[position].put(_DONE)
+            for thread in threads:
+                thread.join()
+        queues[-1].put(_DONE)
+        sink_thread.join()
+    return produced
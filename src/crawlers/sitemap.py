@@ -0,0 +1,106 @@
+"""
+Đọc sitemap.xml (và các sitemap con, có thể nén gzip) theo kiểu streaming để tìm URL sản phẩm không cần trình duyệt
+"""
+import io
+import os
+import gzip
+import logging
+from contextlib import contextmanager
+from typing import BinaryIO, Iterator, Optional, Tuple
+from urllib.parse import urlparse
+from xml.etree.ElementTree import iterparse
+
+import requests
+
+from config.settings import REQUEST_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def _local_name(tag: str) -> str:
+    """Bỏ namespace: '{http://www.sitemaps.org/schemas/sitemap/0.9}url' -> 'url'"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _is_remote(source: str) -> bool:
+    return urlparse(source).scheme in ('http', 'https')
+
+
+@contextmanager
+def _open_source(source: str, session: requests.Session = None) -> Iterator[BinaryIO]:
+    """Mở sitemap từ URL hoặc file local dưới dạng stream, tự giải nén nếu là gzip"""
+    if _is_remote(source):
+        response = (session or requests).get(source, stream=True, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        response.raw.decode_content = True  # Giải nén Content-Encoding: gzip
+        raw = io.BufferedReader(response.raw)
+    else:
+        response = None
+        raw = open(source, 'rb')
+
+    try:
+        # File .xml.gz được phục vụ như dữ liệu nhị phân, nhận diện bằng magic bytes
+        stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == _GZIP_MAGIC else raw
+        yield stream
+    finally:
+        raw.close()
+        if response is not None:
+            response.close()
+
+
+def _resolve_child(child: str, parent: str) -> str:
+    """Vị trí sitemap con; khi sitemap cha là file local thì ưu tiên file cùng tên bên cạnh nó"""
+    if _is_remote(parent):
+        return child
+    directory = os.path.dirname(parent)
+    if not _is_remote(child):
+        return os.path.join(directory, child)
+    local_copy = os.path.join(directory, os.path.basename(urlparse(child).path))
+    return local_copy if os.path.exists(local_copy) else child
+
+
+def iter_sitemap(source: str, session: requests.Session = None,
+                 _depth: int = 0) -> Iterator[Tuple[str, Optional[str]]]:
+    """Duyệt các cặp (loc, lastmod) của sitemap; sitemap index thì lần lượt duyệt các sitemap con.
+    Chỉ giữ một phần tử <url> trong bộ nhớ tại một thời điểm."""
+    if _depth > 3:
+        logger.warning(f"Sitemap lồng nhau quá sâu, bỏ qua: {source}")
+        return
+
+    children = []
+    with _open_source(source, session) as stream:
+        root = None
+        loc = lastmod = None
+        depth = 0  # 1: <urlset>/<sitemapindex>, 2: <url>/<sitemap>, 3: con trực tiếp (<loc>, <lastmod>)
+        for event, element in iterparse(stream, events=('start', 'end')):
+            if event == 'start':
+                depth += 1
+                if root is None:
+                    root = element
+                continue
+            depth -= 1
+            name = _local_name(element.tag)
+            if depth == 2:
+                # Chỉ lấy con trực tiếp của <url>: <image:loc> của sitemap ảnh (trong <image:image>)
+                # và các phần tử mở rộng lồng sâu hơn không được ghi đè URL của trang
+                if name == 'loc':
+                    loc = (element.text or '').strip()
+                elif name == 'lastmod':
+                    lastmod = (element.text or '').strip() or None
+            elif depth == 1 and name in ('url', 'sitemap'):
+                if loc:
+                    if name == 'url':
+                        yield loc, lastmod
+                    else:
+                        children.append(loc)
+                loc = lastmod = None
+                # Bỏ các phần tử đã xử lý khỏi cây để bộ nhớ không tăng theo kích thước sitemap
+                root.clear()
+
+    for child in children:
+        try:
+            yield from iter_sitemap(_resolve_child(child, source), session, _depth + 1)
+        except Exception as e:
+            logger.error(f"Lỗi khi đọc sitemap con {child}: {str(e)}")
@@ -0,0 +1,63 @@
+"""
+Commit SQLite theo lô cho các store được ghi theo từng sản phẩm (checkpoint, chỉ mục chống trùng, snapshot, blob store)
+"""
+import os
+import time
+import sqlite3
+from typing import Callable
+
+from config.settings import CHECKPOINT_COMMIT_EVERY, CHECKPOINT_COMMIT_INTERVAL
+
+
+class BatchedCommits:
+    """Thay vì commit (fsync) sau mỗi lần ghi, commit sau `commit_every` lần ghi hoặc `commit_interval` giây,
+    và khi flush()/close(). Bị dừng đột ngột thì chỉ mất các thay đổi của lô cuối.
+
+    Lớp con gọi `_connect()` và `_init_batching()` trong __init__, có `self.lock`, và gọi `_commit()` sau
+    mỗi lần ghi khi đang giữ lock. `before_commit` (nếu có) được gọi trước mỗi commit.
+    """
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        """Mở database; WAL + synchronous=NORMAL: commit không phải fsync từng lần mà vẫn an toàn khi process bị dừng"""
+        directory = os.path.dirname(path) if path != ':memory:' else ''
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+        return db
+
+    def _init_batching(self, commit_every: int = CHECKPOINT_COMMIT_EVERY,
+                       commit_interval: float = CHECKPOINT_COMMIT_INTERVAL,
+                       before_commit: Callable[[], None] = None):
+        self.commit_every = max(1, commit_every)
+        self.commit_interval = commit_interval
+        self.before_commit = before_commit
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def _commit(self, force: bool = False):
+        """Ghi nhận một thay đổi (gọi khi đang giữ lock); commit khi lô đã đủ lớn hoặc đủ lâu, hoặc khi force"""
+        self._uncommitted += 1
+        if not force and (self._uncommitted < self.commit_every
+                          and time.monotonic() - self._last_commit < self.commit_interval):
+            return
+        if self.before_commit is not None:
+            self.before_commit()
+        self.db.commit()
+        self._uncommitted = 0
+        self._last_commit = time.monotonic()
+
+    def flush(self):
+        """Commit các thay đổi còn trong lô"""
+        with self.lock:
+            if self._uncommitted:
+                self._commit(force=True)
+
+    def close(self):
+        with self.lock:
+            if self._uncommitted:
+                self._commit(force=True)
+            self.db.close()
@@ -0,0 +1,59 @@
+"""
+Kho nén cho các trường văn bản lớn (content, description, ingredients): mỗi nội dung được lưu một lần
+theo hash SHA-256, bản ghi sản phẩm chỉ giữ tham chiếu 'sha256:<hash>'
+"""
+import re
+import zlib
+import hashlib
+import threading
+from typing import Optional
+
+from config.settings import CHECKPOINT_COMMIT_EVERY, CHECKPOINT_COMMIT_INTERVAL
+from src.utils.batched_commit import BatchedCommits
+
+_REF_PATTERN = re.compile(r'sha256:[0-9a-f]{64}')
+
+
+def is_blob_ref(value) -> bool:
+    """Giá trị của trường là tham chiếu tới blob store (không phải văn bản)"""
+    return isinstance(value, str) and _REF_PATTERN.fullmatch(value) is not None
+
+
+class BlobStore(BatchedCommits):
+    """Blob nén zlib trong SQLite, khóa là SHA-256 của nội dung nên nội dung trùng chỉ lưu một lần.
+
+    Blob mới được commit theo lô như CrawlState; crawler flush blob store trước khi commit checkpoint
+    để bản ghi đã xong không tham chiếu tới blob chưa nằm trên đĩa."""
+
+    def __init__(self, path: str, compression_level: int = 6, commit_every: int = CHECKPOINT_COMMIT_EVERY,
+                 commit_interval: float = CHECKPOINT_COMMIT_INTERVAL):
+        self.path = path
+        self.compression_level = compression_level
+        self.lock = threading.Lock()
+        self._init_batching(commit_every, commit_interval)
+        self.db = self._connect(path)
+        self.db.execute('CREATE TABLE IF NOT EXISTS blobs (hash TEXT PRIMARY KEY, size INTEGER, data BLOB)')
+        self.db.commit()
+
+    def put(self, text: str) -> str:
+        """Lưu văn bản (nếu chưa có) và trả về tham chiếu"""
+        raw = text.encode('utf-8')
+        digest = hashlib.sha256(raw).hexdigest()
+        with self.lock:
+            exists = self.db.execute('SELECT 1 FROM blobs WHERE hash = ?', (digest,)).fetchone()
+            if not exists:
+                self.db.execute('INSERT INTO blobs (hash, size, data) VALUES (?, ?, ?)',
+                                (digest, len(raw), zlib.compress(raw, self.compression_level)))
+                self._commit()
+        return f"sha256:{digest}"
+
+    def get(self, ref: str) -> Optional[str]:
+        """Văn bản của tham chiếu, None nếu không có trong kho"""
+        with self.lock:
+            row = self.db.execute('SELECT data FROM blobs WHERE hash = ?', (ref.split(':', 1)[-1],)).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+
+    def __contains__(self, ref: str) -> bool:
+        with self.lock:
+            return self.db.execute('SELECT 1 FROM blobs WHERE hash = ?',
+                                   (ref.split(':', 1)[-1],)).fetchone() is not None
@@ -0,0 +1,166 @@
+"""
+Trạng thái của một lần crawl (danh mục, URL đã tìm thấy / đã xong / lỗi) lưu trong SQLite để có thể chạy tiếp
+"""
+import json
+import time
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config.settings import CHECKPOINT_COMMIT_EVERY, CHECKPOINT_COMMIT_INTERVAL
+from src.utils.batched_commit import BatchedCommits
+
+# Trạng thái danh mục: chưa lấy xong danh sách → đã có đủ danh sách URL → đã crawl xong
+CATEGORY_PENDING = 'pending'
+CATEGORY_LISTED = 'listed'
+CATEGORY_DONE = 'done'
+
+# Trạng thái URL sản phẩm
+URL_DISCOVERED = 'discovered'
+URL_DONE = 'done'
+URL_FAILED = 'failed'
+
+
+class CrawlState(BatchedCommits):
+    """Checkpoint của một lần chạy.
+
+    Trạng thái danh mục và meta được commit ngay; URL (thay đổi theo từng sản phẩm) được commit theo lô,
+    sau mỗi `commit_every` thay đổi hoặc `commit_interval` giây, và khi flush()/close(). Bị dừng đột ngột
+    thì chỉ mất trạng thái của lô cuối: các URL đó được tải lại khi chạy tiếp (bản ghi trùng trong file
+    JSONL được loại khi gộp). `before_commit` được gọi trước mỗi commit, VD: flush file JSONL để checkpoint
+    không bao giờ ghi nhận URL xong trước khi bản ghi của nó nằm trên đĩa.
+
+    Trạng thái URL được lưu theo (danh mục, URL): khi tắt chống trùng, sản phẩm đã xong ở danh mục A
+    vẫn được tải ở danh mục B. URL không thuộc danh mục nào dùng danh mục ''.
+    """
+
+    def __init__(self, path: str, commit_every: int = CHECKPOINT_COMMIT_EVERY,
+                 commit_interval: float = CHECKPOINT_COMMIT_INTERVAL, before_commit: Callable[[], None] = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self._init_batching(commit_every, commit_interval, before_commit)
+        self._next_position = {}  # Danh mục -> vị trí của URL tiếp theo (tránh COUNT(*) ở mỗi lần add_urls)
+        self.db = self._connect(path)
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);'
+            'CREATE TABLE IF NOT EXISTS categories ('
+            'category_url TEXT PRIMARY KEY, position INTEGER, status TEXT, updated_at REAL);'
+            'CREATE TABLE IF NOT EXISTS urls ('
+            "category_url TEXT NOT NULL DEFAULT '', url TEXT NOT NULL, position INTEGER, status TEXT, "
+            'error TEXT, updated_at REAL, PRIMARY KEY (category_url, url));'
+            'CREATE TABLE IF NOT EXISTS lastmods (url TEXT PRIMARY KEY, lastmod TEXT);'
+        )
+        self._migrate_urls()
+        self.db.execute('CREATE INDEX IF NOT EXISTS urls_by_category ON urls (category_url, position)')
+        self.db.commit()
+
+    def _migrate_urls(self):
+        """Checkpoint cũ lưu URL với khóa chỉ là URL: chuyển sang khóa (danh mục, URL)"""
+        primary_key = [row[1] for row in sorted(self.db.execute('PRAGMA table_info(urls)'), key=lambda row: row[5])
+                       if row[5]]
+        if primary_key != ['url']:
+            return
+        self.db.executescript(
+            'DROP INDEX IF EXISTS urls_by_category;'
+            'ALTER TABLE urls RENAME TO urls_old;'
+            'CREATE TABLE urls ('
+            "category_url TEXT NOT NULL DEFAULT '', url TEXT NOT NULL, position INTEGER, status TEXT, "
+            'error TEXT, updated_at REAL, PRIMARY KEY (category_url, url));'
+            "INSERT INTO urls SELECT COALESCE(category_url, ''), url, position, status, error, updated_at FROM urls_old;"
+            'DROP TABLE urls_old;'
+        )
+
+    def set_meta(self, key: str, value):
+        """Lưu một giá trị (dạng JSON) của lần chạy, VD: tham số dòng lệnh"""
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                            (key, json.dumps(value, ensure_ascii=False)))
+            self._commit(force=True)
+
+    def get_meta(self, key: str, default=None):
+        with self.lock:
+            row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def add_categories(self, category_urls: Iterable[str]):
+        """Ghi nhận frontier danh mục (giữ nguyên trạng thái của danh mục đã có)"""
+        with self.lock:
+            start = self.db.execute('SELECT COUNT(*) FROM categories').fetchone()[0]
+            now = time.time()
+            self.db.executemany(
+                'INSERT OR IGNORE INTO categories (category_url, position, status, updated_at) VALUES (?, ?, ?, ?)',
+                [(url, start + i, CATEGORY_PENDING, now) for i, url in enumerate(category_urls)]
+            )
+            self._commit(force=True)
+
+    def category_status(self, category_url: str) -> str:
+        with self.lock:
+            row = self.db.execute('SELECT status FROM categories WHERE category_url = ?',
+                                  (category_url,)).fetchone()
+        return row[0] if row else CATEGORY_PENDING
+
+    def mark_category(self, category_url: str, status: str):
+        self.add_categories([category_url])
+        with self.lock:
+            self.db.execute('UPDATE categories SET status = ?, updated_at = ? WHERE category_url = ?',
+                            (status, time.time(), category_url))
+            self._commit(force=True)
+
+    def add_urls(self, category_url: str, urls: Iterable[str]):
+        """Ghi nhận URL sản phẩm tìm thấy trong danh mục, theo thứ tự listing"""
+        with self.lock:
+            start = self._next_position.get(category_url)
+            if start is None:
+                start = self.db.execute('SELECT COALESCE(MAX(position) + 1, 0) FROM urls WHERE category_url = ?',
+                                        (category_url,)).fetchone()[0]
+            now = time.time()
+            rows = [(category_url, url, start + i, URL_DISCOVERED, now) for i, url in enumerate(urls)]
+            self.db.executemany(
+                'INSERT OR IGNORE INTO urls (category_url, url, position, status, updated_at) VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._next_position[category_url] = start + len(rows)
+            self._commit()
+
+    def category_urls(self, category_url: str) -> List[str]:
+        """Các URL đã tìm thấy của danh mục, theo thứ tự listing"""
+        with self.lock:
+            rows = self.db.execute('SELECT url FROM urls WHERE category_url = ? ORDER BY position',
+                                   (category_url,)).fetchall()
+        return [row[0] for row in rows]
+
+    def url_status(self, url: str, category_url: str = '') -> Optional[str]:
+        with self.lock:
+            row = self.db.execute('SELECT status FROM urls WHERE category_url = ? AND url = ?',
+                                  (category_url or '', url)).fetchone()
+        return row[0] if row else None
+
+    def is_done(self, url: str, category_url: str = '') -> bool:
+        return self.url_status(url, category_url) == URL_DONE
+
+    def mark_url(self, url: str, status: str, error: str = None, category_url: str = ''):
+        """Cập nhật trạng thái URL trong danh mục (thêm mới nếu URL không đến từ listing đã ghi nhận)"""
+        with self.lock:
+            now = time.time()
+            self.db.execute(
+                'INSERT INTO urls (category_url, url, status, error, updated_at) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(category_url, url) DO UPDATE SET status = excluded.status, error = excluded.error, '
+                'updated_at = excluded.updated_at',
+                (category_url or '', url, status, error, now)
+            )
+            self._commit()
+
+    def set_lastmod(self, url: str, lastmod: Optional[str]):
+        """Lưu lastmod trong sitemap của URL (giữ giá trị đầu tiên): chạy tiếp không phải đọc lại sitemap"""
+        with self.lock:
+            self.db.execute('INSERT OR IGNORE INTO lastmods (url, lastmod) VALUES (?, ?)', (url, lastmod))
+            self._commit()
+
+    def lastmods(self) -> Dict[str, Optional[str]]:
+        with self.lock:
+            return dict(self.db.execute('SELECT url, lastmod FROM lastmods'))
+
+    def counts(self) -> Dict[str, int]:
+        """Số URL theo trạng thái"""
+        with self.lock:
+            rows = self.db.execute('SELECT status, COUNT(*) FROM urls GROUP BY status').fetchall()
+        return dict(rows)
@@ -0,0 +1,144 @@
+"""
+Chỉ mục chống trùng sản phẩm cho cả lần chạy (theo URL chuẩn hóa và SKU): mỗi sản phẩm chỉ được tải một lần
+và được gắn với tất cả danh mục có chứa nó
+"""
+import math
+import hashlib
+import threading
+from typing import List, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+from config.settings import BASE_URL, CHECKPOINT_COMMIT_EVERY, CHECKPOINT_COMMIT_INTERVAL
+from src.utils.batched_commit import BatchedCommits
+
+_DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+
+def canonicalize_url(url: str) -> str:
+    """Dạng chuẩn của URL sản phẩm: scheme/host chữ thường, bỏ 'www.', port mặc định,
+    query, fragment và dấu '/' thừa"""
+    parts = urlsplit(urljoin(BASE_URL + '/', url.strip()))
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    netloc = host
+    if parts.port and str(parts.port) != _DEFAULT_PORTS.get(scheme):
+        netloc = f"{host}:{parts.port}"
+    path = '/'.join(segment for segment in parts.path.split('/') if segment)
+    return urlunsplit((scheme, netloc, '/' + path, '', ''))
+
+
+class BloomFilter:
+    """Bloom filter thuần Python trên bytearray: không bao giờ báo sai 'chưa có', báo sai 'đã có'
+    với xác suất ~error_rate khi chứa tối đa capacity phần tử"""
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        # Double hashing: k vị trí từ hai giá trị hash 64 bit
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+
+class DedupIndex(BatchedCommits):
+    """URL chuẩn hóa → danh mục đầu tiên tìm thấy (danh mục sẽ tải sản phẩm), SKU,
+    và các danh mục khác có chứa sản phẩm. Lưu trong SQLite (':memory:' nếu không cần giữ lại).
+
+    Giống CrawlState, thay đổi được commit theo lô (mỗi `commit_every` lần ghi hoặc `commit_interval` giây,
+    và khi flush()/close()); CrawlState gọi flush() trước khi commit checkpoint."""
+
+    def __init__(self, path: str = ':memory:', bloom_capacity: int = 0, bloom_error_rate: float = 0.001,
+                 commit_every: int = CHECKPOINT_COMMIT_EVERY, commit_interval: float = CHECKPOINT_COMMIT_INTERVAL):
+        self.path = path
+        self.lock = threading.Lock()
+        self._init_batching(commit_every, commit_interval)
+        self.db = self._connect(path)
+        self.db.executescript(
+            # owner: URL chuẩn của sản phẩm gốc khi URL này là bản trùng (cùng SKU)
+            'CREATE TABLE IF NOT EXISTS products ('
+            'key TEXT PRIMARY KEY, first_category TEXT, sku TEXT, owner TEXT);'
+            'CREATE INDEX IF NOT EXISTS products_by_sku ON products (sku);'
+            'CREATE TABLE IF NOT EXISTS product_categories ('
+            'key TEXT, category_url TEXT, PRIMARY KEY (key, category_url));'
+        )
+        self.db.commit()
+
+        # Bloom filter phía trước SQLite: URL chắc chắn chưa gặp được thêm luôn, không cần tra cứu.
+        # Chỉ bớt truy vấn, không bớt bộ nhớ: bit array nằm thêm trong RAM, chỉ mục vẫn ở SQLite
+        self.bloom = None
+        if bloom_capacity:
+            self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+            for (key,) in self.db.execute('SELECT key FROM products'):
+                self.bloom.add(key)
+
+    def claim(self, url: str, category_url: str) -> bool:
+        """Ghi nhận sản phẩm thuộc danh mục; True nếu danh mục này phải tải sản phẩm
+        (gặp lần đầu, hoặc đã gặp trong chính danh mục này ở lần chạy trước)"""
+        key = canonicalize_url(url)
+        with self.lock:
+            row = None
+            if self.bloom is None or key in self.bloom:
+                row = self.db.execute('SELECT first_category, owner FROM products WHERE key = ?',
+                                      (key,)).fetchone()
+            if row is None:
+                self.db.execute('INSERT INTO products (key, first_category) VALUES (?, ?)', (key, category_url))
+                if self.bloom is not None:
+                    self.bloom.add(key)
+                first_category, owner = category_url, None
+            else:
+                first_category, owner = row
+                if first_category is None and owner is None:
+                    # Đã gặp ngoài danh mục (VD: chỉ qua register_sku), danh mục này nhận tải
+                    self.db.execute('UPDATE products SET first_category = ? WHERE key = ?', (category_url, key))
+                    first_category = category_url
+            self.db.execute('INSERT OR IGNORE INTO product_categories (key, category_url) VALUES (?, ?)',
+                            (owner or key, category_url))
+            self._commit()
+        return owner is None and first_category == category_url
+
+    def register_sku(self, url: str, sku: str) -> Optional[str]:
+        """Gắn SKU cho sản phẩm (từ card listing hoặc trang vừa tải). Nếu SKU đã thuộc một URL khác, gộp danh mục của URL này vào
+        sản phẩm gốc và trả về URL chuẩn của sản phẩm gốc (bản ghi này là bản trùng); ngược lại None"""
+        key = canonicalize_url(url)
+        with self.lock:
+            self.db.execute('INSERT OR IGNORE INTO products (key) VALUES (?)', (key,))
+            if self.bloom is not None:
+                self.bloom.add(key)
+            owner = None
+            if sku:
+                row = self.db.execute('SELECT key FROM products WHERE sku = ? AND key != ? AND owner IS NULL',
+                                      (sku, key)).fetchone()
+                owner = row[0] if row else None
+            if owner:
+                self.db.execute('INSERT OR IGNORE INTO product_categories (key, category_url) '
+                                'SELECT ?, category_url FROM product_categories WHERE key = ?', (owner, key))
+                self.db.execute('DELETE FROM product_categories WHERE key = ?', (key,))
+                self.db.execute('UPDATE products SET sku = ?, owner = ? WHERE key = ?', (sku, owner, key))
+            elif sku:
+                self.db.execute('UPDATE products SET sku = ? WHERE key = ?', (sku, key))
+            self._commit()
+        return owner
+
+    def categories(self, url: str) -> List[str]:
+        """Các danh mục có chứa sản phẩm (kể cả qua URL trùng), theo thứ tự tìm thấy"""
+        key = canonicalize_url(url)
+        with self.lock:
+            row = self.db.execute('SELECT owner FROM products WHERE key = ?', (key,)).fetchone()
+            if row and row[0]:
+                key = row[0]
+            rows = self.db.execute('SELECT category_url FROM product_categories WHERE key = ? ORDER BY rowid',
+                                   (key,)).fetchall()
+        return [row[0] for row in rows]
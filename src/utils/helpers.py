@@ -1,33 +1,118 @@
 """
 Các hàm tiện ích cho crawler
 """
+import copy
 import time
+import queue
+import atexit
 import random
 import logging
 import os
 import json
 import csv
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from typing import Dict, List, Any
 import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from fake_useragent import UserAgent
 
-def setup_logging(log_file: str = None) -> logging.Logger:
-    """Thiết lập logging"""
-    if not log_file:
-        log_file = f"logs/crawler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+from config.settings import (HTTP_POOL_CONNECTIONS, HTTP_POOL_MAXSIZE,
+                             HTTP_POOL_RETRIES, HTTP_RETRY_STATUSES, REQUEST_TIMEOUT,
+                             HTML_PARSER, HTML_PARSER_BACKENDS,
+                             LOG_LEVEL, LOG_STRUCTURED)
+
+_shared_session = None
+
+# Trạng thái logging của process hiện tại (process con tạo bằng fork phải thiết lập lại)
+_logging_pid = None
+_logging_file = None
+_logging_structured = None
+_logging_level = None
+
+# Các thuộc tính có sẵn của LogRecord; thuộc tính khác là trường truyền qua extra={...}
+_LOG_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+_exception_formatter = logging.Formatter()
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Mỗi bản ghi log là một dòng JSON: thời gian, mức, logger, message, thread và các trường extra"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _LOG_RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exception'] = record.exc_text  # Đã format trước khi vào hàng đợi
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _BackgroundQueueHandler(QueueHandler):
+    """Ghép message (msg % args) và traceback thành chuỗi ngay trong thread gọi log, trước khi đưa vào
+    hàng đợi: args có thể bị sửa và traceback giữ cả frame nếu để thread nền xử lý sau. Định dạng
+    thời gian/JSON và ghi file vẫn do thread của QueueListener làm. Khác QueueHandler mặc định, traceback
+    được giữ riêng trong exc_text (không gộp vào message) để JsonLogFormatter ghi vào trường 'exception'."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging(log_file: str = None, structured: bool = None, level: str = None) -> logging.Logger:
+    """Thiết lập logging một lần cho mỗi process: luồng gọi log chỉ ghép message rồi đưa bản ghi vào hàng đợi,
+    một thread nền (QueueListener) format và ghi ra file log và console.
+    structured/level mặc định theo LOG_STRUCTURED/LOG_LEVEL (process con giữ cấu hình của process cha)"""
+    global _logging_pid, _logging_file, _logging_structured, _logging_level
+    root = logging.getLogger()
+    if _logging_pid == os.getpid():
+        return logging.getLogger(__name__)
+    if _logging_pid is None and root.handlers:
+        return logging.getLogger(__name__)  # Logging đã được cấu hình ở nơi khác (như basicConfig trước đây)
+    
+    # Process con (fork) kế thừa QueueHandler nhưng không có thread nền: thay bằng hàng đợi mới, cùng file log
+    for handler in list(root.handlers):
+        if isinstance(handler, _BackgroundQueueHandler):
+            root.removeHandler(handler)
+    
+    log_file = log_file or _logging_file or f"logs/crawler_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+    structured = next(value for value in (structured, _logging_structured, LOG_STRUCTURED) if value is not None)
+    level = level or _logging_level or LOG_LEVEL
     
     # Tạo thư mục logs nếu chưa có
     os.makedirs(os.path.dirname(log_file), exist_ok=True)
     
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
-    )
+    text_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    file_handler = logging.FileHandler(log_file, encoding='utf-8')
+    file_handler.setFormatter(JsonLogFormatter() if structured else text_formatter)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(text_formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, stream_handler)
+    listener.start()
+    atexit.register(listener.stop)  # Ghi nốt các bản ghi còn trong hàng đợi khi thoát
+    
+    root.addHandler(_BackgroundQueueHandler(log_queue))
+    root.setLevel(level)
+    _logging_pid, _logging_file = os.getpid(), log_file
+    _logging_structured, _logging_level = structured, level
     return logging.getLogger(__name__)
 
 def random_delay(min_delay: float = 0.5, max_delay: float = 2.0):
@@ -60,20 +145,79 @@ def save_to_csv(data: List[Dict], filename: str):
         writer.writeheader()
         writer.writerows(data)
 
-def make_request(url: str, headers: Dict = None, retries: int = 3) -> requests.Response:
-    """Thực hiện request với retry logic"""
-    if not headers:
-        headers = {'User-Agent': get_random_user_agent()}
+def create_session(headers: Dict = None,
+                   pool_connections: int = HTTP_POOL_CONNECTIONS,
+                   pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                   max_retries: int = HTTP_POOL_RETRIES) -> requests.Session:
+    """Tạo session dùng connection pool keep-alive và retry adapter"""
+    session = requests.Session()
+    if headers:
+        session.headers.update(headers)
+    
+    # Retry ở tầng transport cho lỗi kết nối và các mã lỗi tạm thời
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=HTTP_RETRY_STATUSES,
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        raise_on_status=False
+    )
+    # pool_maxsize là số kết nối tối đa tới mỗi host, pool_block để không vượt quá giới hạn này
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          max_retries=retry,
+                          pool_block=True)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_shared_session() -> requests.Session:
+    """Lấy session dùng chung cho các request không truyền session riêng"""
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = create_session({'User-Agent': get_random_user_agent()})
+    return _shared_session
+
+def make_request(url: str, headers: Dict = None,
+                 session: requests.Session = None, cache=None) -> requests.Response:
+    """Thực hiện request qua session có connection pool
+    
+    Retry (lỗi kết nối, 429, 5xx, có backoff) do retry adapter của session đảm nhận
+    (HTTP_POOL_RETRIES lần), make_request không retry thêm lần nào.
+    Nếu truyền `cache` (HttpCache), request sẽ gửi kèm If-None-Match/If-Modified-Since
+    và response 304 được trả về với body lấy từ cache.
+    """
+    if session is None:
+        session = get_shared_session()
     
-    for attempt in range(retries):
-        try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            return response
-        except requests.RequestException as e:
-            if attempt == retries - 1:
-                raise e
-            time.sleep(2 ** attempt)  # Exponential backoff
+    request_headers = dict(headers or {})
+    if cache is not None:
+        request_headers.update(cache.conditional_headers(url))
+    
+    response = session.get(url, headers=request_headers, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    
+    if cache is not None:
+        if response.status_code == 304:
+            body = cache.load(url)
+            if body is None:
+                # Body đã bị xóa khỏi cache, tải lại không kèm conditional headers
+                response = session.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+                response.raise_for_status()
+                cache.store(url, response.content, response.headers)
+            else:
+                response._content = body
+                response.status_code = 200
+                response.from_cache = True
+        else:
+            cache.store(url, response.content, response.headers)
+    return response
+
+def make_soup(markup, parser: str = HTML_PARSER) -> BeautifulSoup:
+    """Parse HTML bằng backend được cấu hình"""
+    if parser not in HTML_PARSER_BACKENDS:
+        raise ValueError(f"Parser không được hỗ trợ: {parser} (chọn một trong {', '.join(HTML_PARSER_BACKENDS)})")
+    return BeautifulSoup(markup, parser)
 
 def clean_text(text: str) -> str:
     """Làm sạch text"""
@@ -0,0 +1,152 @@
+"""
+Lưu trữ HTML thô của các trang đã tải (segment nén kiểu WARC + index theo URL)
+"""
+import os
+import gzip
+import json
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterator
+
+from src.utils.record_writer import iter_jsonl, open_for_append
+
+SEGMENT_PREFIX = 'segment-'
+SEGMENT_SUFFIX = '.warc.gz'
+INDEX_FILE = 'index.jsonl'
+
+
+class HtmlArchive:
+    """Archive chỉ ghi nối tiếp: mỗi record là một gzip member trong file segment
+
+    Body được đánh địa chỉ theo nội dung (sha1): trang có nội dung trùng với record
+    đã lưu chỉ ghi thêm một dòng index trỏ tới record cũ.
+    """
+
+    def __init__(self, archive_dir: str, segment_size: int = 256 * 1024 * 1024,
+                 compress_level: int = 6):
+        self.archive_dir = archive_dir
+        self.segment_size = segment_size
+        self.compress_level = compress_level
+        self.lock = threading.Lock()
+        self._digests = {}  # digest -> (segment, offset, length)
+        self._segment_file = None
+        self._segment_name = None
+        self._index_file = None
+
+        os.makedirs(archive_dir, exist_ok=True)
+        for entry in self.iter_entries():
+            self._digests[entry['digest']] = (entry['segment'], entry['offset'], entry['length'])
+
+    def _segment_names(self):
+        """Danh sách file segment theo thứ tự"""
+        return sorted(name for name in os.listdir(self.archive_dir)
+                      if name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX))
+
+    def _open_for_append(self):
+        """Mở segment cuối (hoặc tạo segment mới nếu đã đầy) và file index"""
+        if self._index_file is None:
+            self._index_file = open_for_append(os.path.join(self.archive_dir, INDEX_FILE))
+
+        if self._segment_file is not None and self._segment_file.tell() < self.segment_size:
+            return
+
+        names = self._segment_names()
+        if self._segment_file is not None or not names:
+            self._roll_segment(len(names) + 1)
+        else:
+            self._segment_name = names[-1]
+            self._segment_file = open(os.path.join(self.archive_dir, self._segment_name), 'ab')
+            self._segment_file.seek(0, os.SEEK_END)
+            if self._segment_file.tell() >= self.segment_size:
+                self._roll_segment(len(names) + 1)
+
+    def _roll_segment(self, number: int):
+        """Đóng segment hiện tại và tạo segment mới"""
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment_name = f"{SEGMENT_PREFIX}{number:05d}{SEGMENT_SUFFIX}"
+        self._segment_file = open(os.path.join(self.archive_dir, self._segment_name), 'ab')
+        self._segment_file.seek(0, os.SEEK_END)
+
+    def write(self, url: str, body: bytes, fetched_at: str = None) -> Dict:
+        """Lưu body của một trang và trả về entry index tương ứng"""
+        fetched_at = fetched_at or datetime.now().isoformat()
+        digest = hashlib.sha1(body).hexdigest()
+
+        with self.lock:
+            self._open_for_append()
+
+            location = self._digests.get(digest)
+            if location is None:
+                header = (
+                    "WARC/1.0\r\n"
+                    "WARC-Type: response\r\n"
+                    f"WARC-Target-URI: {url}\r\n"
+                    f"WARC-Date: {fetched_at}\r\n"
+                    f"WARC-Payload-Digest: sha1:{digest}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    "\r\n"
+                ).encode('utf-8')
+                member = gzip.compress(header + body + b"\r\n\r\n", compresslevel=self.compress_level)
+
+                offset = self._segment_file.tell()
+                self._segment_file.write(member)
+                self._segment_file.flush()
+                location = (self._segment_name, offset, len(member))
+                self._digests[digest] = location
+
+            segment, offset, length = location
+            entry = {
+                'url': url,
+                'fetched_at': fetched_at,
+                'digest': digest,
+                'segment': segment,
+                'offset': offset,
+                'length': length,
+            }
+            # Index chỉ được ghi sau khi dữ liệu segment đã flush
+            self._index_file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self._index_file.flush()
+            return entry
+
+    def iter_entries(self) -> Iterator[Dict]:
+        """Duyệt tất cả entry trong index theo thứ tự ghi (bỏ qua dòng bị ghi dở khi crawler bị dừng đột ngột)"""
+        index_path = os.path.join(self.archive_dir, INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        yield from iter_jsonl(index_path)
+
+    def latest_entries(self) -> Dict[str, Dict]:
+        """Entry mới nhất của mỗi URL"""
+        latest = {}
+        for entry in self.iter_entries():
+            latest[entry['url']] = entry
+        return latest
+
+    def read(self, entry: Dict) -> bytes:
+        """Đọc lại body HTML từ một entry index"""
+        return read_archived_body(self.archive_dir, entry)
+
+    def close(self):
+        """Đóng các file đang mở"""
+        with self.lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            if self._index_file is not None:
+                self._index_file.close()
+                self._index_file = None
+
+
+def read_archived_body(archive_dir: str, entry: Dict) -> bytes:
+    """Đọc body từ segment theo offset/length trong entry (không cần mở HtmlArchive)"""
+    with open(os.path.join(archive_dir, entry['segment']), 'rb') as f:
+        f.seek(entry['offset'])
+        record = gzip.decompress(f.read(entry['length']))
+
+    header, _, rest = record.partition(b"\r\n\r\n")
+    for line in header.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            return rest[:int(line.split(b":", 1)[1])]
+    return rest
@@ -0,0 +1,123 @@
+"""
+Cache HTTP trên đĩa dùng conditional request (ETag / Last-Modified)
+"""
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import zlib
+from typing import Dict, Optional
+
+
+class HttpCache:
+    """Lưu body trang theo URL và revalidate bằng If-None-Match / If-Modified-Since"""
+
+    def __init__(self, cache_dir: str, max_size: int, ttl: float):
+        self.cache_dir = cache_dir
+        self.max_size = max_size  # Tổng dung lượng body (đã nén) tối đa, tính bằng bytes
+        self.ttl = ttl  # Entry cũ hơn ttl (giây) sẽ bị bỏ và tải lại toàn bộ
+        self.lock = threading.Lock()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS entries ('
+            'url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, '
+            'size INTEGER, stored_at REAL, accessed_at REAL)'
+        )
+        self.db.commit()
+
+    def _body_path(self, url: str) -> str:
+        """Đường dẫn file body của một URL"""
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + '.z')
+
+    def _delete(self, url: str):
+        """Xóa entry và file body (gọi khi đang giữ lock)"""
+        self.db.execute('DELETE FROM entries WHERE url = ?', (url,))
+        try:
+            os.remove(self._body_path(url))
+        except FileNotFoundError:
+            pass
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Headers conditional cho URL đã có trong cache (rỗng nếu chưa có hoặc hết hạn)"""
+        with self.lock:
+            row = self.db.execute(
+                'SELECT etag, last_modified, stored_at FROM entries WHERE url = ?', (url,)
+            ).fetchone()
+            if not row:
+                return {}
+
+            etag, last_modified, stored_at = row
+            if time.time() - stored_at > self.ttl:
+                self._delete(url)
+                self.db.commit()
+                return {}
+
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def load(self, url: str) -> Optional[bytes]:
+        """Đọc body đã cache sau khi server trả 304"""
+        with self.lock:
+            try:
+                with open(self._body_path(url), 'rb') as f:
+                    body = zlib.decompress(f.read())
+            except (FileNotFoundError, zlib.error):
+                self._delete(url)
+                self.db.commit()
+                return None
+
+            # 304 nghĩa là nội dung vẫn mới, làm mới luôn thời điểm lưu
+            now = time.time()
+            self.db.execute('UPDATE entries SET stored_at = ?, accessed_at = ? WHERE url = ?',
+                            (now, now, url))
+            self.db.commit()
+            return body
+
+    def store(self, url: str, body: bytes, headers: Dict):
+        """Lưu body của response 200 nếu server có trả validator"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+
+        data = zlib.compress(body)
+        path = self._body_path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        with self.lock:
+            with open(path, 'wb') as f:
+                f.write(data)
+            now = time.time()
+            self.db.execute(
+                'INSERT OR REPLACE INTO entries (url, etag, last_modified, size, stored_at, accessed_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (url, etag, last_modified, len(data), now, now)
+            )
+            self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Xóa các entry ít được dùng gần đây nhất khi vượt quá dung lượng (LRU)"""
+        total = self.db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_size:
+            return
+
+        rows = self.db.execute('SELECT url, size FROM entries ORDER BY accessed_at').fetchall()
+        for url, size in rows:
+            if total <= self.max_size:
+                break
+            self._delete(url)
+            total -= size
+
+    def close(self):
+        """Đóng kết nối tới file index"""
+        with self.lock:
+            self.db.close()
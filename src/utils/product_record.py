@@ -0,0 +1,128 @@
+"""
+Bản ghi sản phẩm gọn trong bộ nhớ: các trường cố định dùng __slots__ thay vì dict,
+trường ít giá trị khác nhau (thương hiệu, nhà sản xuất, quốc gia...) dùng chung một chuỗi cho mọi bản ghi
+"""
+import sys
+from typing import Any, Dict, Iterator
+
+# Schema bản ghi theo đúng thứ tự xuất ra file (url, các trường của PRODUCT_FIELD_EXTRACTORS, metadata)
+PRODUCT_SCHEMA = (
+    ('url', str),
+    ('name', str),
+    ('price', float),
+    ('unit', str),
+    ('sku', str),
+    ('rating', float),
+    ('reviews_count', int),
+    ('comments_count', int),
+    ('brand', str),
+    ('official_name', str),
+    ('category', str),
+    ('registration_number', str),
+    ('form', str),
+    ('package_size', str),
+    ('origin_brand', str),
+    ('manufacturer', str),
+    ('country_of_manufacture', str),
+    ('ingredients', str),
+    ('images', list),
+    ('content', str),
+    ('original_price', float),
+    ('discount', str),
+    ('description', str),
+    ('usage', str),
+    ('availability', str),
+    ('crawled_at', str),
+    ('lastmod', str),
+    ('categories', list),
+)
+PRODUCT_FIELDS = tuple(name for name, _ in PRODUCT_SCHEMA)
+
+# Trường có ít giá trị khác nhau: mã hóa từ điển bằng sys.intern, mỗi giá trị chỉ có một bản trong bộ nhớ
+DICTIONARY_FIELDS = frozenset({
+    'unit', 'brand', 'category', 'form', 'package_size', 'origin_brand', 'manufacturer',
+    'country_of_manufacture', 'discount', 'availability',
+})
+
+_FIELD_SET = frozenset(PRODUCT_FIELDS)
+_LIST_FIELDS = frozenset(name for name, field_type in PRODUCT_SCHEMA if field_type is list)
+_MISSING = object()
+
+
+def _encode(field: str, value: Any) -> Any:
+    if field in DICTIONARY_FIELDS and type(value) is str:
+        return sys.intern(value)
+    if field in _LIST_FIELDS and isinstance(value, list):
+        # Tuple không cấp dư chỗ như list; danh mục lặp lại giữa các bản ghi nên cũng được intern
+        if field == 'categories':
+            return tuple(sys.intern(item) if type(item) is str else item for item in value)
+        return tuple(value)
+    return value
+
+
+def _decode(field: str, value: Any) -> Any:
+    if field in _LIST_FIELDS and isinstance(value, tuple):
+        return list(value)
+    return value
+
+
+class ProductRecord:
+    """Bản ghi sản phẩm dùng __slots__; đọc/ghi như dict (get, [], in) và
+    chuyển về dict cùng thứ tự trường như trước bằng to_dict() khi xuất file.
+    Trường không có trong schema được giữ trong dict phụ."""
+
+    __slots__ = PRODUCT_FIELDS + ('_extra',)
+
+    def __init__(self, data: Dict[str, Any] = None):
+        self._extra = None
+        if data:
+            for key, value in data.items():
+                self[key] = value
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'ProductRecord':
+        return cls(data)
+
+    def __setitem__(self, key: str, value: Any):
+        if key in _FIELD_SET:
+            setattr(self, key, _encode(key, value))
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _FIELD_SET:
+            value = getattr(self, key, _MISSING)
+            return default if value is _MISSING else _decode(key, value)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __getitem__(self, key: str) -> Any:
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self) -> Iterator[str]:
+        for field in PRODUCT_FIELDS:
+            if hasattr(self, field):
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Dict theo thứ tự schema, trường ngoài schema ở cuối"""
+        data = {}
+        for field in PRODUCT_FIELDS:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                data[field] = _decode(field, value)
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def __repr__(self) -> str:
+        return f"ProductRecord({self.get('url')!r})"
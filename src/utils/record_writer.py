@@ -0,0 +1,164 @@
+"""
+Ghi bản ghi sản phẩm ra file JSON Lines ngay khi crawl xong, và gộp lại thành file JSON/CSV như save_to_json/save_to_csv
+"""
+import os
+import csv
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, Sequence
+
+from config.settings import STREAM_FLUSH_EVERY, STREAM_FLUSH_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+
+class JsonlWriter:
+    """Append từng bản ghi thành một dòng JSON; flush sau mỗi N bản ghi hoặc N giây"""
+
+    def __init__(self, path: str, flush_every: int = STREAM_FLUSH_EVERY,
+                 flush_interval: float = STREAM_FLUSH_INTERVAL):
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self.count = 0  # Số bản ghi đã ghi
+        self.lock = threading.Lock()
+        self._file = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def write(self, record: Dict[str, Any]):
+        """Ghi một bản ghi (mở file ở chế độ append nếu chưa mở)"""
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            if self._file is None:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open_for_append(self.path)
+            self._file.write(line)
+            self.count += 1
+            self._pending += 1
+            if (self._pending >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def _flush(self):
+        self._file.flush()
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    def flush(self):
+        with self.lock:
+            if self._file is not None:
+                self._flush()
+
+    def close(self):
+        """Flush và đóng file; lần write sau sẽ mở lại ở chế độ append"""
+        with self.lock:
+            if self._file is not None:
+                self._flush()
+                self._file.close()
+                self._file = None
+
+
+def open_for_append(path: str):
+    """Mở file JSON Lines để append; nếu dòng cuối bị ghi dở (thiếu ký tự xuống dòng, khi bị dừng đột ngột)
+    thì xuống dòng trước để bản ghi mới không dính vào dòng hỏng"""
+    broken_tail = False
+    if os.path.exists(path) and os.path.getsize(path) > 0:
+        with open(path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            broken_tail = f.read(1) != b'\n'
+    f = open(path, 'a', encoding='utf-8')
+    if broken_tail:
+        f.write('\n')
+    return f
+
+
+def iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """Đọc lần lượt các bản ghi; bỏ qua dòng cuối bị ghi dở (khi crawler bị dừng đột ngột)"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning("Bỏ qua dòng %d không hợp lệ trong %s", line_number, path)
+
+
+def compact_jsonl(jsonl_path: str, json_path: str = None, csv_path: str = None,
+                  transform: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+                  fieldnames: Sequence[str] = None, unique_urls: bool = True) -> int:
+    """Gộp file JSONL thành file JSON (cùng định dạng với save_to_json) và/hoặc CSV,
+    đọc từng bản ghi nên không cần giữ toàn bộ dữ liệu trong bộ nhớ. Trả về số bản ghi.
+    transform: hàm áp dụng cho từng bản ghi trước khi ghi (VD: gộp danh mục).
+    unique_urls: chỉ giữ bản ghi đầu tiên của mỗi URL (tắt khi mỗi danh mục có bản ghi riêng, --no-dedup)."""
+    records = iter_jsonl(jsonl_path)
+    if unique_urls:
+        records = unique_by_url(records)
+    return write_records(records, json_path, csv_path, transform, fieldnames)
+
+
+def unique_by_url(records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Giữ bản ghi đầu tiên của mỗi URL: sản phẩm đã ghi nhưng chưa kịp commit checkpoint trước khi
+    crawler bị dừng sẽ được tải lại khi --resume và xuất hiện hai lần trong file JSONL"""
+    seen = set()
+    for record in records:
+        url = record.get('url')
+        if url:
+            if url in seen:
+                continue
+            seen.add(url)
+        yield record
+
+
+def write_records(records: Iterable[Dict[str, Any]], json_path: str = None, csv_path: str = None,
+                  transform: Callable[[Dict[str, Any]], Dict[str, Any]] = None,
+                  fieldnames: Sequence[str] = None) -> int:
+    """Ghi lần lượt các bản ghi ra file JSON (cùng định dạng với save_to_json) và/hoặc CSV
+    (như save_to_csv) mà không cần dựng toàn bộ danh sách dict. Trả về số bản ghi.
+    fieldnames: các cột CSV theo thứ tự; trường của bản ghi đầu tiên không có trong danh sách được thêm vào cuối.
+    Các bản ghi không cần cùng tập trường: trường thiếu để trống, trường ngoài header bị bỏ qua."""
+    json_file = csv_file = csv_writer = None
+    count = 0
+    try:
+        if json_path:
+            os.makedirs(os.path.dirname(json_path), exist_ok=True)
+            json_file = open(json_path, 'w', encoding='utf-8')
+            json_file.write('[')
+        if csv_path:
+            os.makedirs(os.path.dirname(csv_path), exist_ok=True)
+            csv_file = open(csv_path, 'w', newline='', encoding='utf-8')
+
+        for record in records:
+            if transform:
+                record = transform(record)
+            if json_file:
+                # Thụt lề từng object như json.dump(list, indent=2)
+                body = json.dumps(record, ensure_ascii=False, indent=2).replace('\n', '\n  ')
+                json_file.write(('\n  ' if count == 0 else ',\n  ') + body)
+            if csv_file:
+                if csv_writer is None:
+                    header = list(fieldnames or [])
+                    header += [key for key in record.keys() if key not in header]
+                    csv_writer = csv.DictWriter(csv_file, fieldnames=header, restval='', extrasaction='ignore')
+                    csv_writer.writeheader()
+                csv_writer.writerow(record)
+            count += 1
+
+        if json_file:
+            json_file.write('\n]' if count else ']')
+    finally:
+        if json_file:
+            json_file.close()
+        if csv_file:
+            csv_file.close()
+
+    # save_to_csv không tạo file khi không có dữ liệu
+    if csv_path and count == 0:
+        os.remove(csv_path)
+    return count
@@ -0,0 +1,116 @@
+"""
+Snapshot các bản ghi sản phẩm của lần crawl trước, dùng để chỉ tải lại những sản phẩm mới hoặc có thể đã thay đổi
+"""
+import json
+import time
+import zlib
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from config.settings import CHECKPOINT_COMMIT_EVERY, CHECKPOINT_COMMIT_INTERVAL
+from src.utils.batched_commit import BatchedCommits
+
+# Các trường không tính vào hash nội dung: thời gian crawl, và danh mục chứa sản phẩm (phụ thuộc lần chạy:
+# các danh mục được crawl, thứ tự gặp sản phẩm) chứ không phải nội dung sản phẩm
+_VOLATILE_FIELDS = ('crawled_at', 'lastmod', 'categories')
+
+
+def _to_price(value) -> Optional[float]:
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def content_hash(record: Dict[str, Any]) -> str:
+    """Hash nội dung của bản ghi, bỏ qua các trường phụ thuộc lần chạy"""
+    stable = {key: value for key, value in record.items() if key not in _VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(stable, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class SnapshotStore(BatchedCommits):
+    """Bản ghi mới nhất của mỗi sản phẩm (theo URL, tra thêm theo SKU) cùng các tín hiệu thay đổi.
+
+    Bản ghi được commit theo lô như CrawlState; bị dừng đột ngột thì các sản phẩm của lô cuối
+    chỉ bị tải lại ở lần chạy sau."""
+
+    def __init__(self, path: str, max_age: float, commit_every: int = CHECKPOINT_COMMIT_EVERY,
+                 commit_interval: float = CHECKPOINT_COMMIT_INTERVAL):
+        self.path = path
+        self.max_age = max_age  # Bản ghi cũ hơn max_age (giây) luôn được tải lại dù không có tín hiệu thay đổi
+        self.lock = threading.Lock()
+        self._init_batching(commit_every, commit_interval)
+        self.db = self._connect(path)
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS products ('
+            'url TEXT PRIMARY KEY, sku TEXT, lastmod TEXT, listing_price REAL, listing_name TEXT, '
+            'content_hash TEXT, record BLOB, fetched_at REAL, listing_hash TEXT);'
+            'CREATE INDEX IF NOT EXISTS products_by_sku ON products (sku);'
+        )
+        # Snapshot tạo trước khi có listing_hash
+        columns = {row[1] for row in self.db.execute('PRAGMA table_info(products)')}
+        if 'listing_hash' not in columns:
+            self.db.execute('ALTER TABLE products ADD COLUMN listing_hash TEXT')
+        self.db.commit()
+
+    def _row(self, url: str, sku: str = None) -> Optional[tuple]:
+        """Tra snapshot theo URL, nếu không có thì theo SKU (sản phẩm đổi slug)"""
+        columns = 'lastmod, listing_price, listing_name, listing_hash, record, fetched_at'
+        row = self.db.execute(f'SELECT {columns} FROM products WHERE url = ?', (url,)).fetchone()
+        if row is None and sku:
+            row = self.db.execute(f'SELECT {columns} FROM products WHERE sku = ? ORDER BY fetched_at DESC',
+                                  (sku,)).fetchone()
+        return row
+
+    def unchanged_record(self, url: str, lastmod: str = None,
+                         card: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+        """Bản ghi cũ nếu các tín hiệu cho thấy sản phẩm không đổi, None nếu cần tải lại.
+
+        Ưu tiên lastmod của sitemap, sau đó hash dữ liệu API của card, cuối cùng giá và tên trên card.
+        Không có tín hiệu nào để so sánh thì coi như đã thay đổi.
+        """
+        sku = (card or {}).get('sku')
+        with self.lock:
+            row = self._row(url, sku)
+        if row is None:
+            return None
+
+        old_lastmod, old_price, old_name, old_listing_hash, record, fetched_at = row
+        if time.time() - fetched_at > self.max_age:
+            return None
+
+        if lastmod and old_lastmod:
+            unchanged = lastmod == old_lastmod
+        elif card and card.get('hash') and old_listing_hash:
+            unchanged = card['hash'] == old_listing_hash
+        elif card and _to_price(card.get('price')) is not None and old_price is not None:
+            unchanged = _to_price(card['price']) == old_price and (card.get('name') or '') == (old_name or '')
+        else:
+            return None
+
+        if not unchanged:
+            return None
+        product_data = json.loads(zlib.decompress(record))
+        product_data['url'] = url  # Giữ URL hiện tại nếu sản phẩm được tìm thấy theo SKU
+        return product_data
+
+    def update(self, product_data: Dict[str, Any], lastmod: str = None,
+               card: Dict[str, Any] = None) -> bool:
+        """Lưu bản ghi vừa tải; trả về True nếu nội dung khác với snapshot trước đó"""
+        url = product_data.get('url')
+        digest = content_hash(product_data)
+        card = card or {}
+        with self.lock:
+            previous = self.db.execute('SELECT content_hash FROM products WHERE url = ?', (url,)).fetchone()
+            self.db.execute(
+                'INSERT OR REPLACE INTO products '
+                '(url, sku, lastmod, listing_price, listing_name, content_hash, record, fetched_at, listing_hash) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, product_data.get('sku') or card.get('sku'), lastmod,
+                 _to_price(card.get('price')), card.get('name'), digest,
+                 zlib.compress(json.dumps(product_data, ensure_ascii=False).encode('utf-8')), time.time(),
+                 card.get('hash'))
+            )
+            self._commit()
+        return previous is None or previous[0] != digest
@@ -0,0 +1,97 @@
+"""
+Phân loại URL (trang sản phẩm / ảnh sản phẩm / khác) với các quy tắc lấy từ config và dựng sẵn một lần,
+kèm API theo lô classify_many cho danh sách hàng nghìn URL của trang danh mục và gallery ảnh
+"""
+import re
+from typing import Iterable, List
+
+from config.settings import (BASE_URL, PRODUCT_URL_EXCLUDE_PATTERNS, IMAGE_CDN_HOST,
+                             IMAGE_EXCLUDE_PATTERNS, IMAGE_INCLUDE_PATTERNS, IMAGE_PRODUCT_CODE_PATTERN)
+
+# Kết quả phân loại
+PRODUCT_PAGE = 'product'
+PRODUCT_IMAGE = 'image'
+OTHER = 'other'
+
+# Cờ lưu trong cache: một URL có thể thỏa cả hai quy tắc, classify ưu tiên trang sản phẩm
+_PAGE = 1
+_IMAGE = 2
+
+
+class UrlClassifier:
+    """Cùng quy tắc với is_product_url / is_product_image trước đây, nhưng:
+
+    - các danh sách mẫu được dựng thành tuple chữ thường một lần (trước đây dựng lại list và regex mỗi lần gọi)
+      và được kiểm tra bằng map(str.__contains__) chạy trong C; kiểm tra rẻ nhất (đuôi .html, host CDN)
+      được làm trước để loại sớm
+    - kết quả được cache theo URL: logo, icon, banner, link menu lặp lại trên mọi trang nên phần lớn URL
+      chỉ phải phân loại một lần
+    """
+
+    def __init__(self, base_url: str = BASE_URL,
+                 url_exclude_patterns: Iterable[str] = PRODUCT_URL_EXCLUDE_PATTERNS,
+                 image_host: str = IMAGE_CDN_HOST,
+                 image_exclude_patterns: Iterable[str] = IMAGE_EXCLUDE_PATTERNS,
+                 image_include_patterns: Iterable[str] = IMAGE_INCLUDE_PATTERNS,
+                 image_code_pattern: str = IMAGE_PRODUCT_CODE_PATTERN,
+                 cache_size: int = 100000):
+        self.base_url = base_url
+        self.url_exclude_patterns = tuple(url_exclude_patterns)
+        self.image_host = image_host.lower()
+        self.image_exclude_patterns = tuple(pattern.lower() for pattern in image_exclude_patterns)
+        self.image_include_patterns = tuple(pattern.lower() for pattern in image_include_patterns)
+        self.image_code = re.compile(image_code_pattern)
+        self.cache_size = cache_size
+        self._cache = {}
+
+    def _flags(self, url: str) -> int:
+        flags = self._cache.get(url)
+        if flags is not None:
+            return flags
+
+        flags = 0
+        if url:
+            # URL sản phẩm có dạng /category/subcategory/product-name.html, không có query/fragment/phân trang
+            if (url.endswith('.html')
+                    and url.replace(self.base_url, '').count('/') >= 2
+                    and not any(map(url.__contains__, self.url_exclude_patterns))):
+                flags |= _PAGE
+            # Ảnh sản phẩm trên CDN của Long Châu (không phải logo, banner, icon thanh toán...)
+            url_lower = url.lower()
+            if (self.image_host in url_lower
+                    and not any(map(url_lower.__contains__, self.image_exclude_patterns))
+                    and (any(map(url_lower.__contains__, self.image_include_patterns))
+                         or self.image_code.search(url_lower) is not None)):
+                flags |= _IMAGE
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.clear()
+        self._cache[url] = flags
+        return flags
+
+    def is_product_url(self, url: str) -> bool:
+        return bool(self._flags(url) & _PAGE)
+
+    def is_product_image(self, src: str) -> bool:
+        return bool(self._flags(src) & _IMAGE)
+
+    def classify(self, url: str) -> str:
+        flags = self._flags(url)
+        if flags & _PAGE:
+            return PRODUCT_PAGE
+        if flags & _IMAGE:
+            return PRODUCT_IMAGE
+        return OTHER
+
+    def classify_many(self, urls: Iterable[str]) -> List[str]:
+        """Phân loại cả lô, giữ thứ tự; URL đã gặp được tra cache, chỉ URL mới mới phải kiểm tra quy tắc"""
+        kinds = (OTHER, PRODUCT_PAGE, PRODUCT_IMAGE, PRODUCT_PAGE)
+        return [kinds[flags] for flags in map(self._flags, urls)]
+
+    def product_urls(self, urls: Iterable[str]) -> List[str]:
+        """Các URL sản phẩm trong lô, giữ thứ tự"""
+        return [url for url in urls if self._flags(url) & _PAGE]
+
+    def product_images(self, urls: Iterable[str]) -> List[str]:
+        """Các URL ảnh sản phẩm trong lô, giữ thứ tự"""
+        return [url for url in urls if self._flags(url) & _IMAGE]
@@ -0,0 +1,39 @@
+"""
+Cấu hình chung cho test: đường dẫn import, fixture HTML và crawler chạy trong thư mục tạm
+"""
+import os
+import sys
+import glob
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+DETAIL_PAGES = sorted(glob.glob(os.path.join(FIXTURES_DIR, 'detail_pages', '*.html')))
+
+
+def read_fixture(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pytest.fixture
+def make_crawler(tmp_path, monkeypatch):
+    """Tạo LongChauCrawler không dùng cache/archive; logs/ và data/ được tạo trong thư mục tạm"""
+    monkeypatch.chdir(tmp_path)
+    from src.crawlers.longchau_crawler import LongChauCrawler
+
+    crawlers = []
+
+    def factory(**kwargs):
+        kwargs.setdefault('use_cache', False)
+        kwargs.setdefault('archive_dir', None)
+        crawler = LongChauCrawler(**kwargs)
+        crawlers.append(crawler)
+        return crawler
+
+    yield factory
+    for crawler in crawlers:
+        crawler.close()
@@ -0,0 +1,89 @@
+"""
+Blob store cho trường văn bản lớn: lưu một lần theo hash, commit theo lô, và các chế độ xuất 'ref'/'exclude'/'inline'
+"""
+import csv
+import glob
+import json
+import sqlite3
+
+from config.settings import BLOB_STORE_PATH
+from src.utils.blob_store import BlobStore, is_blob_ref
+
+URL = 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/vitamin-c-500mg.html'
+DESCRIPTION = 'Vitamin C 500mg giúp tăng sức đề kháng. ' * 50
+
+
+def _blob_count(path):
+    with sqlite3.connect(path) as db:
+        return db.execute('SELECT COUNT(*) FROM blobs').fetchone()[0]
+
+
+def test_same_text_is_stored_once(tmp_path):
+    store = BlobStore(str(tmp_path / 'blobs.db'))
+
+    ref = store.put(DESCRIPTION)
+    assert is_blob_ref(ref)
+    assert store.put(DESCRIPTION) == ref
+    assert store.get(ref) == DESCRIPTION
+    assert ref in store
+    assert store.get('sha256:' + '0' * 64) is None
+    store.close()
+    assert _blob_count(str(tmp_path / 'blobs.db')) == 1
+
+
+def test_blobs_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / 'blobs.db')
+    store = BlobStore(path, commit_every=2, commit_interval=60)
+
+    ref = store.put('Thành phần: Vitamin C')
+    assert ref in store
+    assert _blob_count(path) == 0
+
+    store.put('Cách dùng: uống sau ăn')
+    assert _blob_count(path) == 2
+
+    store.put('Bảo quản nơi khô ráo')
+    store.close()
+    assert _blob_count(path) == 3
+
+
+def _saved_output(extension):
+    (path,) = glob.glob(f'data/longchau_products_*.{extension}')
+    return path
+
+
+def test_ref_mode_exports_references(make_crawler):
+    crawler = make_crawler(large_fields='ref')
+    crawler._add_product({'url': URL, 'name': 'Vitamin C 500mg', 'description': DESCRIPTION})
+    crawler.save_data('json')
+
+    with open(_saved_output('json'), encoding='utf-8') as f:
+        (record,) = json.load(f)
+    assert is_blob_ref(record['description'])
+    assert crawler.blob_store.get(record['description']) == DESCRIPTION
+
+
+def test_exclude_mode_drops_large_fields_from_output(make_crawler):
+    crawler = make_crawler(large_fields='exclude')
+    crawler._add_product({'url': URL, 'name': 'Vitamin C 500mg', 'description': DESCRIPTION})
+    crawler.save_data('both')
+
+    with open(_saved_output('json'), encoding='utf-8') as f:
+        (record,) = json.load(f)
+    assert 'description' not in record
+    with open(_saved_output('csv'), encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        assert 'description' not in reader.fieldnames
+        assert [row['name'] for row in reader] == ['Vitamin C 500mg']
+    # Văn bản vẫn được lưu trong blob store
+    crawler.close()
+    assert _blob_count(BLOB_STORE_PATH) == 1
+
+
+def test_inline_mode_restores_text_of_references(make_crawler):
+    writer = make_crawler(large_fields='ref')
+    ref = writer.blob_store.put(DESCRIPTION)
+    writer.close()
+
+    crawler = make_crawler()
+    assert crawler._export_record({'url': URL, 'description': ref})['description'] == DESCRIPTION
@@ -0,0 +1,107 @@
+"""
+Checkpoint và chỉ mục chống trùng commit theo lô; file JSONL được flush trước và bản ghi trùng được loại khi gộp
+"""
+import json
+import sqlite3
+
+from src.utils.crawl_state import CrawlState, URL_DONE
+from src.utils.dedup_index import DedupIndex
+from src.utils.record_writer import JsonlWriter, compact_jsonl
+
+
+def _committed_status(path, url):
+    with sqlite3.connect(path) as db:
+        row = db.execute('SELECT status FROM urls WHERE url = ?', (url,)).fetchone()
+    return row[0] if row else None
+
+
+def test_url_updates_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / 'state.db')
+    commits = []
+    state = CrawlState(path, commit_every=3, commit_interval=60, before_commit=lambda: commits.append(1))
+
+    state.mark_url('https://a/1.html', URL_DONE)
+    state.mark_url('https://a/2.html', URL_DONE)
+    assert state.is_done('https://a/1.html')
+    assert _committed_status(path, 'https://a/1.html') is None
+    assert commits == []
+
+    state.mark_url('https://a/3.html', URL_DONE)
+    assert _committed_status(path, 'https://a/3.html') == URL_DONE
+    assert len(commits) == 1
+
+    state.mark_url('https://a/4.html', URL_DONE)
+    state.close()
+    assert _committed_status(path, 'https://a/4.html') == URL_DONE
+    assert len(commits) == 2
+
+
+def test_state_commit_flushes_records_first(tmp_path):
+    writer = JsonlWriter(str(tmp_path / 'products.jsonl'), flush_every=1000, flush_interval=60)
+    state = CrawlState(str(tmp_path / 'state.db'), commit_every=1, before_commit=writer.flush)
+
+    writer.write({'url': 'https://a/1.html'})
+    state.mark_url('https://a/1.html', URL_DONE)
+
+    with open(writer.path, encoding='utf-8') as f:
+        assert [json.loads(line)['url'] for line in f] == ['https://a/1.html']
+    state.close()
+    writer.close()
+
+
+def test_compaction_drops_records_written_twice(tmp_path):
+    jsonl_path = tmp_path / 'products.jsonl'
+    lines = [{'url': 'https://a/1.html', 'name': 'A'}, {'url': 'https://a/2.html', 'name': 'B'},
+             {'url': 'https://a/1.html', 'name': 'A (tải lại)'}]
+    jsonl_path.write_text(''.join(json.dumps(line) + '\n' for line in lines), encoding='utf-8')
+    json_path = tmp_path / 'out' / 'products.json'
+
+    assert compact_jsonl(str(jsonl_path), str(json_path)) == 2
+    assert [record['name'] for record in json.loads(json_path.read_text(encoding='utf-8'))] == ['A', 'B']
+
+
+def test_dedup_index_commits_in_batches(tmp_path):
+    path = str(tmp_path / 'dedup.db')
+    dedup = DedupIndex(path, commit_every=2, commit_interval=60)
+
+    assert dedup.claim('https://nhathuoclongchau.com.vn/thuoc/a.html', 'thuoc')
+    with sqlite3.connect(path) as db:
+        assert db.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 0
+
+    dedup.flush()
+    with sqlite3.connect(path) as db:
+        assert db.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 1
+    dedup.close()
+
+
+def test_urls_are_tracked_per_category(tmp_path):
+    state = CrawlState(str(tmp_path / 'state.db'), commit_every=1)
+    state.add_urls('a', ['https://a/1.html', 'https://a/2.html'])
+    state.add_urls('b', ['https://a/2.html'])
+    state.add_urls('a', ['https://a/3.html', 'https://a/1.html'])
+
+    state.mark_url('https://a/2.html', URL_DONE, category_url='a')
+
+    assert state.category_urls('a') == ['https://a/1.html', 'https://a/2.html', 'https://a/3.html']
+    assert state.category_urls('b') == ['https://a/2.html']
+    assert state.is_done('https://a/2.html', 'a')
+    assert not state.is_done('https://a/2.html', 'b')
+    state.close()
+
+
+def test_migrates_checkpoint_keyed_by_url(tmp_path):
+    path = str(tmp_path / 'state.db')
+    with sqlite3.connect(path) as db:
+        db.executescript(
+            'CREATE TABLE urls (url TEXT PRIMARY KEY, category_url TEXT, position INTEGER, status TEXT, '
+            'error TEXT, updated_at REAL);'
+            "INSERT INTO urls VALUES ('https://a/1.html', 'a', 0, 'done', NULL, 0);"
+            "INSERT INTO urls VALUES ('https://a/9.html', NULL, NULL, 'failed', 'lỗi', 0);"
+        )
+
+    state = CrawlState(path)
+    assert state.is_done('https://a/1.html', 'a')
+    assert state.url_status('https://a/9.html') == 'failed'
+    state.add_urls('a', ['https://a/2.html'])
+    assert state.category_urls('a') == ['https://a/1.html', 'https://a/2.html']
+    state.close()
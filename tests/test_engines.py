@@ -0,0 +1,182 @@
+"""
+Engine async và pipeline ghi bản ghi theo thứ tự listing dù các trang xong theo thứ tự khác
+"""
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from conftest import DETAIL_PAGES, read_fixture
+from src.crawlers import longchau_crawler
+from src.crawlers.async_engine import fetch_pages
+from src.crawlers.pipeline import OrderedSink, Stage, run_stages
+from src.utils.crawl_state import CATEGORY_DONE
+
+PAGE = read_fixture(os.path.join(os.path.dirname(DETAIL_PAGES[0]), 'full_page.html'))
+
+
+class DelayedPageHandler(BaseHTTPRequestHandler):
+    """Trả về trang chi tiết mẫu sau `?delay=` giây; đường dẫn chứa 'missing' trả 404, chứa 'flaky' trả 503
+    ở request đầu tiên. `requests` đếm số request của từng đường dẫn."""
+    requests = {}
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        time.sleep(float(query.get('delay', ['0'])[0]))
+        attempt = self.requests[self.path] = self.requests.get(self.path, 0) + 1
+        if 'missing' in self.path:
+            self.send_error(404)
+            return
+        if 'flaky' in self.path and attempt == 1:
+            self.send_error(503)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(PAGE)))
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def page_server():
+    DelayedPageHandler.requests.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), DelayedPageHandler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def _urls(base_url, count=12, missing=(3, 7)):
+    # Trang đầu chậm nhất: thứ tự hoàn thành gần như ngược với thứ tự listing
+    return [f"{base_url}/{'missing' if index in missing else 'p'}-{index}.html?delay={(count - index) * 0.03:.2f}"
+            for index in range(count)]
+
+
+@pytest.fixture
+def fast_crawler(make_crawler, monkeypatch):
+    monkeypatch.setattr(longchau_crawler, 'RANDOM_DELAY_RANGE', (0, 0))
+    return make_crawler
+
+
+def test_async_engine_keeps_listing_order(page_server, fast_crawler):
+    crawler = fast_crawler(engine='async', concurrency=12, parse_workers=2, dedup=False)
+    urls = _urls(page_server)
+
+    crawler.crawl_product_details_async(urls)
+
+    assert [record['url'] for record in crawler.products] == [url for url in urls if 'missing' not in url]
+    # 404 không được retry (MAX_RETRIES mặc định là 3)
+    assert [count for path, count in DelayedPageHandler.requests.items() if 'missing' in path] == [1, 1]
+
+
+def test_pipeline_engine_keeps_listing_order(page_server, fast_crawler):
+    crawler = fast_crawler(engine='pipeline', concurrency=12, parse_workers=2, dedup=False)
+    urls = _urls(page_server)
+
+    crawler.crawl_product_details_pipelined(iter(urls))
+
+    assert [record['url'] for record in crawler.products] == [url for url in urls if 'missing' not in url]
+
+
+def test_async_fetch_retries_only_transient_errors(page_server):
+    urls = [f"{page_server}/missing-1.html", f"{page_server}/flaky-2.html"]
+    pages, errors = {}, {}
+
+    fetch_pages(urls, {}, concurrency=2, retries=3,
+                on_page=lambda index, url, body: pages.setdefault(index, body),
+                on_error=lambda index, url, error: errors.setdefault(index, error))
+
+    assert list(pages) == [1] and list(errors) == [0]
+    assert errors[0].status == 404
+    assert DelayedPageHandler.requests == {'/missing-1.html': 1, '/flaky-2.html': 2}
+
+
+def test_run_stages_ordered_skips_failed_items():
+    def slow_square(item):
+        time.sleep(random.uniform(0, 0.01))
+        if item % 5 == 0:
+            raise ValueError('lỗi giả lập')
+        return None if item % 7 == 0 else item * item
+
+    written = []
+    run_stages(range(60), [Stage('square', slow_square, 8, 4)],
+               lambda index, result: written.append((index, result)), 4, ordered=True)
+
+    expected = [(item, item * item) for item in range(60) if item % 5 and item % 7]
+    assert written == expected
+
+
+def test_ordered_sink_buffers_until_gap_is_filled():
+    written = []
+    sink = OrderedSink(lambda index, result: written.append(result))
+
+    sink.put(2, 'c')
+    sink.put(1, 'b')
+    assert written == []
+    sink.skip(0)
+    assert written == ['b', 'c']
+    sink.put(4, 'e')
+    sink.flush()
+    assert written == ['b', 'c', 'e']
+
+
+def test_run_stages_keeps_finished_results_when_interrupted():
+    def produce():
+        yield from range(6)
+        time.sleep(0.05)  # Các phần tử 1..5 xong và nằm trong bộ đệm, phần tử 0 còn đang xử lý
+        raise KeyboardInterrupt
+
+    def square(item):
+        time.sleep(0.3 if item == 0 else 0)
+        return item * item
+
+    written = []
+    with pytest.raises(KeyboardInterrupt):
+        run_stages(produce(), [Stage('square', square, 4, 8)],
+                   lambda index, result: written.append(result), 8, ordered=True)
+
+    assert written == [item * item for item in range(6)]
+
+
+def test_pipeline_marks_capped_listing_done(page_server, fast_crawler, tmp_path):
+    crawler = fast_crawler(engine='pipeline', concurrency=4, parse_workers=1, dedup=False,
+                           run_dir=str(tmp_path / 'run'))
+    category = 'thuc-pham-chuc-nang/vitamin-khoang-chat'
+
+    crawler.crawl_category(category, max_products=3, product_urls=_urls(page_server, missing=()))
+
+    assert crawler.product_count == 3
+    assert crawler.state.category_status(category) == CATEGORY_DONE
+    assert len(crawler.state.category_urls(category)) == 3
+
+
+def test_checkpoint_without_dedup_fetches_product_in_every_category(page_server, fast_crawler, tmp_path):
+    crawler = fast_crawler(engine='sync', dedup=False, run_dir=str(tmp_path / 'run'))
+    urls = [f"{page_server}/p-1.html"]
+
+    crawler.crawl_category('thuc-pham-chuc-nang/a', product_urls=urls)
+    crawler.crawl_category('thuc-pham-chuc-nang/b', product_urls=urls)
+
+    assert crawler.product_count == 2
+    assert DelayedPageHandler.requests == {'/p-1.html': 2}
+
+
+def test_listing_card_sku_skips_duplicate_before_fetching(page_server, fast_crawler):
+    crawler = fast_crawler(engine='sync')
+    urls = [f"{page_server}/p-1.html", f"{page_server}/p-1-hop-30-vien.html"]
+    # Hai URL khác nhau của cùng một sản phẩm (SKU của trang mẫu)
+    crawler.listing_cards = {url: {'url': url, 'sku': '00012345'} for url in urls}
+
+    crawler.crawl_category('thuc-pham-chuc-nang/a', product_urls=urls)
+
+    assert DelayedPageHandler.requests == {'/p-1.html': 1}
+    assert crawler.product_count == 1
+    assert crawler.duplicate_count == 1
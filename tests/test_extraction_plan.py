@@ -0,0 +1,96 @@
+"""
+Extraction plan (PageIndex) phải cho cùng kết quả với cách tra cứu cũ bằng soup.select / find_all
+"""
+import os
+
+import pytest
+from bs4 import BeautifulSoup
+
+from conftest import DETAIL_PAGES, read_fixture
+from src.crawlers import longchau_crawler
+from src.crawlers.extraction_plan import FIELD_SELECTORS, STRUCTURE_SELECTORS, TEXT_KEYWORDS, PageIndex
+
+PAGE_IDS = [os.path.basename(path) for path in DETAIL_PAGES]
+
+
+class SoupIndex(PageIndex):
+    """Cách tra cứu trước khi có extraction plan: mỗi lần gọi duyệt lại cây bằng soupsieve / find_all"""
+
+    def _build(self):
+        pass
+
+    def select(self, selector):
+        if selector == 'div[class="flex items-center"]':
+            return self.soup.find_all('div', class_='flex items-center')
+        return self.soup.select(selector)
+
+    def strings_containing(self, keyword):
+        return self.soup.find_all(string=lambda text: text and keyword in text)
+
+    def table_rows(self):
+        rows = []
+        table = self.soup.find('table', class_='content-list')
+        if table:
+            for row in table.find_all('tr', class_='content-container'):
+                cells = row.find_all('td')
+                if len(cells) >= 2:
+                    rows.append((cells[0].get_text(), cells[1]))
+        return rows
+
+    def div_with_string(self, keyword):
+        return self.soup.find('div', string=lambda text: text and keyword in text)
+
+
+def _load(path):
+    soup = BeautifulSoup(read_fixture(path), 'html.parser')
+    return soup, PageIndex(soup), SoupIndex(soup)
+
+
+def _ids(elements):
+    return [id(element) for element in elements]
+
+
+@pytest.mark.parametrize('path', DETAIL_PAGES, ids=PAGE_IDS)
+def test_planned_selectors_match_soupsieve(path):
+    _, page, legacy = _load(path)
+    for selector in sorted({s for selectors in FIELD_SELECTORS.values() for s in selectors} | set(STRUCTURE_SELECTORS)):
+        assert _ids(page.select(selector)) == _ids(legacy.select(selector)), selector
+
+
+@pytest.mark.parametrize('path', DETAIL_PAGES, ids=PAGE_IDS)
+def test_descendant_selectors_match_soupsieve(path):
+    _, page, legacy = _load(path)
+    for selector in FIELD_SELECTORS['category']:
+        assert _ids(page.select(f'{selector} a')) == _ids(legacy.select(f'{selector} a')), selector
+
+
+@pytest.mark.parametrize('path', DETAIL_PAGES, ids=PAGE_IDS)
+def test_text_lookups_match_find_all(path):
+    _, page, legacy = _load(path)
+    for keyword in TEXT_KEYWORDS:
+        assert _ids(page.strings_containing(keyword)) == _ids(legacy.strings_containing(keyword)), keyword
+        assert page.div_with_string(keyword) is legacy.div_with_string(keyword), keyword
+    assert [(label, id(cell)) for label, cell in page.table_rows()] == \
+        [(label, id(cell)) for label, cell in legacy.table_rows()]
+
+
+def test_exact_class_selector_ignores_other_class_lists():
+    _, page, _ = _load(os.path.join(os.path.dirname(DETAIL_PAGES[0]), 'edge_cases.html'))
+    matched = page.select('div[class="flex items-center"]')
+    assert [element.get_text(' ', strip=True) for element in matched] == ['2 ( 5 đánh giá ) 7 bình luận']
+
+
+@pytest.mark.parametrize('json_first', [False, True], ids=['dom', 'json-first'])
+@pytest.mark.parametrize('path', DETAIL_PAGES, ids=PAGE_IDS)
+def test_records_match_soup_select_path(path, json_first, make_crawler, monkeypatch):
+    crawler = make_crawler(json_first=json_first)
+    html = read_fixture(path)
+    url = 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/san-pham.html'
+
+    record = crawler.parse_product_page(url, html)
+    monkeypatch.setattr(longchau_crawler, 'PageIndex', SoupIndex)
+    legacy_record = crawler.parse_product_page(url, html)
+
+    record.pop('crawled_at')
+    legacy_record.pop('crawled_at')
+    assert record == legacy_record
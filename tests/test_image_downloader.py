@@ -0,0 +1,75 @@
+"""
+Tải ảnh nền: submit() không chặn thread ghi bản ghi; bản ghi xuất ra luôn có image_files và CSV chịu được
+bản ghi thiếu / thừa trường
+"""
+import csv
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.crawlers.image_downloader import IMAGE_DONE, ImageDownloader
+from src.utils.record_writer import write_records
+
+
+class SlowImageHandler(BaseHTTPRequestHandler):
+    """Trả về nội dung khác nhau cho mỗi đường dẫn sau 0.1 giây"""
+
+    def do_GET(self):
+        time.sleep(0.1)
+        body = self.path.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def image_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), SlowImageHandler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_submit_does_not_block_when_backlog_is_full(image_server, tmp_path):
+    downloader = ImageDownloader(str(tmp_path / 'images'), workers=1, backlog=1)
+    urls = [f"{image_server}/anh-{index}.jpg" for index in range(10)]
+
+    start = time.perf_counter()
+    futures = [downloader.submit(url) for url in urls]
+    assert time.perf_counter() - start < 0.1  # Tải tuần tự mất khoảng 1 giây
+
+    assert downloader.submit(urls[0]) is futures[0]
+    downloader.wait()
+    assert downloader.stats['downloaded'] == 10
+    assert [downloader.status(url)['status'] for url in urls] == [IMAGE_DONE] * 10
+    downloader.close()
+
+
+def test_export_record_always_has_image_files(make_crawler):
+    crawler = make_crawler(download_images=True)
+
+    assert crawler._export_record({'url': 'https://nhathuoclongchau.com.vn/thuoc/a.html', 'images': []}) \
+        ['image_files'] == []
+    assert crawler._export_record({'url': 'https://nhathuoclongchau.com.vn/thuoc/b.html'})['image_files'] == []
+
+
+def test_csv_header_covers_records_with_different_fields(tmp_path):
+    csv_path = str(tmp_path / 'out' / 'products.csv')
+    records = [{'url': 'a', 'name': 'A'},
+               {'url': 'b', 'name': 'B', 'lastmod': '2026-01-02', 'image_files': []},
+               {'url': 'c', 'extra': 'bỏ qua'}]
+
+    assert write_records(iter(records), csv_path=csv_path, fieldnames=['url', 'name', 'lastmod', 'image_files']) == 3
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0].keys()) == ['url', 'name', 'lastmod', 'image_files']
+    assert [row['lastmod'] for row in rows] == ['', '2026-01-02', '']
+    assert rows[2]['name'] == ''
@@ -0,0 +1,40 @@
+"""
+Chuyển object sản phẩm trong payload JSON thành trường bản ghi: giá / số lượng dạng chuỗi đọc như trên DOM
+"""
+import pytest
+
+from src.crawlers.json_payload import map_product_fields
+
+
+@pytest.mark.parametrize('price, expected', [
+    (250000, 250000.0),
+    (250000.0, 250000.0),
+    ('250000', 250000.0),
+    ('250.000', 250000.0),
+    ('1.250.000', 1250000.0),
+    ('250,000', 250000.0),
+    ('250.000đ', 250000.0),
+    ('1.250.000 ₫', 1250000.0),
+    ('250000.00', 250000.0),
+    ('250000.5', 250000.0),
+])
+def test_price_strings_use_thousands_separators(price, expected):
+    assert map_product_fields({'sku': '1', 'price': price})['price'] == expected
+
+
+def test_price_from_nested_offer_and_price_object():
+    assert map_product_fields({'offers': {'price': '125.000'}})['price'] == 125000.0
+    assert map_product_fields({'price': {'price': '99.000', 'measureUnitName': 'Hộp'}}) == \
+        {'price': 99000.0, 'unit': 'Hộp'}
+
+
+@pytest.mark.parametrize('price', ['', 'Liên hệ', None, True])
+def test_missing_or_non_numeric_price_is_skipped(price):
+    assert 'price' not in map_product_fields({'name': 'A', 'price': price})
+
+
+def test_rating_and_reviews_count_strings():
+    fields = map_product_fields({'aggregateRating': {'ratingValue': '4,5', 'reviewCount': '1.234'}})
+    assert fields['rating'] == 4.5
+    assert fields['reviews_count'] == 1234
+    assert map_product_fields({'rating': '4.8'})['rating'] == 4.8
@@ -0,0 +1,123 @@
+"""
+ListingApiClient và fallback sang Selenium, chạy với server giả lập fake_listing_api.py trên cổng ngẫu nhiên
+"""
+import threading
+import time
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from fake_listing_api import FakeListingHandler
+from src.crawlers.listing_api import ListingApiClient
+from src.utils.helpers import create_session
+
+CATEGORY = 'thuc-pham-chuc-nang/canxi-vitamin-D'
+
+
+def start_server(products: int = 100, latency: float = 0.0, fail: bool = False):
+    """Chạy server giả lập trong thread; trả về (server, url, danh sách request đã nhận, số request đồng thời tối đa)"""
+    received = []
+    in_flight = {'now': 0, 'max': 0}
+    lock = threading.Lock()
+
+    class Handler(FakeListingHandler):
+        products_per_category = products
+
+        def do_POST(self):
+            with lock:
+                in_flight['now'] += 1
+                in_flight['max'] = max(in_flight['max'], in_flight['now'])
+            try:
+                if latency:
+                    time.sleep(latency)
+                if fail:
+                    self.send_error(500, 'Lỗi giả lập')
+                    return
+                received.append(self.path)
+                super().do_POST()
+            finally:
+                with lock:
+                    in_flight['now'] -= 1
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/search/cate", received, in_flight
+
+
+@pytest.fixture
+def listing_server():
+    servers = []
+
+    def start(**kwargs):
+        server, *rest = start_server(**kwargs)
+        servers.append(server)
+        return rest
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_pages_through_every_product_in_order(listing_server):
+    url, received, _ = listing_server(products=95)
+    client = ListingApiClient(create_session(), url, page_size=20, concurrency=4)
+
+    cards = list(client.iter_cards(CATEGORY))
+
+    assert [card['sku'] for card in cards] == [f"00{index:06d}" for index in range(1, 96)]
+    assert cards[0]['url'].endswith('/thuc-pham-chuc-nang/san-pham-canxi-vitamin-d-1.html')
+    assert cards[0]['price'] == 11000
+    assert len(received) == 5  # ceil(95 / 20) trang, mỗi trang đúng một request
+
+
+def test_fetches_remaining_pages_concurrently(listing_server):
+    url, received, in_flight = listing_server(products=100, latency=0.2)
+    client = ListingApiClient(create_session(), url, page_size=10, concurrency=4)
+
+    start = time.perf_counter()
+    cards = list(client.iter_cards(CATEGORY))
+    elapsed = time.perf_counter() - start
+
+    assert len(cards) == 100
+    assert in_flight['max'] == 4
+    # Trang đầu + 9 trang còn lại theo lô 4 request: khoảng 4 lượt trễ thay vì 10
+    assert elapsed < 10 * 0.2 * 0.7
+
+
+@pytest.mark.parametrize('products, expected_requests', [(0, 1), (20, 1), (21, 2)])
+def test_stops_after_last_page(listing_server, products, expected_requests):
+    url, received, _ = listing_server(products=products)
+    client = ListingApiClient(create_session(), url, page_size=20)
+
+    assert len(list(client.iter_cards(CATEGORY))) == products
+    assert len(received) == expected_requests
+
+
+def test_crawler_lists_products_from_api(listing_server, make_crawler, monkeypatch):
+    url, _, _ = listing_server(products=30)
+    crawler = make_crawler(listing_source='auto', listing_api_url=url)
+    monkeypatch.setattr(crawler, 'iter_product_urls_from_browser',
+                        lambda category_url: pytest.fail('Không được dùng Selenium khi API hoạt động'))
+
+    urls = crawler.get_product_urls(CATEGORY)
+    assert len(urls) == 30
+
+
+@pytest.mark.parametrize('products, fail', [(0, False), (10, True)], ids=['empty', 'error'])
+def test_auto_falls_back_to_browser(listing_server, make_crawler, monkeypatch, products, fail):
+    url, _, _ = listing_server(products=products, fail=fail)
+    crawler = make_crawler(listing_source='auto', listing_api_url=url)
+    browser_urls = ['https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/tu-trinh-duyet.html']
+    monkeypatch.setattr(crawler, 'iter_product_urls_from_browser', lambda category_url: iter(browser_urls))
+
+    assert crawler.get_product_urls(CATEGORY) == browser_urls
+
+
+def test_api_mode_does_not_fall_back(listing_server, make_crawler, monkeypatch):
+    url, _, _ = listing_server(fail=True)
+    crawler = make_crawler(listing_source='api', listing_api_url=url)
+    monkeypatch.setattr(crawler, 'iter_product_urls_from_browser',
+                        lambda category_url: pytest.fail('Chế độ api không fallback sang Selenium'))
+
+    assert crawler.get_product_urls(CATEGORY) == []
@@ -0,0 +1,56 @@
+"""
+Log JSON Lines và bản ghi log được chuẩn bị (message, traceback) trước khi vào hàng đợi của thread nền
+"""
+import json
+import logging
+import queue
+import sys
+
+from src.utils.helpers import JsonLogFormatter, _BackgroundQueueHandler
+
+
+def _record(msg, *args, exc_info=None, **extra):
+    record = logging.LogRecord('src.crawlers.longchau_crawler', logging.WARNING, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+
+def _exc_info():
+    try:
+        raise ValueError('giá không hợp lệ')
+    except ValueError:
+        return sys.exc_info()
+
+
+def test_json_formatter_writes_one_json_object_per_record():
+    record = _record('Không tải được %s', 'https://a/1.html', exc_info=_exc_info(), url='https://a/1.html', status=503)
+
+    line = JsonLogFormatter().format(record)
+
+    assert '\n' not in line
+    entry = json.loads(line)
+    assert entry['level'] == 'WARNING'
+    assert entry['logger'] == 'src.crawlers.longchau_crawler'
+    assert entry['message'] == 'Không tải được https://a/1.html'
+    assert entry['url'] == 'https://a/1.html' and entry['status'] == 503
+    assert 'ValueError: giá không hợp lệ' in entry['exception']
+    assert {'time', 'thread'} <= set(entry)
+
+
+def test_queued_record_is_prepared_in_calling_thread():
+    log_queue = queue.SimpleQueue()
+    handler = _BackgroundQueueHandler(log_queue)
+    card = {'price': 120000}
+    record = _record('Card: %s', card, exc_info=_exc_info(), url='https://a/1.html')
+
+    handler.handle(record)
+    card['price'] = 0  # Sửa args sau khi log không làm đổi message đã vào hàng đợi
+    queued = log_queue.get_nowait()
+
+    assert queued.getMessage() == "Card: {'price': 120000}"
+    assert queued.args is None and queued.exc_info is None
+    assert record.args is card  # Bản ghi gốc không bị sửa (một dict làm args được giữ nguyên)
+    entry = json.loads(JsonLogFormatter().format(queued))
+    assert entry['url'] == 'https://a/1.html'
+    assert 'ValueError: giá không hợp lệ' in entry['exception']
+    assert 'ValueError' in logging.Formatter('%(message)s').format(queued)
@@ -0,0 +1,61 @@
+"""
+Mọi backend trong HTML_PARSER_BACKENDS phải cho cùng bản ghi sản phẩm trên cùng một trang HTML
+"""
+import os
+
+import pytest
+
+from conftest import DETAIL_PAGES, read_fixture
+from config.settings import HTML_PARSER_BACKENDS
+
+
+@pytest.mark.parametrize('json_first', [False, True], ids=['dom', 'json-first'])
+@pytest.mark.parametrize('path', DETAIL_PAGES, ids=[os.path.basename(path) for path in DETAIL_PAGES])
+def test_backends_produce_identical_records(path, json_first, make_crawler):
+    html = read_fixture(path)
+    url = 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/san-pham.html'
+
+    records = {}
+    for backend in HTML_PARSER_BACKENDS:
+        record = make_crawler(parser=backend, json_first=json_first).parse_product_page(url, html)
+        record.pop('crawled_at')
+        records[backend] = record
+
+    reference, *others = HTML_PARSER_BACKENDS
+    for backend in others:
+        assert records[backend] == records[reference], f"{backend} khác {reference}"
+
+
+def test_fixtures_exercise_every_field(make_crawler):
+    """Fixture phải đủ đa dạng để phép so sánh có ý nghĩa: mỗi trường có giá trị ở ít nhất một trang"""
+    from src.crawlers.longchau_crawler import PRODUCT_FIELD_EXTRACTORS
+
+    crawler = make_crawler(json_first=False)
+    filled = set()
+    for path in DETAIL_PAGES:
+        record = crawler.parse_product_page('https://nhathuoclongchau.com.vn/a/b.html', read_fixture(path))
+        filled.update(field for field, value in record.items() if value)
+    missing = [field for field, _ in PRODUCT_FIELD_EXTRACTORS if field not in filled]
+    assert not missing, f"Không fixture nào có giá trị cho: {', '.join(missing)}"
+
+
+def test_parse_worker_matches_crawler_without_side_effects(make_crawler, tmp_path):
+    """Process parse chỉ dựng ProductPageParser: không tạo file (logs/, data/), thread hay session"""
+    import threading
+
+    from src.crawlers import longchau_crawler
+
+    url = 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/san-pham.html'
+    html = read_fixture(DETAIL_PAGES[0])
+    threads = threading.active_count()
+    longchau_crawler._init_reextract_worker('html.parser', True)
+    record = longchau_crawler._parse_page(url, html)
+
+    assert type(longchau_crawler._worker_parser) is longchau_crawler.ProductPageParser
+    assert threading.active_count() == threads
+    assert os.listdir(tmp_path) == []
+
+    expected = make_crawler(parser='html.parser', json_first=True).parse_product_page(url, html)
+    record.pop('crawled_at')
+    expected.pop('crawled_at')
+    assert record == expected
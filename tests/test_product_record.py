@@ -0,0 +1,57 @@
+"""
+ProductRecord: bản ghi __slots__ chuyển qua lại với dict, trường ít giá trị khác nhau dùng chung một chuỗi
+"""
+import pytest
+
+from src.utils.product_record import PRODUCT_FIELDS, ProductRecord
+
+PRODUCT = {
+    'url': 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/vitamin-c-500mg.html',
+    'name': 'Vitamin C 500mg',
+    'price': 120000.0,
+    'sku': '00012345',
+    'brand': 'DHG',
+    'images': ['https://cdn.nhathuoclongchau.com.vn/a.jpg', 'https://cdn.nhathuoclongchau.com.vn/b.jpg'],
+    'categories': ['thuc-pham-chuc-nang/vitamin-khoang-chat', 'thuc-pham-chuc-nang/tang-de-khang'],
+    'image_files': [{'url': 'https://cdn.nhathuoclongchau.com.vn/a.jpg', 'status': 'done'}],
+}
+
+
+def test_record_has_no_instance_dict():
+    record = ProductRecord.from_dict(PRODUCT)
+
+    assert not hasattr(record, '__dict__')
+    with pytest.raises(AttributeError):
+        record.not_a_field = 1
+
+
+def test_to_dict_round_trip_in_schema_order():
+    record = ProductRecord.from_dict(PRODUCT)
+    data = record.to_dict()
+
+    assert data == PRODUCT
+    # Trường của schema theo thứ tự xuất file, trường ngoài schema ở cuối
+    assert list(data) == [field for field in PRODUCT_FIELDS if field in PRODUCT] + ['image_files']
+    assert isinstance(data['images'], list) and isinstance(data['categories'], list)
+    assert ProductRecord.from_dict(data).to_dict() == data
+
+
+def test_dict_like_access():
+    record = ProductRecord.from_dict(PRODUCT)
+
+    assert record['name'] == 'Vitamin C 500mg'
+    assert record.get('rating') is None
+    assert 'image_files' in record and 'rating' not in record
+    with pytest.raises(KeyError):
+        record['rating']
+    record['rating'] = 4.5
+    assert record.get('rating') == 4.5
+
+
+def test_dictionary_fields_share_one_string():
+    # Chuỗi tạo lúc chạy (không phải hằng số) để không bị intern sẵn
+    first = ProductRecord.from_dict({'brand': ''.join(['D', 'H', 'G']), 'categories': [''.join(['a', '/b'])]})
+    second = ProductRecord.from_dict({'brand': ''.join(['D', 'H', 'G']), 'categories': [''.join(['a', '/b'])]})
+
+    assert first['brand'] is second['brand']
+    assert first['categories'][0] is second['categories'][0]
@@ -0,0 +1,103 @@
+"""
+Đọc sitemap index + sitemap con (local, gzip, bị cắt giữa chừng) và lọc URL sản phẩm theo danh mục chính
+"""
+import logging
+import os
+
+import pytest
+
+from conftest import FIXTURES_DIR
+from src.crawlers.sitemap import _resolve_child, iter_sitemap
+from src.utils.crawl_state import CATEGORY_LISTED, URL_DONE
+
+SITEMAP_DIR = os.path.join(FIXTURES_DIR, 'sitemap')
+SITEMAP_INDEX = os.path.join(SITEMAP_DIR, 'sitemap_index.xml')
+BASE = 'https://nhathuoclongchau.com.vn'
+
+
+def test_index_yields_children_in_order_with_lastmod(caplog):
+    with caplog.at_level(logging.ERROR, logger='src.crawlers.sitemap'):
+        entries = list(iter_sitemap(SITEMAP_INDEX))
+
+    assert entries == [
+        (f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html', '2026-01-02T08:30:00+07:00'),
+        (f'{BASE}/thuoc/paracetamol-500mg.html', None),
+        (f'{BASE}/thuc-pham-chuc-nang', None),
+        (f'{BASE}/thuoc/paracetamol-500mg.html?page=2', None),
+        (f'{BASE}/bai-viet/suc-khoe/an-uong-mua-he.html', None),
+        (f'{BASE}/duoc-my-pham/kem-chong-nang-spf50.html', None),  # loc có khoảng trắng, lastmod rỗng
+        (f'{BASE}/cham-soc-ca-nhan/kem-danh-rang-than-hoat-tinh.html', '2026-02-10'),
+        (f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html', '2026-02-11'),
+        (f'{BASE}/trang-thiet-bi-y-te/may-do-huyet-ap.html', '2026-02-20'),  # trước chỗ bị cắt
+    ]
+    assert 'broken.xml' in caplog.text
+
+
+def test_image_extension_does_not_override_page_url():
+    entries = list(iter_sitemap(os.path.join(SITEMAP_DIR, 'image_sitemap.xml')))
+
+    assert entries == [
+        (f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html', '2026-01-02'),
+        (f'{BASE}/thuoc/paracetamol-500mg.html', None),
+    ]
+
+
+def test_reads_gzipped_child_directly():
+    entries = list(iter_sitemap(os.path.join(SITEMAP_DIR, 'sitemap-products-2.xml.gz')))
+    assert [lastmod for _, lastmod in entries] == ['2026-02-10', '2026-02-11']
+
+
+@pytest.mark.parametrize('child, parent, expected', [
+    # Sitemap cha từ xa: giữ nguyên URL con
+    (f'{BASE}/sitemap-products-1.xml', f'{BASE}/sitemap.xml', f'{BASE}/sitemap-products-1.xml'),
+    # Sitemap cha local: đường dẫn tương đối tính từ thư mục của nó
+    ('sitemap-products-2.xml.gz', SITEMAP_INDEX, os.path.join(SITEMAP_DIR, 'sitemap-products-2.xml.gz')),
+    # URL con có bản sao cùng tên bên cạnh sitemap cha thì dùng bản local
+    (f'{BASE}/sitemap-products-1.xml', SITEMAP_INDEX, os.path.join(SITEMAP_DIR, 'sitemap-products-1.xml')),
+    (f'{BASE}/sitemap-khong-co-ban-sao.xml', SITEMAP_INDEX, f'{BASE}/sitemap-khong-co-ban-sao.xml'),
+])
+def test_resolve_child(child, parent, expected):
+    assert _resolve_child(child, parent) == expected
+
+
+def test_crawler_keeps_product_urls_of_main_categories(make_crawler):
+    crawler = make_crawler()
+
+    urls = list(crawler.iter_product_urls_from_sitemap(SITEMAP_INDEX, ['thuc-pham-chuc-nang', 'thuoc']))
+
+    assert urls == [f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html', f'{BASE}/thuoc/paracetamol-500mg.html']
+    # URL xuất hiện trong hai sitemap con giữ lastmod của lần đầu
+    assert crawler.sitemap_lastmod == {
+        f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html': '2026-01-02T08:30:00+07:00',
+        f'{BASE}/thuoc/paracetamol-500mg.html': None,
+    }
+
+
+def test_crawler_defaults_to_all_categories(make_crawler):
+    crawler = make_crawler()
+
+    urls = list(crawler.iter_product_urls_from_sitemap(SITEMAP_INDEX))
+
+    assert [url.replace(BASE, '').split('/')[1] for url in urls] == [
+        'thuc-pham-chuc-nang', 'thuoc', 'duoc-my-pham', 'cham-soc-ca-nhan', 'trang-thiet-bi-y-te']
+    assert crawler.sitemap_lastmod[f'{BASE}/cham-soc-ca-nhan/kem-danh-rang-than-hoat-tinh.html'] == '2026-02-10'
+
+
+def test_resumed_sitemap_run_restores_lastmod_from_checkpoint(make_crawler):
+    label = 'sitemap'
+    crawler = make_crawler(run_dir='data/runs/test')
+    urls = list(crawler.iter_product_urls_from_sitemap(SITEMAP_INDEX, ['thuc-pham-chuc-nang', 'thuoc']))
+    crawler.state.add_urls(label, urls)
+    crawler.state.mark_category(label, CATEGORY_LISTED)
+    for url in urls:
+        crawler.state.mark_url(url, URL_DONE, category_url=label)
+    crawler.close()
+
+    resumed = make_crawler(run_dir='data/runs/test')
+    # Danh sách đã có trong checkpoint: sitemap không được đọc lại
+    resumed.crawl_sitemap('khong-ton-tai.xml', ['thuc-pham-chuc-nang', 'thuoc'])
+
+    assert resumed.sitemap_lastmod == {
+        f'{BASE}/thuc-pham-chuc-nang/vitamin-c-500mg.html': '2026-01-02T08:30:00+07:00',
+        f'{BASE}/thuoc/paracetamol-500mg.html': None,
+    }
@@ -0,0 +1,66 @@
+"""
+Tín hiệu thay đổi của snapshot incremental: lastmod sitemap, hash dữ liệu listing API, giá/tên trên card
+"""
+import sqlite3
+
+from src.crawlers.listing_api import ListingApiClient
+from src.utils.snapshot_store import SnapshotStore
+
+URL = 'https://nhathuoclongchau.com.vn/thuc-pham-chuc-nang/vitamin-c-500mg.html'
+
+
+def _api_product(**changes):
+    product = {'sku': '00012345', 'webName': 'Vitamin C 500mg', 'slug': 'thuc-pham-chuc-nang/vitamin-c-500mg.html',
+               'price': {'price': 120000, 'measureUnitName': 'Hộp'}, 'promotion': None}
+    product.update(changes)
+    return product
+
+
+def test_listing_hash_detects_changes_that_price_and_name_miss(tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.db'), max_age=3600)
+    card = ListingApiClient.to_card(_api_product())
+    snapshot.update({'url': URL, 'sku': '00012345', 'name': 'Vitamin C 500mg'}, card=card)
+
+    assert snapshot.unchanged_record(URL, card=ListingApiClient.to_card(_api_product()))['name'] == 'Vitamin C 500mg'
+    promoted = ListingApiClient.to_card(_api_product(promotion={'discount': 10}))
+    assert promoted['price'] == card['price'] and promoted['name'] == card['name']
+    assert snapshot.unchanged_record(URL, card=promoted) is None
+    snapshot.close()
+
+
+def test_snapshot_without_listing_hash_falls_back_to_price_and_name(tmp_path):
+    path = str(tmp_path / 'snapshot.db')
+    with sqlite3.connect(path) as db:
+        db.execute('CREATE TABLE products (url TEXT PRIMARY KEY, sku TEXT, lastmod TEXT, listing_price REAL, '
+                   'listing_name TEXT, content_hash TEXT, record BLOB, fetched_at REAL)')
+    snapshot = SnapshotStore(path, max_age=3600)
+    snapshot.update({'url': URL, 'name': 'Vitamin C 500mg'}, card={'price': 120000, 'name': 'Vitamin C 500mg'})
+
+    card = ListingApiClient.to_card(_api_product())
+    assert snapshot.unchanged_record(URL, card=card) is not None
+    assert snapshot.unchanged_record(URL, card=dict(card, price=99000)) is None
+    snapshot.close()
+
+
+def test_snapshot_updates_are_committed_in_batches(tmp_path):
+    path = str(tmp_path / 'snapshot.db')
+    snapshot = SnapshotStore(path, max_age=3600, commit_every=2, commit_interval=60)
+
+    snapshot.update({'url': URL, 'name': 'Vitamin C 500mg'})
+    with sqlite3.connect(path) as db:
+        assert db.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 0
+
+    snapshot.close()
+    with sqlite3.connect(path) as db:
+        assert db.execute('SELECT COUNT(*) FROM products').fetchone()[0] == 1
+
+
+def test_product_seen_from_another_category_is_not_changed(tmp_path):
+    snapshot = SnapshotStore(str(tmp_path / 'snapshot.db'), max_age=3600)
+    record = {'url': URL, 'name': 'Vitamin C 500mg', 'crawled_at': '2026-01-01 08:00:00'}
+
+    assert snapshot.update(dict(record, categories=['thuc-pham-chuc-nang']))
+    assert not snapshot.update(dict(record, categories=['thuc-pham-chuc-nang', 'vitamin-khoang-chat'],
+                                    crawled_at='2026-01-02 08:00:00'))
+    assert snapshot.update(dict(record, name='Vitamin C 1000mg'))
+    snapshot.close()